@@ -0,0 +1,89 @@
+"""Label recall of the OCR strategies on synthetic diagrams.
+
+Renders diagrams whose labels are known, including a large title and
+white labels on filled boxes, runs extract_components with each strategy
+and reports the share of labels that come back intact on one OCR line.
+Needs OpenCV and Tesseract; exits without failing when they are missing.
+
+    python -m benchmarks.recall
+    python -m benchmarks.recall --strategies full regions --max-drop 0.05
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+from benchmarks.synthetic import SIZES, render_diagram
+
+TITLE = "Payments Platform"
+
+# name -> (size, render options)
+CASES = {
+    "plain": ("medium", {}),
+    "titled": ("medium", {"title": TITLE}),
+    "filled": ("medium", {"filled": True}),
+}
+
+
+def normalize(text):
+    """Lowercase words only, so spacing and punctuation differences don't count as misses"""
+    return " ".join(re.findall(r'[a-z0-9]+', text.lower()))
+
+
+def recall(labels, text):
+    """Share of labels found whole on a single OCR line"""
+    lines = [normalize(line) for line in text.split('\n')]
+    found = sum(any(normalize(label) in line for line in lines) for label in labels)
+    return found / len(labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare label recall of the OCR strategies")
+    parser.add_argument("--strategies", nargs="+", default=["auto", "full", "regions"],
+                        choices=["auto", "full", "regions", "tiled"], help="Strategies to compare")
+    parser.add_argument("--max-drop", type=float, default=0.02,
+                        help="Fail if `auto` recalls this much less than `full` on any case")
+    args = parser.parse_args()
+
+    try:
+        import cv2  # noqa: F401
+        from src.ocr.engines import get_engine
+        get_engine().version()
+    except Exception as e:
+        print(f"recall: skipped (OCR unavailable: {e})")
+        return
+    from src.ocr.extractor import extract_components
+    from src.utils.config import Config
+    Config.DEBUG = False
+
+    scores = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for case, (size, options) in CASES.items():
+            width, height, boxes = SIZES[size]
+            path = os.path.join(directory, f"{case}.png")
+            labels = render_diagram(path, width, height, boxes, **options)
+            if options.get("title"):
+                labels = labels + [options["title"]]
+            for strategy in args.strategies:
+                components = extract_components(path, use_cache=False, strategy=strategy)
+                scores[case, strategy] = recall(labels, components.get("text", ""))
+                print(f"{case:10s} {strategy:8s} {scores[case, strategy]:6.1%}")
+
+    failures = [
+        f"{case}: auto {scores[case, 'auto']:.1%} vs full {scores[case, 'full']:.1%}"
+        for case in CASES
+        if (case, 'auto') in scores and (case, 'full') in scores
+        and scores[case, 'auto'] < scores[case, 'full'] - args.max_drop
+    ]
+    if failures:
+        print("\nFAILED: default strategy recalls fewer labels than whole-image OCR")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+
+    print("\nRecall benchmark passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Startup-time benchmark for the CLI.
+
+Checks that `main.py --help` stays fast and that selecting one provider only
+imports that provider's SDK and none of the OCR stack.
+
+    python -m benchmarks.startup --runs 10 --max-help-ms 400
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be loaded until they are actually needed
+HEAVY_MODULES = ['cv2', 'numpy', 'pytesseract', 'tesserocr']
+PROVIDER_SDKS = {
+    'gemini': 'google.generativeai',
+    'openai': 'openai'
+}
+
+# Imports main, resolves one provider class and reports what got loaded
+PROVIDER_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+from src.analysis import llm_providers
+from src.analysis.analyzer import SecurityAnalyzer
+getattr(llm_providers, SecurityAnalyzer._providers[sys.argv[1]])
+print(json.dumps({"seconds": time.perf_counter() - started, "modules": sorted(sys.modules)}))
+"""
+
+
+def time_command(args, runs):
+    """Median wall time in milliseconds of running a command"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def probe_provider(provider):
+    """Import cost and loaded modules when only one provider is selected"""
+    output = subprocess.run(
+        [sys.executable, '-c', PROVIDER_PROBE, provider],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def loaded(modules, name):
+    return any(module == name or module.startswith(name + '.') for module in modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per measurement")
+    parser.add_argument("--max-help-ms", type=float, default=400,
+                        help="Fail if the median `--help` time exceeds this")
+    parser.add_argument("--max-import-ms", type=float, default=1500,
+                        help="Fail if importing a single provider exceeds this")
+    parser.add_argument("--providers", nargs="+", default=list(PROVIDER_SDKS),
+                        help="Providers to probe (their SDKs must be installed)")
+    args = parser.parse_args()
+
+    failures = []
+
+    help_ms = time_command([sys.executable, 'main.py', '--help'], args.runs)
+    print(f"main.py --help: {help_ms:.0f} ms (budget {args.max_help_ms:.0f} ms)")
+    if help_ms > args.max_help_ms:
+        failures.append(f"--help took {help_ms:.0f} ms")
+
+    for provider in args.providers:
+        result = probe_provider(provider)
+        import_ms = result["seconds"] * 1000
+        print(f"{provider} provider import: {import_ms:.0f} ms (budget {args.max_import_ms:.0f} ms)")
+        if import_ms > args.max_import_ms:
+            failures.append(f"{provider} import took {import_ms:.0f} ms")
+
+        unexpected = [name for name in HEAVY_MODULES if loaded(result["modules"], name)]
+        unexpected += [sdk for other, sdk in PROVIDER_SDKS.items()
+                       if other != provider and loaded(result["modules"], sdk)]
+        if unexpected:
+            failures.append(f"{provider} run imported {', '.join(unexpected)}")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+
+    print("\nStartup benchmark passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Offline performance benchmarks with a stored baseline.
+
+Runs without API keys: provider calls go to the stub provider. The OCR
+benchmarks render synthetic diagrams and need OpenCV and Tesseract; they
+are skipped, not failed, when those are unavailable.
+
+    python -m benchmarks.suite                     # compare with the baseline
+    python -m benchmarks.suite --update-baseline   # record a new baseline
+    python -m benchmarks.suite --only prompt parse
+
+Runs fail when a benchmark's median is more than --tolerance slower than
+its baseline, and when there is no baseline to compare with; record one
+with --update-baseline after an intended change or on a new machine.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import SIZES, render_diagram, synthetic_components, synthetic_labels
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Label counts for the benchmarks that start from components
+LABEL_COUNTS = [20, 200, 2000]
+
+
+class SkipBenchmark(Exception):
+    """The benchmark cannot run in this environment"""
+
+
+def median_ms(function, runs, warmup=1):
+    """Median wall time in milliseconds, after warm-up calls"""
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def stub_provider():
+    from src.analysis.llm_providers import StubProvider
+
+    provider = StubProvider()
+    provider.latency = 0
+    provider.use_cache = False
+    return provider
+
+
+def bench_extract(runs):
+    """extract_components on rendered diagrams, OCR cache disabled"""
+    try:
+        import cv2  # noqa: F401
+        from src.ocr.engines import get_engine
+        get_engine().version()
+    except Exception as e:
+        raise SkipBenchmark(f"OCR unavailable: {e}")
+    from src.ocr.extractor import extract_components
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("small", "medium", "large"):
+            width, height, boxes = SIZES[name]
+            path = os.path.join(directory, f"{name}.png")
+            render_diagram(path, width, height, boxes)
+            results[f"extract_components[{name}]"] = median_ms(
+                lambda: extract_components(path, use_cache=False), runs, warmup=0)
+    return results
+
+
+def bench_prompt(runs):
+    """_create_prompt for growing amounts of OCR text"""
+    provider = stub_provider()
+    results = {}
+    for count in LABEL_COUNTS:
+        components = synthetic_components(synthetic_labels(count))
+        results[f"create_prompt[{count}]"] = median_ms(lambda: provider._create_prompt(components), runs)
+    return results
+
+
+def bench_parse(runs):
+    """_parse_response on plain and fenced responses of growing size"""
+    provider = stub_provider()
+    response = json.loads(provider.response)
+    results = {}
+    for count in (2, 50, 500):
+        response["recommendations"] = [f"Recommendation {i}: restrict access to the CDE" for i in range(count)]
+        text = json.dumps(response, indent=2)
+        results[f"parse_response[{count}]"] = median_ms(lambda: provider._parse_response(text), runs)
+        fenced = f"```json\n{text}\n```"
+        results[f"parse_response_fenced[{count}]"] = median_ms(lambda: provider._parse_response(fenced), runs)
+    return results
+
+
+def bench_end_to_end(runs):
+    """SecurityAnalyzer.analyze_security against the stub, with and without rules"""
+    from src.analysis.analyzer import SecurityAnalyzer
+
+    results = {}
+    for use_rules in (True, False):
+        analyzer = SecurityAnalyzer(provider_type='stub', use_cache=False, use_rules=use_rules)
+        analyzer.provider.latency = 0
+        for count in LABEL_COUNTS[:2]:
+            components = synthetic_components(synthetic_labels(count))
+            name = f"analyze_security[{count}{',rules' if use_rules else ''}]"
+            results[name] = median_ms(lambda: analyzer.analyze_security(components), runs)
+    return results
+
+
+BENCHMARKS = {
+    "extract": bench_extract,
+    "prompt": bench_prompt,
+    "parse": bench_parse,
+    "end_to_end": bench_end_to_end,
+}
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    baseline = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine()
+        },
+        "benchmarks": {name: {"median_ms": round(value, 4)} for name, value in sorted(results.items())}
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """Regressions as (name, current, baseline) tuples"""
+    regressions = []
+    for name, current in sorted(results.items()):
+        reference = baseline["benchmarks"].get(name)
+        if reference is None:
+            continue
+        # Sub-millisecond timings are noisy; give them an absolute allowance
+        allowed = max(reference["median_ms"] * (1 + tolerance), reference["median_ms"] + floor_ms)
+        if current > allowed:
+            regressions.append((name, current, reference["median_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per benchmark")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Overwrite the baseline with this run's results")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown relative to the baseline (0.25 = 25%%)")
+    parser.add_argument("--floor-ms", type=float, default=0.05,
+                        help="Allowed absolute slowdown for very fast benchmarks")
+    args = parser.parse_args()
+
+    # Keep caches and debug output from skewing the numbers
+    os.environ.setdefault('STUB_LATENCY', '0')
+    from src.utils.config import Config
+    Config.DEBUG = False
+
+    results = {}
+    for name in args.only or list(BENCHMARKS):
+        try:
+            timings = BENCHMARKS[name](args.runs)
+        except SkipBenchmark as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        for bench, value in timings.items():
+            print(f"{bench:45s} {value:10.3f} ms")
+        results.update(timings)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        if baseline is not None and args.only:
+            # Keep entries for benchmarks that were not run this time
+            merged = {name: entry["median_ms"] for name, entry in baseline["benchmarks"].items()}
+            merged.update(results)
+            results = merged
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    if baseline is None:
+        print(f"\nFAILED: no baseline at {args.baseline}; run with --update-baseline to record one")
+        sys.exit(1)
+
+    regressions = compare(results, baseline, args.tolerance, args.floor_ms)
+    if regressions:
+        print("\nFAILED: slower than baseline")
+        for name, current, reference in regressions:
+            print(f"- {name}: {current:.3f} ms vs {reference:.3f} ms ({current / reference - 1:+.0%})")
+        sys.exit(1)
+
+    print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Synthetic architecture diagrams for benchmarks.
+
+Renders labeled boxes joined by arrows at several sizes and densities, so
+OCR can be measured without real customer diagrams.
+
+    python -m benchmarks.synthetic out/ --sizes small medium large
+"""
+import argparse
+import math
+import os
+import random
+
+# name -> (width, height, boxes)
+SIZES = {
+    "small": (1200, 800, 12),
+    "medium": (2400, 1600, 40),
+    "large": (4800, 3200, 120),
+    "dense": (2400, 1600, 160),
+}
+
+COMPONENTS = [
+    "Web Server", "App Server", "Payment API", "API Gateway", "Customer Portal", "Mobile App",
+    "Card Database", "PostgreSQL", "Redis Cache", "Kafka", "S3 Bucket", "Data Warehouse",
+    "Firewall", "WAF", "Load Balancer", "DMZ", "VPN Gateway", "Internet", "Intranet",
+    "HSM", "Key Vault", "SIEM", "Audit Log", "LDAP", "Bastion Host", "IDS/IPS",
+    "Batch Worker", "Scheduler", "Kubernetes", "Reporting Service", "Backup Storage"
+]
+QUALIFIERS = ["", "", "Primary", "Replica", "EU", "US", "Internal", "Public", "v2"]
+PROTOCOLS = ["", "", "HTTPS", "TLS 1.2", "mTLS", "SFTP", "JDBC", "gRPC"]
+
+
+def synthetic_labels(count, seed=0):
+    """Component labels such as 'Primary Card Database (TLS 1.2)'"""
+    rng = random.Random(seed)
+    labels = []
+    for index in range(count):
+        label = " ".join(part for part in (rng.choice(QUALIFIERS), rng.choice(COMPONENTS)) if part)
+        protocol = rng.choice(PROTOCOLS)
+        if protocol:
+            label += f" ({protocol})"
+        # Keep labels unique so OCR output can be compared one-to-one
+        labels.append(f"{label} {index}" if label in labels else label)
+    return labels
+
+
+def synthetic_components(labels):
+    """Components as build_components would produce them for these labels, without OCR"""
+    from src.ocr.taxonomy import get_taxonomy
+
+    return {
+        "text": "\n".join(labels),
+        "detected_items": get_taxonomy().categorize(labels)
+    }
+
+
+def render_diagram(path, width, height, boxes, seed=0, title=None, filled=False):
+    """Draw `boxes` labeled boxes in a grid joined by arrows; returns the labels
+
+    `title` adds a heading at five times the label size above the grid, and
+    `filled` fills every other box with its colour and labels it in white.
+    """
+    import cv2
+    import numpy as np
+
+    rng = random.Random(seed)
+    labels = synthetic_labels(boxes, seed)
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+
+    top = 0
+    if title:
+        (title_width, title_height), baseline = cv2.getTextSize(title, font, 5.0, 10)
+        top = title_height + baseline + 40
+        cv2.putText(image, title, ((width - title_width) // 2, title_height + 20), font, 5.0,
+                    (0, 0, 0), 10, cv2.LINE_AA)
+
+    columns = max(1, round(math.sqrt(boxes * width / (height - top))))
+    rows = math.ceil(boxes / columns)
+    cell_width, cell_height = width // columns, (height - top) // rows
+
+    centers = []
+    for index, label in enumerate(labels):
+        row, column = divmod(index, columns)
+        x0, y0 = column * cell_width, top + row * cell_height
+        margin_x, margin_y = cell_width // 10, cell_height // 5
+        top_left = (x0 + margin_x, y0 + margin_y)
+        bottom_right = (x0 + cell_width - margin_x, y0 + cell_height - margin_y)
+
+        # Fit the label to the box, like a diagramming tool would
+        box_width = bottom_right[0] - top_left[0]
+        scale = 1.0
+        (text_width, text_height), _ = cv2.getTextSize(label, font, scale, 2)
+        if text_width > box_width * 0.9:
+            scale = box_width * 0.9 / text_width
+            (text_width, text_height), _ = cv2.getTextSize(label, font, scale, 2)
+
+        color = tuple(rng.randrange(0, 160) for _ in range(3))
+        inverted = filled and index % 2 == 1
+        cv2.rectangle(image, top_left, bottom_right, color, cv2.FILLED if inverted else 2)
+        origin = (top_left[0] + (box_width - text_width) // 2,
+                  (top_left[1] + bottom_right[1] + text_height) // 2)
+        cv2.putText(image, label, origin, font, scale, (255, 255, 255) if inverted else (0, 0, 0),
+                    max(1, round(scale * 2)), cv2.LINE_AA)
+        centers.append(((top_left[0] + bottom_right[0]) // 2, bottom_right[1]))
+
+    for start, end in zip(centers, centers[1:]):
+        cv2.arrowedLine(image, start, (end[0], end[1] - (cell_height - 2 * (cell_height // 5))),
+                        (90, 90, 90), 1, tipLength=0.02)
+
+    cv2.imwrite(path, image)
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render synthetic architecture diagrams")
+    parser.add_argument("output_dir", help="Directory for the rendered PNG files")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES),
+                        help="Diagram sizes to render")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for labels and colors")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name in args.sizes:
+        width, height, boxes = SIZES[name]
+        path = os.path.join(args.output_dir, f"synthetic-{name}.png")
+        render_diagram(path, width, height, boxes, args.seed)
+        print(f"{path}: {width}x{height}, {boxes} boxes")
+
+
+if __name__ == "__main__":
+    main()
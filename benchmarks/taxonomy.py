@@ -0,0 +1,118 @@
+"""Component categorization benchmark.
+
+Compares the compiled taxonomy matcher with the per-line x category x term
+substring loop that build_components used before, on synthetic OCR lines.
+
+    python -m benchmarks.taxonomy --lines 2000 --extra-terms 2000 --min-speedup 5
+
+--extra-terms pads the taxonomy with generated product names to see how both
+approaches scale as the taxonomy grows.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from src.ocr.taxonomy import DEFAULT_TAXONOMY_PATH, Taxonomy
+
+FILLER = ["primary", "zone", "cluster", "tier", "v2", "prod", "eu-west", "internal",
+          "->", "443", "replica", "shared", "legacy", "(ha)", "node"]
+
+
+def naive_categorize(lines, keywords):
+    """The original nested substring loop"""
+    detected = {category: [] for category in keywords}
+    for text in lines:
+        text_lower = text.lower()
+        for category, terms in keywords.items():
+            if any(term in text_lower for term in terms):
+                detected[category].append(text)
+    return detected
+
+
+def extra_terms(keywords, count, seed):
+    """Pad each category with generated vendor-style product names"""
+    rng = random.Random(seed)
+    syllables = ["ra", "zen", "tor", "vex", "qu", "lo", "mar", "sil", "dyn", "cor", "tek", "nim"]
+    padded = {category: list(terms) for category, terms in keywords.items()}
+    categories = list(padded)
+    for index in range(count):
+        name = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        padded[categories[index % len(categories)]].append(f"{name} {rng.choice(['cloud', 'edge', 'one', 'x'])}")
+    return padded
+
+
+def synthetic_lines(keywords, count, seed):
+    """Diagram-like labels mixing taxonomy terms, OCR typos and filler words"""
+    rng = random.Random(seed)
+    terms = [term for category_terms in keywords.values() for term in category_terms]
+    lines = []
+    for _ in range(count):
+        words = rng.sample(FILLER, rng.randint(1, 3))
+        if rng.random() < 0.7:
+            term = rng.choice(terms)
+            if rng.random() < 0.2 and len(term) > 5:
+                # Drop a character the way OCR sometimes does
+                position = rng.randrange(len(term))
+                term = term[:position] + term[position + 1:]
+            words.insert(rng.randrange(len(words) + 1), term.title())
+        lines.append(" ".join(words))
+    return lines
+
+
+def median_ms(function, runs):
+    """Median wall time in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark component categorization")
+    parser.add_argument("--taxonomy", default=DEFAULT_TAXONOMY_PATH, help="Taxonomy JSON file")
+    parser.add_argument("--lines", type=int, default=2000, help="Synthetic OCR lines per run")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement")
+    parser.add_argument("--extra-terms", type=int, default=0,
+                        help="Generated terms added to the taxonomy")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the synthetic lines")
+    parser.add_argument("--min-speedup", type=float, default=None,
+                        help="Fail unless the compiled matcher is at least this many times faster")
+    args = parser.parse_args()
+
+    with open(args.taxonomy, encoding='utf-8') as f:
+        keywords = json.load(f)
+    if args.extra_terms:
+        keywords = extra_terms(keywords, args.extra_terms, args.seed)
+    lines = synthetic_lines(keywords, args.lines, args.seed)
+
+    started = time.perf_counter()
+    taxonomy = Taxonomy(keywords)
+    compile_ms = (time.perf_counter() - started) * 1000
+    exact = Taxonomy(keywords, fuzzy=False)
+
+    naive_ms = median_ms(lambda: naive_categorize(lines, keywords), args.runs)
+    exact_ms = median_ms(lambda: exact.categorize(lines), args.runs)
+    fuzzy_ms = median_ms(lambda: taxonomy.categorize(lines), args.runs)
+
+    naive_hits = sum(map(len, naive_categorize(lines, keywords).values()))
+    fuzzy_hits = sum(map(len, taxonomy.categorize(lines).values()))
+
+    term_count = sum(map(len, keywords.values()))
+    print(f"{len(lines)} lines, {term_count} terms in {len(keywords)} categories")
+    print(f"compile:          {compile_ms:8.1f} ms (once per process)")
+    print(f"naive loop:       {naive_ms:8.1f} ms  {naive_hits} category hits")
+    print(f"compiled (exact): {exact_ms:8.1f} ms  {naive_ms / exact_ms:5.1f}x")
+    print(f"compiled (fuzzy): {fuzzy_ms:8.1f} ms  {naive_ms / fuzzy_ms:5.1f}x  {fuzzy_hits} category hits")
+
+    if args.min_speedup is not None and naive_ms / fuzzy_ms < args.min_speedup:
+        print(f"\nFAILED: speedup {naive_ms / fuzzy_ms:.1f}x is below {args.min_speedup:.1f}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
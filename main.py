@@ -1,47 +1,380 @@
 import argparse
-from src.ocr.extractor import extract_components
-from src.analysis.analyzer import SecurityAnalyzer
+import contextlib
+import json
+import sys
+import time
+from src.batch import BatchPipeline, is_batch_input, resolve_inputs
 from src.utils.config import Config
+from src.utils.metrics import metrics
 
-def main():
-    # Validate configuration
-    Config.validate()
-    
-    parser = argparse.ArgumentParser(description="Analyze architecture diagrams for security compliance")
-    parser.add_argument("image_path", help="Path to the architecture diagram image")
-    parser.add_argument("--provider", default=Config.DEFAULT_PROVIDER, 
-                       choices=["gemini", "openai"], help="LLM provider to use")
-    args = parser.parse_args()
+# OCR and provider modules pull in heavy dependencies (cv2, numpy, SDKs), so
+# they are imported only once we know they are needed
 
-    # Extract components using OCR
-    print(f"Analyzing diagram: {args.image_path}")
-    components = extract_components(args.image_path)
-    
-    # Analyze security
-    analyzer = SecurityAnalyzer(provider_type=args.provider)
-    results = analyzer.analyze_security(components)
-    
-    # Print results
+def print_results(results):
+    """Print a single analysis in human-readable form"""
     print("\nSecurity Check Results:")
     for check, status in results["checks"].items():
         symbol = "✓" if status else "✗"
         print(f"{symbol} {check}")
-    
+
     print(f"\nCompliance Score: {results['compliance_score']}")
-    
+
     print("\nRecommendations:")
     for i, rec in enumerate(results["recommendations"], 1):
         print(f"{i}. {rec}")
-    
+
+    print_analysis_details(results)
+
+def print_analysis_details(results):
+    """Print the analysis breakdown and note"""
     print("\nAnalysis Details:")
     for category, items in results["analysis"].items():
         if items:  # Only print non-empty categories
             print(f"\n{category.replace('_', ' ').title()}:")
             for item in items:
                 print(f"- {item}")
-    
+
     if "note" in results:
         print(f"\nNote: {results['note']}")
 
+class ProgressivePrinter:
+    """Renders streamed analysis fields as soon as they arrive"""
+
+    def __init__(self):
+        self.sections = set()
+        self.recommendations = 0
+
+    def __call__(self, event):
+        kind, key, value = event
+        if kind == "check":
+            if kind not in self.sections:
+                print("\nSecurity Check Results:")
+            symbol = "✓" if value else "✗"
+            print(f"{symbol} {key}", flush=True)
+        elif kind == "compliance_score":
+            print(f"\nCompliance Score: {value}", flush=True)
+        elif kind == "recommendation":
+            if kind not in self.sections:
+                print("\nRecommendations:")
+            self.recommendations += 1
+            print(f"{self.recommendations}. {value}", flush=True)
+        elif kind == "corrected":
+            # A streamed value that was cut off or invalid, as finally settled
+            if key == "recommendations":
+                print("\nRecommendations (corrected):")
+                for index, rec in enumerate(value, 1):
+                    print(f"{index}. {rec}")
+                self.recommendations = len(value)
+            elif key.startswith("checks."):
+                symbol = "✓" if value else "✗"
+                print(f"{symbol} {key[len('checks.'):]} (corrected)")
+            else:
+                print(f"\nCompliance Score: {value} (corrected)")
+            sys.stdout.flush()
+        self.sections.add(kind)
+
+    def finish(self, results):
+        """Print whatever was not streamed"""
+        if not self.sections:
+            print_results(results)
+            return
+        print_analysis_details(results)
+
+def print_batch_report(report):
+    """Print per-diagram results followed by per-stage throughput"""
+    print("\nBatch Results:")
+    for item in report["results"]:
+        if item.get("error"):
+            reused = f" (duplicate of {item['duplicate_of']})" if item.get("duplicate_of") else ""
+            print(f"✗ {item['image_path']}: {item['error']}{reused}")
+            continue
+
+        results = item["results"]
+        failed = [check for check, status in results["checks"].items() if not status]
+        if item.get("duplicate_of"):
+            print(f"- {item['image_path']}: {results['compliance_score']} "
+                  f"(duplicate of {item['duplicate_of']}, distance {item['distance']})")
+        else:
+            print(f"- {item['image_path']}: {results['compliance_score']} "
+                  f"(ocr {item['ocr_time']:.2f}s, llm {item['llm_time']:.2f}s)")
+        if failed:
+            print(f"    Failing: {', '.join(failed)}")
+
+    if report.get("deduplicated"):
+        print(f"\nDeduplicated: {len(report['deduplicated'])} near-identical diagrams reused earlier results")
+
+    print("\nStage Throughput:")
+    for stage, stats in report["stages"].items():
+        if stage == "dedup":
+            print(f"DEDUP: {stats['hashed']} diagrams hashed, {stats['duplicates']} duplicates "
+                  f"(wall {stats['wall_time']:.2f}s)")
+            continue
+        print(f"{stage.upper()}: {stats['processed']} diagrams, {stats['errors']} errors, "
+              f"{stats['throughput']:.2f} diagrams/s "
+              f"(wall {stats['wall_time']:.2f}s, busy {stats['busy_time']:.2f}s)")
+
+    print(f"\nTotal Time: {report['total_time']:.2f}s")
+
+def print_jsonl(records):
+    """One compact JSON record per line for machine consumers"""
+    for record in records:
+        print(json.dumps(record, separators=(',', ':'), default=str))
+
+def status(args, message):
+    """Progress messages; kept off stdout when it carries JSON"""
+    print(message, file=sys.stdout if args.output == "text" else sys.stderr)
+
+def add_analysis_arguments(parser):
+    """Provider and OCR options shared by single, batch and service runs"""
+    parser.add_argument("--provider", default=Config.DEFAULT_PROVIDER,
+                       choices=list(Config.PROVIDERS), help="LLM provider to use")
+    parser.add_argument("--fallback-provider", default=Config.FALLBACK_PROVIDER,
+                       choices=list(Config.PROVIDERS), help="Secondary provider for hedged requests and failover")
+    parser.add_argument("--hedge-delay", type=float, default=Config.HEDGE_DELAY,
+                       help="Seconds to wait on the primary provider before hedging to the fallback")
+    parser.add_argument("--ocr-profile", default=Config.OCR_PROFILE,
+                       choices=list(Config.OCR_PROFILES), help="OCR accuracy/speed trade-off")
+    parser.add_argument("--ocr-engine", default=Config.OCR_ENGINE,
+                       choices=["pytesseract", "tesserocr"], help="OCR backend to use")
+    parser.add_argument("--ocr-strategy", default=Config.OCR_STRATEGY,
+                       choices=["auto", "full", "regions", "tiled"],
+                       help="OCR whole images, detected label regions or memory-bounded tiles "
+                            "(auto: tiles for large images, whole image otherwise)")
+    parser.add_argument("--no-rules", action="store_true",
+                       help="Send every check to the LLM instead of deciding clear-cut ones locally")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Bypass the OCR and LLM response caches")
+    parser.add_argument("--metrics", choices=["json"],
+                       help="Collect per-stage timings and counters and print them to stderr when done")
+    parser.add_argument("--profile", metavar="PATH",
+                       help="Write cProfile stats for the run to PATH (read with python -m pstats)")
+
+@contextlib.contextmanager
+def instrumentation(args):
+    """Enable metrics and profiling for the duration of a run, then report them"""
+    if args.metrics:
+        metrics.enabled = True
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        with metrics.timer("total"):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Profile written to {args.profile}", file=sys.stderr)
+        if args.metrics == "json":
+            print(json.dumps(metrics.report(), indent=2), file=sys.stderr)
+
+def serve_main(argv):
+    """`main.py serve`: run the analysis service until interrupted"""
+    parser = argparse.ArgumentParser(prog="main.py serve",
+                                     description="Serve diagram analysis over HTTP with warm workers")
+    parser.add_argument("--host", default=Config.SERVICE_HOST, help="Interface to bind")
+    parser.add_argument("--port", type=int, default=Config.SERVICE_PORT, help="Port to bind")
+    parser.add_argument("--workers", type=int, default=Config.SERVICE_WORKERS,
+                       help="Diagrams analyzed concurrently")
+    parser.add_argument("--queue-size", type=int, default=Config.SERVICE_QUEUE_SIZE,
+                       help="Jobs waiting for a worker before uploads are rejected")
+    add_analysis_arguments(parser)
+    args = parser.parse_args(argv)
+
+    Config.validate(args.provider)
+
+    from src.service import AnalysisService, serve
+
+    service = AnalysisService(
+        provider_type=args.provider,
+        fallback_provider=args.fallback_provider,
+        hedge_delay=args.hedge_delay,
+        use_rules=not args.no_rules,
+        ocr_profile=args.ocr_profile,
+        ocr_engine=args.ocr_engine,
+        ocr_strategy=args.ocr_strategy,
+        use_cache=not args.no_cache,
+        workers=args.workers,
+        queue_size=args.queue_size
+    )
+    with instrumentation(args):
+        serve(service, args.host, args.port)
+
+def main():
+    # The service has its own options; a diagram can't be named "serve"
+    if sys.argv[1:2] == ["serve"]:
+        serve_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="Analyze architecture diagrams for security compliance")
+    parser.add_argument("image_path", nargs="?",
+                       help="Path to the architecture diagram image, or a directory, glob or manifest file "
+                            "for batch mode. Use `main.py serve` to run the HTTP service")
+    add_analysis_arguments(parser)
+    parser.add_argument("--batch", action="store_true",
+                       help="Treat image_path as a batch input even if it looks like a single file")
+    parser.add_argument("--ocr-workers", type=int, default=Config.BATCH_OCR_WORKERS,
+                       help="Number of OCR processes in batch mode")
+    parser.add_argument("--llm-workers", type=int, default=Config.BATCH_LLM_WORKERS,
+                       help="Maximum concurrent LLM requests in batch mode")
+    parser.add_argument("--queue-size", type=int, default=Config.BATCH_QUEUE_SIZE,
+                       help="Maximum extracted diagrams waiting for the LLM stage")
+    parser.add_argument("--no-dedup", action="store_true",
+                       help="Analyze near-identical diagrams separately instead of reusing one result")
+    parser.add_argument("--dedup-distance", type=int, default=Config.DEDUP_MAX_DISTANCE,
+                       help="Maximum perceptual hash distance (of 255 bits) for near-duplicate candidates "
+                            "in batch mode")
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream the LLM response and print results as they arrive")
+    parser.add_argument("--clear-cache", action="store_true",
+                       help="Clear the OCR and LLM response caches before running")
+    parser.add_argument("--output", default="text", choices=["text", "json", "jsonl"],
+                       help="Print human-readable text, one JSON document, or one JSON record per diagram")
+    parser.add_argument("--store", metavar="PATH",
+                       help="Also save each diagram's record to a SQLite database, or append to PATH "
+                            "if it ends in .jsonl")
+    parser.add_argument("--previous", metavar="BUNDLE",
+                       help="Result bundle of an earlier revision; only the changes are re-analyzed")
+    parser.add_argument("--save-bundle", metavar="PATH",
+                       help="Save components and results to PATH for a later --previous run")
+    args = parser.parse_args()
+
+    with instrumentation(args):
+        run(args, parser)
+
+def run(args, parser):
+    """Single-diagram or batch analysis for parsed CLI arguments"""
+    if args.clear_cache:
+        from src.ocr.cache import get_ocr_cache
+        from src.analysis.llm_providers.cache import get_response_cache
+        get_ocr_cache().clear()
+        get_response_cache().clear()
+        status(args, "OCR and LLM response caches cleared")
+        if not args.image_path:
+            return
+
+    if not args.image_path:
+        parser.error("image_path is required")
+    if args.stream and args.output != "text":
+        parser.error("--stream only supports --output text")
+
+    # Validate configuration
+    Config.validate(args.provider)
+
+    from src.storage import build_record, open_store
+
+    if args.batch or is_batch_input(args.image_path):
+        try:
+            image_paths = resolve_inputs(args.image_path)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        status(args, f"Analyzing {len(image_paths)} diagrams")
+        with contextlib.ExitStack() as stack:
+            # Records are stored as diagrams finish, not when the whole batch is done
+            sink = stack.enter_context(open_store(args.store)) if args.store else None
+            pipeline = BatchPipeline(
+                provider_type=args.provider,
+                fallback_provider=args.fallback_provider,
+                hedge_delay=args.hedge_delay,
+                use_rules=not args.no_rules,
+                ocr_profile=args.ocr_profile,
+                ocr_engine=args.ocr_engine,
+                ocr_strategy=args.ocr_strategy,
+                use_cache=not args.no_cache,
+                ocr_workers=args.ocr_workers,
+                llm_workers=args.llm_workers,
+                queue_size=args.queue_size,
+                sink=sink,
+                dedup=not args.no_dedup,
+                dedup_distance=args.dedup_distance
+            )
+            report = pipeline.run(image_paths)
+
+        if args.output == "text":
+            print_batch_report(report)
+        elif args.output == "json":
+            summary = {key: value for key, value in report.items() if key != "results"}
+            print(json.dumps(dict(summary, results=[item["record"] for item in report["results"]]),
+                             indent=2, default=str))
+        else:
+            print_jsonl(item["record"] for item in report["results"])
+        return
+
+    if args.stream and args.previous:
+        parser.error("--stream cannot be combined with --previous")
+
+    from src.ocr.extractor import extract_components
+    from src.analysis.analyzer import SecurityAnalyzer
+    from src.analysis.incremental import image_hash, load_bundle, save_bundle
+
+    previous = load_bundle(args.previous) if args.previous else None
+    current_hash = image_hash(args.image_path)
+    printer = ProgressivePrinter() if args.stream else None
+
+    status(args, f"Analyzing diagram: {args.image_path}")
+    if previous is not None and previous.get("image_hash") == current_hash:
+        # Byte-identical revision: skip OCR and the LLM entirely
+        status(args, "Diagram unchanged since the previous bundle; reusing its results")
+        components = previous["components"]
+        results = dict(previous["results"], incremental={
+            "mode": "reuse", "added": 0, "removed": 0, "affected_checks": []
+        })
+        ocr_time = llm_time = 0.0
+    else:
+        # Extract components using OCR
+        started = time.perf_counter()
+        components = extract_components(args.image_path, profile=args.ocr_profile,
+                                        engine=args.ocr_engine, use_cache=not args.no_cache,
+                                        strategy=args.ocr_strategy)
+        ocr_time = time.perf_counter() - started
+
+        # Analyze security
+        analyzer = SecurityAnalyzer(
+            provider_type=args.provider,
+            use_cache=not args.no_cache,
+            fallback_provider=args.fallback_provider,
+            hedge_delay=args.hedge_delay,
+            use_rules=not args.no_rules
+        )
+        started = time.perf_counter()
+        if printer is not None:
+            results = analyzer.analyze_security_stream(components, printer)
+        elif previous is not None:
+            results = analyzer.analyze_incremental(components, previous)
+            update = results["incremental"]
+            status(args, f"Incremental {update['mode']}: {update['added']} labels added, "
+                         f"{update['removed']} removed"
+                         + (f"; re-checked {', '.join(update['affected_checks'])}"
+                            if update["mode"] == "delta" else ""))
+        else:
+            results = analyzer.analyze_security(components)
+        llm_time = time.perf_counter() - started
+
+    if args.save_bundle:
+        # The bundle keeps the results without the per-run incremental summary
+        saved = {key: value for key, value in results.items() if key != "incremental"}
+        save_bundle(args.save_bundle, components, saved, current_hash)
+
+    record = build_record(args.image_path, components, results, provider=args.provider,
+                          model=Config.PROVIDERS[args.provider].get('model'), image_hash=current_hash,
+                          ocr_time=ocr_time, llm_time=llm_time, error=components.get("error"))
+    if args.store:
+        with open_store(args.store) as store:
+            store.add(record)
+
+    # Print results
+    if printer is not None:
+        printer.finish(results)
+    elif args.output == "text":
+        print_results(results)
+    elif args.output == "json":
+        print(json.dumps(record, indent=2, default=str))
+    else:
+        print_jsonl([record])
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
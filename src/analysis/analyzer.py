@@ -1,33 +1,264 @@
+import asyncio
+import copy
+import sys
 from src.utils.config import Config
-from .llm_providers import GeminiProvider, OpenAIProvider
+from src.utils.metrics import metrics
+from . import event_loop, llm_providers
+from .incremental import build_delta_prompt, merge_delta, plan_update
+from .prompt_builder import estimate_tokens
+from .resilience import call_with_retry, call_with_retry_async, get_breaker
+from .rules import RuleEngine
 
 class SecurityAnalyzer:
     """Main analyzer class that coordinates LLM providers"""
-    
+
+    # Provider classes are resolved lazily so unused SDKs are never imported
     _providers = {
-        'gemini': GeminiProvider,
-        'openai': OpenAIProvider
+        'gemini': 'GeminiProvider',
+        'openai': 'OpenAIProvider',
+        'stub': 'StubProvider'
     }
-    
-    def __init__(self, provider_type=None):
-        """Initialize with specified provider or default"""
+
+    def __init__(self, provider_type=None, use_cache=None, fallback_provider=None, hedge_delay=None,
+                 use_rules=None):
+        """Initialize with specified provider or default, plus an optional hedge provider"""
         provider_type = provider_type or Config.DEFAULT_PROVIDER
-        
+        fallback_provider = fallback_provider or Config.FALLBACK_PROVIDER
+
+        # Local rules settle clear-cut checks before any provider is called
+        use_rules = Config.RULES_ENABLED if use_rules is None else use_rules
+        self.rules = RuleEngine() if use_rules else None
+
+        self.provider = self._create_provider(provider_type, use_cache)
+        self.hedge_delay = Config.HEDGE_DELAY if hedge_delay is None else hedge_delay
+
+        # The secondary provider is only used when it is distinct and configured
+        self.fallback = None
+        if fallback_provider and fallback_provider != provider_type:
+            if Config.is_configured(fallback_provider):
+                self.fallback = self._create_provider(fallback_provider, use_cache)
+            elif Config.DEBUG:
+                print(f"Warning: fallback provider {fallback_provider} has no API key, disabling failover",
+                      file=sys.stderr)
+
+    def _create_provider(self, provider_type, use_cache):
+        """Instantiate a registered provider"""
         if provider_type not in self._providers:
             raise ValueError(f"Unsupported provider: {provider_type}")
-        
-        provider_class = self._providers[provider_type]
-        self.provider = provider_class()
-    
+
+        provider_class = getattr(llm_providers, self._providers[provider_type])
+        provider = provider_class()
+        if use_cache is not None:
+            provider.use_cache = use_cache
+        return provider
+
+    def _evaluate_rules(self, components):
+        """Run the rule engine, returning None when rules are disabled"""
+        if self.rules is None:
+            return None
+
+        with metrics.timer("rules.evaluate"):
+            outcome = self.rules.evaluate(components)
+        metrics.incr("rules.decided", len(outcome["decided"]))
+        if not outcome["pending"]:
+            metrics.incr("rules.skipped_llm")
+        if Config.DEBUG:
+            print(f"Debug - Rules decided {len(outcome['decided'])}/"
+                  f"{len(Config.RESPONSE_SCHEMA['checks'])} checks locally", file=sys.stderr)
+        return outcome
+
+    def _narrow(self, components, outcome):
+        """Components for the LLM, limited to the checks the rules left open"""
+        if outcome is None or not outcome["decided"]:
+            return components
+        return dict(components, pending_checks=outcome["pending"])
+
+    def _merge_rules(self, results, outcome):
+        if outcome is None:
+            return results
+        return self.rules.merge(results, outcome)
+
     def analyze_security(self, components):
+        """Analyze security, asking the provider only about checks rules could not decide"""
+        outcome = self._evaluate_rules(components)
+        if outcome is not None and not outcome["pending"]:
+            return self.rules.local_results(outcome)
+
+        results = self._analyze_with_provider(self._narrow(components, outcome))
+        return self._merge_rules(results, outcome)
+
+    def analyze_incremental(self, components, previous):
+        """Update a previous bundle's results for a revised diagram, asking only about what changed"""
+        plan = plan_update(previous["components"], components)
+        diff = plan["diff"]
+        info = {
+            "mode": plan["mode"],
+            "added": len(diff["added"]),
+            "removed": len(diff["removed"]),
+            "affected_checks": plan["checks"]
+        }
+        metrics.incr(f"incremental.{plan['mode']}")
+        if Config.DEBUG:
+            print(f"Debug - Incremental {plan['mode']}: +{info['added']} -{info['removed']} labels, "
+                  f"affected checks: {', '.join(plan['checks']) or 'none'}", file=sys.stderr)
+
+        if plan["mode"] == "reuse":
+            results = copy.deepcopy(previous["results"])
+        elif plan["mode"] == "full":
+            results = self.analyze_security(components)
+        else:
+            outcome = self._evaluate_rules(components)
+            decided = outcome["decided"] if outcome is not None else {}
+            pending = [check for check in plan["checks"] if check not in decided]
+            if pending:
+                results = self._analyze_delta(previous["results"], diff, pending)
+                if results is None:
+                    # The delta request failed; a full analysis is still better than stale results
+                    info["mode"] = "full"
+                    results = self.analyze_security(components)
+            else:
+                results = copy.deepcopy(previous["results"])
+            results = self._merge_rules(results, outcome)
+
+        results["incremental"] = info
+        return results
+
+    def _analyze_delta(self, previous_results, diff, checks):
+        """Ask the provider to re-evaluate only the affected checks; None on failure"""
+        prompt = build_delta_prompt(previous_results, diff, checks,
+                                    self.provider.config.get('prompt_token_budget'))
+        metrics.observe("llm.prompt_tokens", estimate_tokens(prompt))
+        try:
+            delta = call_with_retry(self.provider.__class__.__name__, self.provider._analyze_prompt,
+                                    prompt, checks)
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Delta analysis error: {e}", file=sys.stderr)
+            return None
+        return merge_delta(previous_results, delta, checks)
+
+    def _analyze_with_provider(self, components):
         """Analyze security using configured provider"""
         try:
             if Config.DEBUG:
-                print(f"Using provider: {self.provider.__class__.__name__}")
-            
-            return self.provider.analyze(components)
-            
+                print(f"Using provider: {self.provider.__class__.__name__}", file=sys.stderr)
+
+            if self.fallback is not None:
+                # The thread's long-lived loop keeps async clients warm across calls
+                return event_loop.run_sync(self._hedged_analyze(components))
+
+            return call_with_retry(self.provider.__class__.__name__, self.provider._analyze, components)
+
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Analysis error: {e}", file=sys.stderr)
+            return self.provider._get_error_response()
+
+    def analyze_security_stream(self, components, on_event):
+        """Stream analysis from the primary provider, calling on_event as fields complete"""
+        outcome = self._evaluate_rules(components)
+        if outcome is not None:
+            for check, status in outcome["decided"].items():
+                on_event(('check', check, status))
+            if not outcome["pending"]:
+                results = self.rules.local_results(outcome)
+                on_event(('compliance_score', None, results["compliance_score"]))
+                for rec in results["recommendations"]:
+                    on_event(('recommendation', None, rec))
+                return results
+
+        try:
+            if Config.DEBUG:
+                print(f"Using provider: {self.provider.__class__.__name__}", file=sys.stderr)
+
+            # Partial output has already been shown, so streamed requests are
+            # neither retried nor hedged
+            results = self.provider.analyze_stream(self._narrow(components, outcome), on_event)
+
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Analysis error: {e}", file=sys.stderr)
+            results = self.provider._get_error_response()
+
+        return self._merge_rules(results, outcome)
+
+    async def analyze_security_async(self, components):
+        """Async counterpart of analyze_security"""
+        outcome = self._evaluate_rules(components)
+        if outcome is not None and not outcome["pending"]:
+            return self.rules.local_results(outcome)
+
+        results = await self._analyze_with_provider_async(self._narrow(components, outcome))
+        return self._merge_rules(results, outcome)
+
+    async def _analyze_with_provider_async(self, components):
+        """Async analysis using the provider's async client"""
+        try:
+            if Config.DEBUG:
+                print(f"Using provider: {self.provider.__class__.__name__}", file=sys.stderr)
+
+            if self.fallback is not None:
+                return await self._hedged_analyze(components)
+
+            return await self._call_provider_async(self.provider, components)
+
         except Exception as e:
             if Config.DEBUG:
-                print(f"Analysis error: {e}")
-            return self.provider._get_error_response()
\ No newline at end of file
+                print(f"Analysis error: {e}", file=sys.stderr)
+            return self.provider._get_error_response()
+
+    async def _call_provider_async(self, provider, components):
+        """One provider's analysis with retries, backoff and its circuit breaker"""
+        return await call_with_retry_async(provider.__class__.__name__, provider._analyze_async, components)
+
+    async def _hedged_analyze(self, components):
+        """Start the primary, hedge to the secondary after a delay, keep the first parsed result"""
+        primary, secondary = self.provider, self.fallback
+
+        # Skip straight to the secondary while the primary's circuit is open
+        if not get_breaker(primary.__class__.__name__).allow():
+            primary, secondary = secondary, primary
+
+        errors = []
+        primary_task = asyncio.ensure_future(self._call_provider_async(primary, components))
+        done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay)
+
+        if primary_task in done:
+            if primary_task.exception() is None:
+                return primary_task.result()
+            errors.append(primary_task.exception())
+            pending = set()
+        else:
+            pending = {primary_task}
+
+        if Config.DEBUG:
+            print(f"Hedging request to {secondary.__class__.__name__}", file=sys.stderr)
+        pending.add(asyncio.ensure_future(self._call_provider_async(secondary, components)))
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            # Whichever request lost the race is no longer needed
+            for task in pending:
+                task.cancel()
+
+        raise errors[-1]
+
+    async def analyze_batch_async(self, components_list, concurrency=None):
+        """Analyze many component sets concurrently, at most `concurrency` at a time"""
+        semaphore = asyncio.Semaphore(concurrency or Config.LLM_CONCURRENCY)
+
+        async def analyze_one(components):
+            async with semaphore:
+                return await self.analyze_security_async(components)
+
+        return await asyncio.gather(*(analyze_one(components) for components in components_list))
+
+    def analyze_batch(self, components_list, concurrency=None):
+        """Synchronous entry point for analyze_batch_async"""
+        return event_loop.run(self.analyze_batch_async(components_list, concurrency))
@@ -0,0 +1,76 @@
+import asyncio
+import atexit
+import sys
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Coroutine
+
+from src.utils.config import Config
+
+# Async provider clients belong to the loop that opened them; each loop
+# keeps the callbacks that close its clients before the loop goes away
+_cleanups = weakref.WeakKeyDictionary()
+_cleanups_lock = threading.Lock()
+
+# One long-lived loop per thread for sync callers of async code
+_local = threading.local()
+
+
+def on_loop_close(callback: Callable[[], Awaitable[Any]]):
+    """Await `callback` before the running loop is closed by run or close_thread_loop"""
+    loop = asyncio.get_running_loop()
+    with _cleanups_lock:
+        _cleanups.setdefault(loop, []).append(callback)
+
+
+async def _close_loop_resources():
+    loop = asyncio.get_running_loop()
+    with _cleanups_lock:
+        callbacks = _cleanups.pop(loop, [])
+    for callback in callbacks:
+        try:
+            await callback()
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Error closing async client: {e}", file=sys.stderr)
+
+
+def run(coroutine: Coroutine) -> Any:
+    """asyncio.run that also closes the clients the coroutine opened on its loop"""
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await _close_loop_resources()
+
+    return asyncio.run(main())
+
+
+def run_sync(coroutine: Coroutine) -> Any:
+    """Run a coroutine on the calling thread's long-lived loop
+
+    Repeated calls from one thread, such as a service worker's jobs, reuse the
+    loop and therefore the async clients bound to it.
+    """
+    loop = getattr(_local, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _local.loop = loop
+    return loop.run_until_complete(coroutine)
+
+
+def close_thread_loop():
+    """Close the calling thread's loop and the clients opened on it"""
+    loop = getattr(_local, 'loop', None)
+    _local.loop = None
+    if loop is None or loop.is_closed():
+        return
+    try:
+        loop.run_until_complete(_close_loop_resources())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+
+
+# The main thread's loop has no worker to close it
+atexit.register(close_thread_loop)
@@ -0,0 +1,206 @@
+import copy
+import difflib
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional
+from src.utils.cache import hash_file
+from src.utils.config import Config
+from .prompt_builder import compact_json, estimate_tokens, is_noise
+from .rules import RuleEngine
+
+BUNDLE_VERSION = 1
+
+# Lines this similar are the same label read slightly differently by OCR
+SAME_LINE_RATIO = 0.9
+
+# Checks that depend on each component category
+CATEGORY_CHECKS = {
+    "client": ["Encryption in transit", "Access controls"],
+    "server": ["Access controls", "Network segmentation", "Audit logging"],
+    "data": ["Encryption at rest", "CDE isolation", "Access controls"],
+    "network": ["Network segmentation", "Firewalls present", "CDE isolation"],
+    "interfaces": ["Encryption in transit", "Access controls"],
+    "security": ["Firewalls present", "Access controls", "Audit logging"]
+}
+
+DELTA_PROMPT_TEMPLATE = """You are a PCI-DSS security expert updating an earlier analysis of an architecture diagram that has since been revised.
+
+**Previous Results:**
+{previous}
+
+**Labels Added In This Revision:**
+{added}
+
+**Labels Removed In This Revision:**
+{removed}
+
+**Instructions:**
+- Re-evaluate only these checks in light of the changes: {checks}.
+- Update the compliance score, recommendations and analysis to reflect the revised diagram; keep earlier findings that still apply.
+
+Respond ONLY with a valid JSON object matching exactly this schema:
+{schema}"""
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _normalize(line: str) -> str:
+    return _WHITESPACE.sub(' ', line.strip().lower())
+
+
+def _lines(components: Dict[str, Any]) -> Dict[str, str]:
+    """Meaningful text lines keyed by their normalized form"""
+    lines = {}
+    for line in components.get('text', '').split('\n'):
+        if line.strip() and not is_noise(line.strip()):
+            lines.setdefault(_normalize(line), line.strip())
+    return lines
+
+
+def image_hash(image_path: str) -> str:
+    """Content hash of a diagram file; an unchanged file needs neither OCR nor the LLM"""
+    return hash_file(image_path)
+
+
+def load_bundle(path: str) -> Dict[str, Any]:
+    """Read a result bundle written by save_bundle"""
+    with open(path, encoding='utf-8') as f:
+        bundle = json.load(f)
+    if bundle.get('version') != BUNDLE_VERSION or 'components' not in bundle or 'results' not in bundle:
+        raise ValueError(f"{path} is not a result bundle")
+    return bundle
+
+
+def save_bundle(path: str, components: Dict[str, Any], results: Dict[str, Any],
+                image_hash: Optional[str] = None):
+    """Store components and results so the next revision can be analyzed incrementally"""
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "created_at": time.time(),
+        "image_hash": image_hash,
+        "components": components,
+        "results": results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(bundle, f, indent=2)
+
+
+def diff_components(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Labels added and removed between two extractions, ignoring OCR noise and jitter"""
+    old_lines, new_lines = _lines(previous), _lines(current)
+    added = [key for key in new_lines if key not in old_lines]
+    removed = [key for key in old_lines if key not in new_lines]
+
+    # Pair up near-identical lines (e.g. "Firewal" vs "Firewall") so OCR jitter is not a change
+    unmatched_removed = list(removed)
+    still_added = []
+    for key in added:
+        match = difflib.get_close_matches(key, unmatched_removed, n=1, cutoff=SAME_LINE_RATIO)
+        if match:
+            unmatched_removed.remove(match[0])
+        else:
+            still_added.append(key)
+
+    categories = {}
+    for category in set(previous.get('detected_items', {})) | set(current.get('detected_items', {})):
+        old_items = {_normalize(item) for item in previous.get('detected_items', {}).get(category, [])}
+        new_items = {_normalize(item) for item in current.get('detected_items', {}).get(category, [])}
+        changed = (new_items - old_items) | (old_items - new_items)
+        # Only count category changes that survived the jitter filter
+        changed &= set(still_added) | set(unmatched_removed)
+        if changed:
+            categories[category] = sorted(changed)
+
+    return {
+        "added": [new_lines[key] for key in still_added],
+        "removed": [old_lines[key] for key in unmatched_removed],
+        "categories": categories,
+        "total_lines": max(len(old_lines), len(new_lines))
+    }
+
+
+def affected_checks(diff: Dict[str, Any]) -> List[str]:
+    """Schema checks whose evidence or component categories the changes touch"""
+    changed_lines = [_normalize(line) for line in diff["added"] + diff["removed"]]
+    affected = set()
+    for check, pattern in RuleEngine._patterns.items():
+        if any(pattern.search(line) for line in changed_lines):
+            affected.add(check)
+    if any(RuleEngine._cde_pattern.search(line) for line in changed_lines):
+        affected.add("CDE isolation")
+    for category in diff["categories"]:
+        affected.update(CATEGORY_CHECKS.get(category, []))
+
+    return [check for check in Config.RESPONSE_SCHEMA["checks"] if check in affected]
+
+
+def plan_update(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Decide between reusing the previous result, a delta prompt or a full analysis"""
+    diff = diff_components(previous, current)
+    changed = len(diff["added"]) + len(diff["removed"])
+
+    if changed == 0:
+        mode = "reuse"
+        checks = []
+    else:
+        checks = affected_checks(diff)
+        ratio = changed / max(1, diff["total_lines"])
+        # A mostly new diagram, or changes we cannot attribute, get a full analysis
+        if ratio > Config.INCREMENTAL_MAX_CHANGE_RATIO or not checks:
+            mode = "full"
+        else:
+            mode = "delta"
+
+    return {"mode": mode, "diff": diff, "checks": checks}
+
+
+def build_delta_prompt(previous_results: Dict[str, Any], diff: Dict[str, Any], checks: List[str],
+                       token_budget: Optional[int] = None) -> str:
+    """Prompt asking only about the checks the revision affects"""
+    token_budget = token_budget or Config.PROMPT_TOKEN_BUDGET
+    previous = {key: previous_results[key] for key in ("checks", "compliance_score", "recommendations", "analysis")
+                if key in previous_results}
+
+    schema = dict(Config.RESPONSE_SCHEMA)
+    schema["checks"] = {check: kind for check, kind in Config.RESPONSE_SCHEMA["checks"].items() if check in checks}
+    schema.pop("note", None)
+
+    sections = {
+        "previous": compact_json(previous),
+        "checks": ", ".join(checks),
+        "schema": compact_json(schema)
+    }
+
+    # Changed labels share whatever the fixed parts leave of the budget
+    fixed_tokens = estimate_tokens(DELTA_PROMPT_TEMPLATE.format(added="", removed="", **sections))
+    budget = max(0, token_budget - fixed_tokens)
+    kept = {"added": [], "removed": []}
+    used = 0
+    for kind in ("added", "removed"):
+        for line in diff[kind]:
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                break
+            kept[kind].append(line)
+            used += cost
+
+    return DELTA_PROMPT_TEMPLATE.format(
+        added="\n".join(kept["added"]) or "(none)",
+        removed="\n".join(kept["removed"]) or "(none)",
+        **sections
+    )
+
+
+def merge_delta(previous_results: Dict[str, Any], delta: Dict[str, Any], checks: List[str]) -> Dict[str, Any]:
+    """Previous results with the re-evaluated checks and refreshed findings applied"""
+    results = copy.deepcopy(previous_results)
+    delta_checks = delta.get("checks", {})
+    results["checks"] = {
+        check: delta_checks.get(check, status) if check in checks else status
+        for check, status in results.get("checks", {}).items()
+    }
+    for key in ("compliance_score", "recommendations", "analysis"):
+        if delta.get(key):
+            results[key] = delta[key]
+    return results
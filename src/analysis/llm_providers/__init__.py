@@ -1,4 +1,16 @@
-from .gemini_provider import GeminiProvider
-from .openai_provider import OpenAIProvider
+import importlib
 
-__all__ = ['GeminiProvider', 'OpenAIProvider'] 
\ No newline at end of file
+# Providers are imported on first access so only the selected SDK is loaded
+_lazy_providers = {
+    'GeminiProvider': '.gemini_provider',
+    'OpenAIProvider': '.openai_provider',
+    'StubProvider': '.stub_provider'
+}
+
+def __getattr__(name):
+    if name in _lazy_providers:
+        module = importlib.import_module(_lazy_providers[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ['GeminiProvider', 'OpenAIProvider', 'StubProvider']
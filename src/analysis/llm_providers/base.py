@@ -1,89 +1,357 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+import asyncio
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from src.utils.cache import hash_key
 from src.utils.config import Config
-import json
+from src.utils.metrics import metrics
+from src.analysis.prompt_builder import PromptBuilder, estimate_tokens
+from src.analysis.rate_limit import get_rate_limiter, rate_limit_delay
+from src.analysis.response_parser import (
+    fill_defaults, followup_prompt, merge_fields, normalize_event, parse_response
+)
+from src.analysis.stream_parser import Event, IncrementalJSONParser, events_from_results
+from .cache import get_response_cache
+
+def _event_field(event: Event) -> str:
+    """Schema field path a streamed event reports"""
+    kind, key, _ = event
+    if kind == "check":
+        return f"checks.{key}"
+    if kind == "recommendation":
+        return "recommendations"
+    if kind == "corrected":
+        return key
+    return kind
+
+def _report_final(results: Dict[str, Any], shown: Dict[str, Any], on_event: Callable[[Event], None]):
+    """Report the final values the stream did not show, and correct those it showed differently
+
+    A corrected field is one ("corrected", field path, value) event; for
+    recommendations the value is the whole list.
+    """
+    for event in events_from_results(results):
+        field = _event_field(event)
+        if event[0] == "recommendation":
+            continue
+        if field not in shown:
+            on_event(event)
+        elif shown[field] != event[2]:
+            on_event(("corrected", field, event[2]))
+
+    recommendations = results.get("recommendations", [])
+    streamed = shown.get("recommendations", [])
+    if recommendations[:len(streamed)] == streamed:
+        for rec in recommendations[len(streamed):]:
+            on_event(("recommendation", None, rec))
+    else:
+        on_event(("corrected", "recommendations", recommendations))
 
 class LLMProvider(ABC):
     """Base class for LLM providers with standardized response handling"""
     
     def __init__(self, **kwargs):
         self.config = kwargs
+        self.use_cache = Config.LLM_CACHE_ENABLED
+        self.prompt_stats = {}
     
     @abstractmethod
     def _generate_content(self, prompt: str) -> str:
         """Provider-specific method to generate content"""
         pass
     
+    async def _generate_content_async(self, prompt: str) -> str:
+        """Provider-specific async generation; defaults to the sync call in a thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._generate_content, prompt)
+    
+    def _stream_content(self, prompt: str) -> Iterator[str]:
+        """Provider-specific streaming; defaults to a single chunk with the full response"""
+        yield self._generate_content(prompt)
+    
     def analyze(self, components: Dict[str, Any]) -> Dict[str, Any]:
         """Standardized analysis method used by all providers"""
         try:
-            # Generate the prompt using components
+            return self._analyze(components)
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Error in {self.__class__.__name__}: {e}", file=sys.stderr)
+            return self._get_error_response()
+    
+    async def analyze_async(self, components: Dict[str, Any]) -> Dict[str, Any]:
+        """Async counterpart of analyze using the provider's async client"""
+        try:
+            return await self._analyze_async(components)
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Error in {self.__class__.__name__}: {e}", file=sys.stderr)
+            return self._get_error_response()
+    
+    def analyze_stream(self, components: Dict[str, Any], on_event: Callable[[Event], None]) -> Dict[str, Any]:
+        """Stream the analysis, reporting checks, score and recommendations as they complete"""
+        pending = components.get('pending_checks')
+        if pending is not None:
+            # Checks the rules already decided were reported by the caller; the
+            # model may still emit them, and showing both would contradict
+            report = on_event
+
+            def on_event(event: Event):
+                field = _event_field(event)
+                if not field.startswith("checks.") or field[len("checks."):] in pending:
+                    report(event)
+
+        # Streamed values are shown once they are valid; anything invalid or
+        # cut off waits for validation and the follow-up, and a value that
+        # turns out different is reported as corrected rather than twice
+        shown: Dict[str, Any] = {}
+
+        def on_streamed(event: Event):
+            event = normalize_event(event)
+            if event is None:
+                return
+            field = _event_field(event)
+            if event[0] == "recommendation":
+                shown.setdefault(field, []).append(event[2])
+            elif field in shown:
+                return
+            else:
+                shown[field] = event[2]
+            on_event(event)
+
+        try:
             prompt = self._create_prompt(components)
+            cache_key, results = self._lookup_cache(prompt)
             
-            # Get raw response from provider
-            raw_response = self._generate_content(prompt)
-            
-            # Parse and validate response
-            results = self._parse_response(raw_response)
+            if results is not None:
+                for event in events_from_results(results):
+                    on_event(event)
+                return self._finalize(results)
             
-            # Add standard note
-            results["note"] = "This is an automated initial assessment. Please consult security team for detailed review."
+            parser = IncrementalJSONParser()
+            chunks = []
+            with metrics.timer("llm.provider_call"):
+                for chunk in self._stream(prompt):
+                    chunks.append(chunk)
+                    for event in parser.feed(chunk):
+                        on_streamed(event)
+            raw_response = ''.join(chunks)
+            metrics.observe("llm.response_chars", len(raw_response))
             
-            return results
+            # The complete text still goes through the normal parse and validation
+            results, invalid = self._timed_parse(raw_response, components.get('pending_checks'))
+            if invalid:
+                invalid = self._complete(prompt, results, invalid)
+            _report_final(results, shown, on_event)
+            self._store_cache(cache_key, results, invalid)
+            return self._finalize(results)
             
         except Exception as e:
             if Config.DEBUG:
-                print(f"Error in {self.__class__.__name__}: {e}")
+                print(f"Error in {self.__class__.__name__}: {e}", file=sys.stderr)
             return self._get_error_response()
     
+    def _analyze(self, components: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the analysis, raising instead of falling back to the error response"""
+        return self._analyze_prompt(self._create_prompt(components), components.get('pending_checks'))
+    
+    def _analyze_prompt(self, prompt: str, checks: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Send a ready-made prompt and parse the answer, reusing cached results"""
+        # Identical prompts to the same model reuse the earlier answer
+        cache_key, results = self._lookup_cache(prompt)
+        
+        if results is None:
+            # Get raw response from provider
+            with metrics.timer("llm.provider_call"):
+                raw_response = self._generate(prompt)
+            metrics.observe("llm.response_chars", len(raw_response))
+            
+            # Parse and validate response, asking again only for what is missing
+            results, invalid = self._timed_parse(raw_response, checks)
+            if invalid:
+                invalid = self._complete(prompt, results, invalid)
+            self._store_cache(cache_key, results, invalid)
+        
+        return self._finalize(results)
+    
+    async def _analyze_async(self, components: Dict[str, Any]) -> Dict[str, Any]:
+        """Async counterpart of _analyze"""
+        prompt = self._create_prompt(components)
+        cache_key, results = self._lookup_cache(prompt)
+        
+        if results is None:
+            with metrics.timer("llm.provider_call"):
+                raw_response = await self._generate_async(prompt)
+            metrics.observe("llm.response_chars", len(raw_response))
+            results, invalid = self._timed_parse(raw_response, components.get('pending_checks'))
+            if invalid:
+                invalid = await self._complete_async(prompt, results, invalid)
+            self._store_cache(cache_key, results, invalid)
+        
+        return self._finalize(results)
+    
+    def _rate_limiter(self):
+        """Shared limiter for this provider's model and its RPM/TPM quotas"""
+        return get_rate_limiter(self.__class__.__name__, self.config.get('model'),
+                                self.config.get('rpm', 0), self.config.get('tpm', 0))
+    
+    def _request_tokens(self, prompt: str) -> int:
+        """Tokens a request counts against the TPM quota: the prompt plus the expected response"""
+        return estimate_tokens(prompt) + Config.RATE_LIMIT_RESPONSE_TOKENS
+    
+    def _generate(self, prompt: str) -> str:
+        """_generate_content paced by the rate limiter, waiting out 429s instead of failing"""
+        limiter = self._rate_limiter()
+        tokens = self._request_tokens(prompt)
+        for attempt in range(Config.RATE_LIMIT_RETRIES + 1):
+            limiter.acquire(tokens)
+            try:
+                return self._generate_content(prompt)
+            except Exception as e:
+                if not self._back_off(limiter, e, attempt):
+                    raise
+    
+    async def _generate_async(self, prompt: str) -> str:
+        """Async counterpart of _generate"""
+        limiter = self._rate_limiter()
+        tokens = self._request_tokens(prompt)
+        for attempt in range(Config.RATE_LIMIT_RETRIES + 1):
+            await limiter.acquire_async(tokens)
+            try:
+                return await self._generate_content_async(prompt)
+            except Exception as e:
+                if not self._back_off(limiter, e, attempt):
+                    raise
+    
+    def _stream(self, prompt: str) -> Iterator[str]:
+        """_stream_content paced by the rate limiter; only retried before the first chunk"""
+        limiter = self._rate_limiter()
+        tokens = self._request_tokens(prompt)
+        for attempt in range(Config.RATE_LIMIT_RETRIES + 1):
+            limiter.acquire(tokens)
+            started = False
+            try:
+                for chunk in self._stream_content(prompt):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not self._back_off(limiter, e, attempt):
+                    raise
+    
+    def _back_off(self, limiter, error: Exception, attempt: int) -> bool:
+        """Hold the model back after a rate-limit error; False if the error should propagate"""
+        delay = rate_limit_delay(error)
+        if delay is None or attempt == Config.RATE_LIMIT_RETRIES:
+            return False
+        metrics.incr("ratelimit.throttled")
+        if Config.DEBUG:
+            print(f"Debug - {self.__class__.__name__} rate limited by provider, retrying in {delay:.1f}s",
+                  file=sys.stderr)
+        limiter.penalize(delay)
+        return True
+    
+    def _lookup_cache(self, prompt: str):
+        """Return the cache key for a prompt and any cached results for it"""
+        if not self.use_cache:
+            return None, None
+        
+        cache_key = self._cache_key(prompt)
+        results = get_response_cache().get(cache_key)
+        metrics.incr("llm.cache_hit" if results is not None else "llm.cache_miss")
+        if results is not None and Config.DEBUG:
+            print(f"Debug - {self.__class__.__name__} response cache hit", file=sys.stderr)
+        return cache_key, results
+    
+    def _store_cache(self, cache_key: Optional[str], results: Dict[str, Any], invalid: Optional[List[str]] = None):
+        """Cache results; only complete responses are worth keeping"""
+        if self.use_cache and not invalid:
+            get_response_cache().set(cache_key, results)
+    
+    def _finalize(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the standard note to parsed results"""
+        results["note"] = "This is an automated initial assessment. Please consult security team for detailed review."
+        return results
+    
+    def _cache_key(self, prompt: str) -> str:
+        """Response cache key for this provider, model and temperature"""
+        return hash_key(
+            self.__class__.__name__,
+            self.config.get('model'),
+            self.config.get('temperature'),
+            prompt
+        )
+    
     def _create_prompt(self, components: Dict[str, Any]) -> str:
-        """Create standardized prompt for all providers"""
-        return f"""
-        You are a PCI-DSS security expert analyzing an architecture diagram for security compliance.
-
-        **Detected Components:**
-        {json.dumps(components['detected_items'], indent=2)}
-
-        **Raw Text:**
-        {components['text']}
-
-        **Instructions:**
-        1. **Evaluate PCI-DSS Compliance:**
-           - Are firewalls present and properly configured to protect cardholder data?
-           - Are vendor-supplied defaults (e.g., passwords, configurations) replaced with secure settings?
-           - Is cardholder data encrypted at rest and in transit?
-           - Are access controls in place to restrict access to cardholder data?
-           - Are audit logs enabled for all critical systems?
-
-        2. **Analyze Security Patterns:**
-           - Are client-facing components (e.g., web servers) properly isolated from internal systems?
-           - Are network boundaries (e.g., DMZ, private zones) clearly defined and enforced?
-           - Are security controls (e.g., firewalls, IDS/IPS, WAF) in place to protect critical assets?
-
-        3. **Identify Risks and Gaps:**
-           - Identify potential attack vectors (e.g., exposed databases, unencrypted communication).
-           - Highlight security gaps (e.g., missing segmentation, lack of encryption).
-           - Suggest specific controls to mitigate risks (e.g., WAF for web servers, encryption for databases).
-
-        4. **Provide Recommendations:**
-           - Offer clear, actionable recommendations to address identified issues.
-           - Prioritize recommendations based on risk severity (e.g., critical, high, medium).
-
-        5. **Assign a Compliance Score:**
-           - Provide a compliance score (High/Medium/Low) based on the analysis.
-           - Explain the rationale for the score.
-
-        Respond ONLY with a valid JSON object matching exactly this schema:
-        {json.dumps(Config.RESPONSE_SCHEMA, indent=2)}
-        """
-    
-    def _parse_response(self, response: str) -> Dict[str, Any]:
-        """Parse and validate provider response"""
-        clean_response = response.strip()
-        if clean_response.startswith('```json'):
-            clean_response = clean_response[7:-3]
+        """Create standardized prompt for all providers within the provider's token budget"""
+        builder = PromptBuilder(self.config.get('prompt_token_budget'))
+        with metrics.timer("llm.prompt_build"):
+            prompt = builder.build(components)
+        metrics.observe("llm.prompt_chars", len(prompt))
+        metrics.observe("llm.prompt_tokens", builder.stats['prompt_tokens'])
         
-        return json.loads(clean_response)
+        # Kept for tracking prompt size savings
+        self.prompt_stats = builder.stats
+        if Config.DEBUG:
+            print(f"Debug - Prompt tokens: {builder.stats['prompt_tokens']} "
+                  f"(budget {builder.stats['token_budget']}, raw text {builder.stats['raw_text_tokens']}, "
+                  f"kept {builder.stats['kept_items']}/{builder.stats['detected_items']} components, "
+                  f"{builder.stats['kept_lines']}/{builder.stats['raw_lines']} lines)", file=sys.stderr)
+        return prompt
+    
+    def _timed_parse(self, response: str, checks: Optional[List[str]] = None) -> Tuple[Dict[str, Any], List[str]]:
+        with metrics.timer("llm.parse_response"):
+            return self._parse_response(response, checks)
+    
+    def _parse_response(self, response: str, checks: Optional[List[str]] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """Parse and validate provider response, returning results and the fields still missing"""
+        return parse_response(response, checks)
+    
+    def _complete(self, prompt: str, results: Dict[str, Any], invalid: List[str]) -> List[str]:
+        """Ask only for missing or invalid fields; whatever is still missing gets conservative defaults"""
+        for _ in range(Config.RESPONSE_REPAIR_ATTEMPTS):
+            if not invalid:
+                break
+            self._log_followup(invalid)
+            try:
+                with metrics.timer("llm.followup_call"):
+                    raw_response = self._generate(followup_prompt(prompt, results, invalid))
+                invalid = merge_fields(results, raw_response, invalid)
+            except Exception as e:
+                # The partial results are still worth more than the error response
+                if Config.DEBUG:
+                    print(f"Follow-up request failed: {e}", file=sys.stderr)
+                break
+        return self._default_fields(results, invalid)
+    
+    async def _complete_async(self, prompt: str, results: Dict[str, Any], invalid: List[str]) -> List[str]:
+        """Async counterpart of _complete"""
+        for _ in range(Config.RESPONSE_REPAIR_ATTEMPTS):
+            if not invalid:
+                break
+            self._log_followup(invalid)
+            try:
+                with metrics.timer("llm.followup_call"):
+                    raw_response = await self._generate_async(followup_prompt(prompt, results, invalid))
+                invalid = merge_fields(results, raw_response, invalid)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if Config.DEBUG:
+                    print(f"Follow-up request failed: {e}", file=sys.stderr)
+                break
+        return self._default_fields(results, invalid)
+    
+    def _log_followup(self, invalid: List[str]):
+        metrics.incr("llm.followup_requests")
+        if Config.DEBUG:
+            print(f"Debug - {self.__class__.__name__} response incomplete, requesting: {', '.join(invalid)}",
+                  file=sys.stderr)
+    
+    def _default_fields(self, results: Dict[str, Any], invalid: List[str]) -> List[str]:
+        if invalid:
+            metrics.incr("llm.fields_defaulted", len(invalid))
+            fill_defaults(results, invalid)
+        return invalid
     
     def _get_error_response(self) -> Dict[str, Any]:
         """Standard error response for all providers"""
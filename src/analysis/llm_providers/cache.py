@@ -0,0 +1,18 @@
+import threading
+from src.utils.cache import DiskCache
+from src.utils.config import Config
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> DiskCache:
+    """Return the response cache shared by all providers in this process"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(
+                Config.LLM_CACHE_DIR,
+                Config.LLM_CACHE_MAX_MB * 1024 * 1024,
+                ttl=Config.LLM_CACHE_TTL
+            )
+        return _cache
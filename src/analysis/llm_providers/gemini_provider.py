@@ -1,7 +1,50 @@
+import asyncio
+import sys
+import threading
 import google.generativeai as genai
 from .base import LLMProvider
 from src.utils.config import Config
 
+# genai.configure builds the process-wide client and its channel, so do it
+# once and share models across provider instances
+_configured_key = None
+_models = {}
+_models_lock = threading.Lock()
+
+# The SDK creates one async client per process and it stays bound to the
+# event loop that first used it, so every async request runs on this loop
+# and callers on other loops await the result
+_async_loop = None
+
+# The SDK has no connection pool setting; HTTP_POOL_SIZE caps concurrent
+# requests on the shared channel instead
+_request_slots = threading.BoundedSemaphore(Config.HTTP_POOL_SIZE)
+_async_request_slots = None
+
+def _configure(api_key):
+    global _configured_key
+    if _configured_key != api_key:
+        genai.configure(api_key=api_key, transport=Config.GEMINI_TRANSPORT)
+        _configured_key = api_key
+        _models.clear()
+
+def get_model(api_key, model_name):
+    """Long-lived Gemini model bound to a single configured client"""
+    with _models_lock:
+        _configure(api_key)
+        if model_name not in _models:
+            _models[model_name] = genai.GenerativeModel(model_name)
+        return _models[model_name]
+
+def get_async_loop():
+    """The background event loop that owns the SDK's async client"""
+    global _async_loop
+    with _models_lock:
+        if _async_loop is None:
+            _async_loop = asyncio.new_event_loop()
+            threading.Thread(target=_async_loop.run_forever, name="gemini-async", daemon=True).start()
+        return _async_loop
+
 class GeminiProvider(LLMProvider):
     """Gemini implementation of LLM provider"""
     
@@ -10,8 +53,7 @@ class GeminiProvider(LLMProvider):
         super().__init__(**config)
         
         # Configure Gemini
-        genai.configure(api_key=self.config['api_key'])
-        self.model = genai.GenerativeModel(self.config['model'])
+        self.model = get_model(self.config['api_key'], self.config['model'])
         
         # Store temperature for generation
         self.temperature = self.config.get('temperature', 0.3)
@@ -19,18 +61,73 @@ class GeminiProvider(LLMProvider):
     def _generate_content(self, prompt: str) -> str:
         """Generate content using Gemini"""
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=self.temperature
+            with _request_slots:
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=self.temperature
+                    ),
+                    request_options={"timeout": Config.HTTP_TIMEOUT}
                 )
+            
+            if Config.DEBUG:
+                print(f"\nDebug - Gemini Response:\n{response.text}", file=sys.stderr)
+            return response.text
+            
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Gemini generation error: {e}", file=sys.stderr)
+            raise
+    
+    async def _generate_content_async(self, prompt: str) -> str:
+        """Generate content using Gemini's async API"""
+        try:
+            # Cancelling the caller, e.g. a losing hedge, cancels the request too
+            response = await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(self._request_async(prompt), get_async_loop())
             )
             
             if Config.DEBUG:
-                print(f"\nDebug - Gemini Response:\n{response.text}")
+                print(f"\nDebug - Gemini Response:\n{response.text}", file=sys.stderr)
             return response.text
             
         except Exception as e:
             if Config.DEBUG:
-                print(f"Gemini generation error: {e}")
-            raise 
\ No newline at end of file
+                print(f"Gemini generation error: {e}", file=sys.stderr)
+            raise
+    
+    async def _request_async(self, prompt: str):
+        """generate_content_async on the background loop, within the pool limit"""
+        global _async_request_slots
+        if _async_request_slots is None:
+            _async_request_slots = asyncio.Semaphore(Config.HTTP_POOL_SIZE)
+        async with _async_request_slots:
+            return await self.model.generate_content_async(
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=self.temperature
+                ),
+                request_options={"timeout": Config.HTTP_TIMEOUT}
+            )
+    
+    def _stream_content(self, prompt: str):
+        """Stream content from Gemini chunk by chunk"""
+        try:
+            with _request_slots:
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=self.temperature
+                    ),
+                    request_options={"timeout": Config.HTTP_TIMEOUT},
+                    stream=True
+                )
+                
+                for chunk in response:
+                    if chunk.text:
+                        yield chunk.text
+            
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Gemini streaming error: {e}", file=sys.stderr)
+            raise
@@ -1,39 +1,132 @@
+import asyncio
+import sys
+import threading
+import weakref
+import httpx
 import openai
 from .base import LLMProvider
+from src.analysis.event_loop import on_loop_close
 from src.utils.config import Config
 
+# Clients are shared by every provider instance in the process so keep-alive
+# connections survive across analyze calls
+_clients = {}
+# Async connections belong to the event loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+def _http_limits():
+    return httpx.Limits(
+        max_connections=Config.HTTP_POOL_SIZE,
+        max_keepalive_connections=Config.HTTP_POOL_SIZE,
+        keepalive_expiry=Config.HTTP_KEEPALIVE
+    )
+
+def _http_timeout():
+    return httpx.Timeout(Config.HTTP_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+
+def get_client(api_key, base_url):
+    """Long-lived sync OpenAI client with a pooled HTTP transport"""
+    key = (api_key, base_url)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = openai.OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,  # Retries are handled by SecurityAnalyzer
+                http_client=httpx.Client(limits=_http_limits(), timeout=_http_timeout())
+            )
+        return _clients[key]
+
+def get_async_client(api_key, base_url):
+    """Async OpenAI client for the running event loop, closed along with the loop"""
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url)
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        if key in loop_clients:
+            return loop_clients[key]
+        client = loop_clients[key] = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_http_limits(), timeout=_http_timeout())
+        )
+    on_loop_close(client.close)
+    return client
+
 class OpenAIProvider(LLMProvider):
     """OpenAI implementation of LLM provider"""
-    
+
     def __init__(self):
         config = Config.get_provider_config('openai')
         super().__init__(**config)
-        
+
         # Configure OpenAI
-        openai.api_key = self.config['api_key']
-        if self.config.get('base_url'):
-            openai.api_base = self.config['base_url']
-    
+        self.client = get_client(self.config['api_key'], self.config.get('base_url'))
+
     def _generate_content(self, prompt: str) -> str:
         """Generate content using OpenAI"""
         try:
-            messages = [
-                {"role": "system", "content": "You are a PCI-DSS security expert analyzing architecture diagrams."},
-                {"role": "user", "content": prompt}
-            ]
-            
-            response = openai.ChatCompletion.create(
+            response = self.client.chat.completions.create(
+                model=self.config['model'],
+                messages=self._build_messages(prompt),
+                temperature=self.config['temperature']
+            )
+
+            if Config.DEBUG:
+                print(f"\nDebug - OpenAI Response:\n{response.choices[0].message.content}", file=sys.stderr)
+
+            return response.choices[0].message.content
+
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"OpenAI generation error: {e}", file=sys.stderr)
+            raise
+
+    async def _generate_content_async(self, prompt: str) -> str:
+        """Generate content using the async OpenAI client"""
+        try:
+            client = get_async_client(self.config['api_key'], self.config.get('base_url'))
+
+            response = await client.chat.completions.create(
                 model=self.config['model'],
-                messages=messages,
+                messages=self._build_messages(prompt),
                 temperature=self.config['temperature']
             )
-            
+
             if Config.DEBUG:
-                print(f"\nDebug - OpenAI Response:\n{response.choices[0].message.content}")
-            
+                print(f"\nDebug - OpenAI Response:\n{response.choices[0].message.content}", file=sys.stderr)
+
             return response.choices[0].message.content
-            
+
         except Exception as e:
             if Config.DEBUG:
-                print(f"OpenAI generation error: {e}")
-            raise 
\ No newline at end of file
+                print(f"OpenAI generation error: {e}", file=sys.stderr)
+            raise
+
+    def _stream_content(self, prompt: str):
+        """Stream content from OpenAI token by token"""
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.config['model'],
+                messages=self._build_messages(prompt),
+                temperature=self.config['temperature'],
+                stream=True
+            )
+
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"OpenAI streaming error: {e}", file=sys.stderr)
+            raise
+
+    def _build_messages(self, prompt: str):
+        """Chat messages for an analysis prompt"""
+        return [
+            {"role": "system", "content": "You are a PCI-DSS security expert analyzing architecture diagrams."},
+            {"role": "user", "content": prompt}
+        ]
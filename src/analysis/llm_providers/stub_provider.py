@@ -0,0 +1,50 @@
+import asyncio
+import json
+import time
+from .base import LLMProvider
+from src.utils.config import Config
+
+# Enough chunks to exercise progressive rendering without slowing runs down
+_STREAM_CHUNK_SIZE = 64
+
+class StubProvider(LLMProvider):
+    """Offline provider returning a canned response after a configurable delay"""
+
+    def __init__(self):
+        config = Config.get_provider_config('stub')
+        super().__init__(**config)
+
+        self.latency = self.config.get('latency', 0.0)
+        self.response = self._load_response(self.config.get('response_path'))
+
+    def _load_response(self, path):
+        """Canned response text, from STUB_RESPONSE_PATH or built from the schema"""
+        if path:
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+
+        response = self._get_error_response()
+        response["recommendations"] = ["Stub provider response - no diagram analysis was performed"]
+        response["analysis"]["key_risks"] = []
+        return json.dumps(response)
+
+    def _generate_content(self, prompt: str) -> str:
+        """Wait out the simulated latency and return the canned response"""
+        if self.latency:
+            time.sleep(self.latency)
+        return self.response
+
+    async def _generate_content_async(self, prompt: str) -> str:
+        """Async wait so concurrent stub requests overlap like real ones"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.response
+
+    def _stream_content(self, prompt: str):
+        """Spread the latency over fixed-size chunks of the canned response"""
+        chunks = [self.response[i:i + _STREAM_CHUNK_SIZE]
+                  for i in range(0, len(self.response), _STREAM_CHUNK_SIZE)]
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
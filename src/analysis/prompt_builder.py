@@ -0,0 +1,228 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+from src.utils.config import Config
+
+# Instructions are kept flush-left; indentation is pure token overhead
+PROMPT_TEMPLATE = """You are a PCI-DSS security expert analyzing an architecture diagram for security compliance.
+
+**Detected Components:**
+{detected_items}
+
+**Raw Text:**
+{raw_text}
+
+**Instructions:**
+1. **Evaluate PCI-DSS Compliance:**
+- Are firewalls present and properly configured to protect cardholder data?
+- Are vendor-supplied defaults (e.g., passwords, configurations) replaced with secure settings?
+- Is cardholder data encrypted at rest and in transit?
+- Are access controls in place to restrict access to cardholder data?
+- Are audit logs enabled for all critical systems?
+
+2. **Analyze Security Patterns:**
+- Are client-facing components (e.g., web servers) properly isolated from internal systems?
+- Are network boundaries (e.g., DMZ, private zones) clearly defined and enforced?
+- Are security controls (e.g., firewalls, IDS/IPS, WAF) in place to protect critical assets?
+
+3. **Identify Risks and Gaps:**
+- Identify potential attack vectors (e.g., exposed databases, unencrypted communication).
+- Highlight security gaps (e.g., missing segmentation, lack of encryption).
+- Suggest specific controls to mitigate risks (e.g., WAF for web servers, encryption for databases).
+
+4. **Provide Recommendations:**
+- Offer clear, actionable recommendations to address identified issues.
+- Prioritize recommendations based on risk severity (e.g., critical, high, medium).
+
+5. **Assign a Compliance Score:**
+- Provide a compliance score (High/Medium/Low) based on the analysis.
+- Explain the rationale for the score.
+{scope}
+Respond ONLY with a valid JSON object matching exactly this schema:
+{schema}"""
+
+_WORD_PATTERN = re.compile(r'[A-Za-z]{2,}')
+_SYMBOL_PATTERN = re.compile(r'[\W_]')
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English and JSON)"""
+    return (len(text) + 3) // 4
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or padding"""
+    return _COMPACT_ENCODER.encode(value)
+
+
+def is_noise(line: str) -> bool:
+    """OCR debris: too short, mostly symbols, or no real words"""
+    if len(line) < 3:
+        return True
+    symbols = len(_SYMBOL_PATTERN.findall(line))
+    if symbols > len(line) / 2:
+        return True
+    return not _WORD_PATTERN.search(line)
+
+
+def score_line(line: str) -> float:
+    """Rank raw text lines; longer runs of real words carry more signal"""
+    words = _WORD_PATTERN.findall(line)
+    letters = sum(len(word) for word in words)
+    return letters / len(line) * len(words)
+
+
+def rank_line(line: str) -> Optional[float]:
+    """score_line for real text, None for noise; finds the words only once"""
+    if len(line) < 3 or len(_SYMBOL_PATTERN.findall(line)) > len(line) / 2:
+        return None
+    words = _WORD_PATTERN.findall(line)
+    if not words:
+        return None
+    return len(''.join(words)) / len(line) * len(words)
+
+
+class PromptBuilder:
+    """Builds analysis prompts that fit a per-provider token budget"""
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget or Config.PROMPT_TOKEN_BUDGET
+        self.stats: Dict[str, Any] = {}
+
+    def build(self, components: Dict[str, Any]) -> str:
+        """Render the prompt, trimming ranked components and then raw text to stay within budget"""
+        sections = {
+            "detected_items": "",
+            "scope": self.build_scope(components),
+            "schema": compact_json(self.build_schema(components))
+        }
+
+        # Components get first call on what the fixed parts leave; raw text gets the rest
+        fixed_tokens = estimate_tokens(PROMPT_TEMPLATE.format(raw_text="", **sections))
+        items_budget = max(0, self.token_budget - fixed_tokens)
+        detected_items = self.select_detected_items(components.get('detected_items', {}), items_budget)
+        item_stats = self.stats
+        sections["detected_items"] = compact_json(detected_items)
+
+        fixed_tokens = estimate_tokens(PROMPT_TEMPLATE.format(raw_text="", **sections))
+        raw_budget = max(0, self.token_budget - fixed_tokens)
+
+        raw_lines = self.select_raw_text(components.get('text', ''), detected_items, raw_budget)
+        prompt = PROMPT_TEMPLATE.format(raw_text="\n".join(raw_lines), **sections)
+
+        self.stats.update(item_stats)
+        self.stats.update({
+            "prompt_tokens": estimate_tokens(prompt),
+            "token_budget": self.token_budget,
+            "raw_text_tokens": estimate_tokens(components.get('text', ''))
+        })
+        return prompt
+
+    def select_detected_items(self, detected_items: Dict[str, List[str]], budget: int) -> Dict[str, List[str]]:
+        """List each component once, under its first category, keeping the best items that fit"""
+        candidates = []
+        seen = set()
+        duplicates = 0
+        for category, items in detected_items.items():
+            for index, item in enumerate(items):
+                item = item.strip()
+                key = item.lower()
+                if not item:
+                    continue
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                candidates.append((rank_line(item) or 0.0, category, index, item))
+
+        # Each kept item costs its quoted text and a comma; a category also costs its key
+        kept = []
+        categories = set()
+        used = 2
+        for _, category, index, item in sorted(candidates, key=lambda candidate: -candidate[0]):
+            cost = estimate_tokens(compact_json(item)) + 1
+            if category not in categories:
+                cost += estimate_tokens(compact_json(category)) + 3
+            if used + cost > budget:
+                continue
+            kept.append((category, index, item))
+            categories.add(category)
+            used += cost
+
+        self.stats = {
+            "detected_items": len(candidates) + duplicates,
+            "kept_items": len(kept),
+            "dropped_duplicate_items": duplicates,
+            "dropped_items_over_budget": len(candidates) - len(kept)
+        }
+
+        # Restore category and reading order
+        order = {category: position for position, category in enumerate(detected_items)}
+        selected: Dict[str, List[str]] = {}
+        for category, _, item in sorted(kept, key=lambda entry: (order[entry[0]], entry[1])):
+            selected.setdefault(category, []).append(item)
+        return selected
+
+    def build_schema(self, components: Dict[str, Any]) -> Dict[str, Any]:
+        """Response schema, narrowed to the checks still pending if rules decided some"""
+        pending = components.get('pending_checks')
+        if pending is None:
+            return Config.RESPONSE_SCHEMA
+
+        schema = dict(Config.RESPONSE_SCHEMA)
+        schema["checks"] = {check: kind for check, kind in Config.RESPONSE_SCHEMA["checks"].items()
+                            if check in pending}
+        return schema
+
+    def build_scope(self, components: Dict[str, Any]) -> str:
+        """Tell the model which checks were already confirmed locally"""
+        pending = components.get('pending_checks')
+        if pending is None:
+            return ""
+
+        confirmed = [check for check in Config.RESPONSE_SCHEMA["checks"] if check not in pending]
+        return (f"\nThese checks are already confirmed as present and must not be re-evaluated: "
+                f"{', '.join(confirmed)}. Only evaluate the checks listed in the schema.\n")
+
+    def select_raw_text(self, text: str, detected_items: Dict[str, List[str]], budget: int) -> List[str]:
+        """Drop noise and lines already listed as components, then keep the best lines"""
+        already_listed = {item.strip().lower() for items in detected_items.values() for item in items}
+
+        candidates = []
+        seen = set()
+        noise = duplicates = 0
+        for index, line in enumerate(text.split('\n')):
+            line = line.strip()
+            key = line.lower()
+            if not line:
+                continue
+            # Listed components are skipped before ranking, which is the costly part
+            if key in already_listed or key in seen:
+                duplicates += 1
+                continue
+            score = rank_line(line)
+            if score is None:
+                noise += 1
+                continue
+            seen.add(key)
+            candidates.append((score, index, line))
+
+        # Fill the budget with the highest-ranked lines, then restore reading order
+        kept = []
+        used = 0
+        for _, index, line in sorted(candidates, key=lambda candidate: -candidate[0]):
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                continue
+            kept.append((index, line))
+            used += cost
+
+        self.stats = {
+            "raw_lines": len(candidates) + noise + duplicates,
+            "kept_lines": len(kept),
+            "dropped_noise": noise,
+            "dropped_duplicates": duplicates,
+            "dropped_over_budget": len(candidates) - len(kept)
+        }
+        return [line for _, line in sorted(kept)]
@@ -0,0 +1,162 @@
+import asyncio
+import re
+import sys
+import threading
+import time
+from typing import Optional
+from src.utils.config import Config
+from src.utils.metrics import metrics
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would wait longer than RATE_LIMIT_MAX_WAIT for quota"""
+    pass
+
+
+class TokenBucket:
+    """Per-minute quota that refills continuously; reservations may run it into debt"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` and return how long to wait until it is actually available"""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request larger than the whole quota can still go once the bucket is full
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float):
+        self.level += min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Paces requests to one provider model within its requests- and tokens-per-minute quotas
+
+    Reservations are granted in arrival order: each caller is told how long to
+    sleep so that its request starts once the buckets have refilled, rather
+    than being rejected by the provider.
+    """
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0
+        self.waiting = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def acquire(self, tokens: int):
+        """Block until a request of `tokens` estimated tokens may be sent"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            try:
+                time.sleep(delay)
+            finally:
+                self._done_waiting()
+
+    async def acquire_async(self, tokens: int):
+        """Async counterpart of acquire"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._done_waiting()
+
+    def penalize(self, retry_after: float):
+        """Hold every request to this model back after the provider said to slow down"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self.blocked_until - now)
+            if not self.enabled and delay == 0:
+                return 0.0
+            reserved = []
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket is not None:
+                    delay = max(delay, bucket.reserve(amount, now))
+                    reserved.append((bucket, amount))
+
+            if delay > Config.RATE_LIMIT_MAX_WAIT:
+                for bucket, amount in reserved:
+                    bucket.refund(amount)
+                raise RateLimitExceeded(f"{self.name} quota exhausted; next slot in {delay:.1f}s")
+
+            if delay > 0:
+                self.waiting += 1
+            metrics.observe("ratelimit.queue_depth", self.waiting)
+        metrics.record("ratelimit.wait", delay)
+        if delay > 0 and Config.DEBUG:
+            print(f"Debug - {self.name} rate limited, waiting {delay:.2f}s", file=sys.stderr)
+        return delay
+
+    def _done_waiting(self):
+        with self._lock:
+            self.waiting -= 1
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider: str, model: str, rpm: int = 0, tpm: int = 0) -> RateLimiter:
+    """Process-wide limiter for a provider model; the first caller's quotas apply"""
+    key = (provider, model)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(f"{provider}/{model}", rpm, tpm)
+        return _limiters[key]
+
+
+def rate_limiter_stats():
+    """Requests currently waiting for quota, per provider model"""
+    with _limiters_lock:
+        return {limiter.name: {"waiting": limiter.waiting} for limiter in _limiters.values() if limiter.enabled}
+
+
+_RATE_LIMIT_ERRORS = ('RateLimitError', 'ResourceExhausted', 'TooManyRequests')
+# "Please retry in 12.5s", "retry_delay { seconds: 12 }", "Retry-After: 30"
+_RETRY_HINT = re.compile(r'retry(?:[ _-]after| in|_delay\s*\{\s*seconds:)\s*:?\s*(\d+(?:\.\d+)?)\s*(ms)?', re.I)
+
+
+def rate_limit_delay(error: Exception) -> Optional[float]:
+    """Seconds to back off if `error` is a provider rate limit (HTTP 429), otherwise None"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if status != 429 and type(error).__name__ not in _RATE_LIMIT_ERRORS:
+        return None
+
+    hint = getattr(error, 'retry_after', None)
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if hint is None and headers is not None:
+        if headers.get('retry-after-ms'):
+            hint = _seconds(headers['retry-after-ms'], 'ms')
+        else:
+            hint = _seconds(headers.get('retry-after'))
+    if hint is None:
+        match = _RETRY_HINT.search(str(error))
+        if match:
+            hint = _seconds(match.group(1), match.group(2))
+
+    if hint is None:
+        hint = Config.RATE_LIMIT_DEFAULT_DELAY
+    return min(float(hint), Config.RATE_LIMIT_MAX_WAIT)
+
+
+def _seconds(value, unit=None) -> Optional[float]:
+    # Retry-After may also be an HTTP date; those fall back to the default delay
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds / 1000 if unit == 'ms' else seconds
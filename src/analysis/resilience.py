@@ -0,0 +1,110 @@
+import asyncio
+import random
+import sys
+import threading
+import time
+from src.utils.config import Config
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is rejecting requests"""
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures until a cooldown passes"""
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or Config.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or Config.BREAKER_RESET_TIMEOUT
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def allow(self) -> bool:
+        """Closed and half-open circuits let requests through"""
+        with self._lock:
+            return self._state() != 'open'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed half-open probe re-opens the circuit for another cooldown
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide circuit breaker for a provider"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker()
+        return _breakers[name]
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    delay = min(Config.RETRY_MAX_DELAY, Config.RETRY_BASE_DELAY * (2 ** attempt))
+    return random.uniform(0, delay)
+
+
+def call_with_retry(name, func, *args):
+    """Call func with retries and backoff, guarded by the named circuit breaker"""
+    breaker = get_breaker(name)
+    for attempt in range(Config.RETRY_ATTEMPTS):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {name}")
+        try:
+            result = func(*args)
+        except Exception as e:
+            breaker.record_failure()
+            if Config.DEBUG:
+                print(f"{name} attempt {attempt + 1} failed: {e}", file=sys.stderr)
+            if attempt == Config.RETRY_ATTEMPTS - 1:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        breaker.record_success()
+        return result
+
+
+async def call_with_retry_async(name, func, *args):
+    """Async counterpart of call_with_retry; cancellation is never retried"""
+    breaker = get_breaker(name)
+    for attempt in range(Config.RETRY_ATTEMPTS):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {name}")
+        try:
+            result = await func(*args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            if Config.DEBUG:
+                print(f"{name} attempt {attempt + 1} failed: {e}", file=sys.stderr)
+            if attempt == Config.RETRY_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+        breaker.record_success()
+        return result
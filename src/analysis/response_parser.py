@@ -0,0 +1,403 @@
+import ast
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.config import Config
+from .prompt_builder import compact_json
+from .stream_parser import Event
+
+FOLLOWUP_TEMPLATE = """{context}
+
+**Your previous answer was incomplete.** It already contained:
+{partial}
+
+Respond ONLY with a valid JSON object containing just the missing fields, matching exactly this schema:
+{schema}"""
+
+# Both analysis prompt templates end with the schema instruction
+_SCHEMA_INSTRUCTION = "Respond ONLY with a valid JSON object"
+
+_DECODER = json.JSONDecoder()
+
+_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+_WORD = re.compile(r'[A-Za-z_]+')
+_KEY_SEPARATORS = re.compile(r'[^a-z0-9]+')
+_SCORE = re.compile(r'\b(high|medium|low)\b', re.I)
+
+_TRUE_WORDS = {"true", "yes", "y", "present", "pass", "passed", "compliant", "enabled", "1"}
+_FALSE_WORDS = {"false", "no", "n", "absent", "missing", "fail", "failed", "non-compliant", "disabled", "0"}
+# Keys models use when they return a check as an object instead of a bool
+_STATUS_KEYS = ("status", "value", "present", "passed", "compliant", "result")
+_TEXT_KEYS = ("text", "recommendation", "description", "title", "name")
+
+
+def extract_json(text: str) -> Optional[str]:
+    """The first balanced JSON object in text, or everything from its opening brace if truncated"""
+    start = text.find('{')
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = escape = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+
+def _string_end(text: str, start: int) -> int:
+    """Index of the quote closing the string opened at start, or -1 if it never closes"""
+    index = start + 1
+    while index < len(text):
+        if text[index] == '\\':
+            index += 2
+            continue
+        if text[index] == '"':
+            return index
+        index += 1
+    return -1
+
+
+def _drop_trailing_comma(out: List[str]):
+    end = len(out)
+    while end and out[end - 1].isspace():
+        end -= 1
+    if end and out[end - 1] == ',':
+        del out[end - 1]
+
+
+def _trim_incomplete(out: List[str], in_object: bool):
+    """Remove a dangling key, separator or partial literal left by truncation"""
+    while True:
+        while out and out[-1].isspace():
+            out.pop()
+        if not out:
+            return
+        last = out[-1]
+        if last == ',':
+            out.pop()
+        elif last == ':':
+            # A key without its value goes too
+            out.pop()
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1].startswith('"'):
+                out.pop()
+        elif last.isalpha() and last not in ('true', 'false', 'null'):
+            out.pop()
+        elif in_object and last.startswith('"') and len(last) > 1:
+            previous = next((chunk for chunk in reversed(out[:-1]) if not chunk.isspace()), '{')
+            if previous not in ('{', ','):
+                return
+            out.pop()
+        else:
+            return
+
+
+def _container_key(out: List[str]) -> Optional[str]:
+    """Key of the object member whose value is the container about to open, if any"""
+    tokens = [chunk for chunk in reversed(out) if not chunk.isspace()][:2]
+    if len(tokens) == 2 and tokens[0] == ':' and tokens[1].startswith('"'):
+        try:
+            return json.loads(tokens[1])
+        except ValueError:
+            return None
+    return None
+
+
+def _repair(text: str) -> Tuple[str, List[Tuple[Optional[str], ...]]]:
+    """Repaired JSON text and the key paths of the containers truncation left open"""
+    out: List[str] = []
+    stack: List[Tuple[str, Optional[str]]] = []
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char == '"':
+            end = _string_end(text, index)
+            if end < 0:
+                # Truncated inside a string: the partial value is dropped
+                break
+            out.append(text[index:end + 1])
+            index = end + 1
+            continue
+        if char.isalpha():
+            word = _WORD.match(text, index).group()
+            out.append(_LITERALS.get(word, word))
+            index += len(word)
+            continue
+        if char in '{[':
+            stack.append(('}' if char == '{' else ']', _container_key(out)))
+        elif char in '}]':
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+        out.append(char)
+        index += 1
+
+    truncated = [tuple(key for _, key in stack[1:depth + 1]) for depth in range(len(stack))]
+    while stack:
+        _trim_incomplete(out, stack[-1][0] == '}')
+        out.append(stack.pop()[0])
+    return ''.join(out), truncated
+
+
+def repair_json(text: str) -> str:
+    """Fix trailing commas, Python literals and truncation in a JSON object"""
+    return _repair(text)[0]
+
+
+def _load(text: str) -> Tuple[Any, List[Tuple[Optional[str], ...]]]:
+    """Parsed response and the key paths of containers that had to be closed by repair"""
+    start = text.find('{')
+    if start < 0:
+        raise ValueError("No JSON object in response")
+
+    # Well-formed responses, fenced or not, never reach the pure-Python scanner
+    try:
+        return _DECODER.raw_decode(text, start)[0], []
+    except ValueError:
+        pass
+
+    candidate = extract_json(text)
+    try:
+        repaired, truncated = _repair(candidate)
+        return json.loads(repaired), truncated
+    except ValueError:
+        pass
+    try:
+        # Python dict syntax with single quotes
+        return ast.literal_eval(candidate), []
+    except (ValueError, SyntaxError):
+        raise ValueError("Response JSON could not be repaired")
+
+
+def loads_tolerant(text: str) -> Any:
+    """Parse the first JSON object in a model response, repairing common defects"""
+    return _load(text)[0]
+
+
+@lru_cache(maxsize=1024)
+def _key(name: Any) -> str:
+    return _KEY_SEPARATORS.sub(' ', str(name).lower()).strip()
+
+
+def _to_bool(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        word = value.strip().lower()
+        if word in _TRUE_WORDS:
+            return True
+        if word in _FALSE_WORDS:
+            return False
+    if isinstance(value, dict):
+        for key in _STATUS_KEYS:
+            if key in value:
+                return _to_bool(value[key])
+    return None
+
+
+def _to_score(value: Any) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    match = _SCORE.search(value)
+    return match.group(1).title() if match else None
+
+
+def _to_strings(value: Any) -> Optional[List[str]]:
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if not isinstance(value, list):
+        return None
+    strings = []
+    for item in value:
+        if isinstance(item, str):
+            if item.strip():
+                strings.append(item)
+            continue
+        if isinstance(item, dict):
+            item = next((item[key] for key in _TEXT_KEYS if isinstance(item.get(key), str)), None)
+        if isinstance(item, (str, int, float)) and not isinstance(item, bool) and str(item).strip():
+            strings.append(str(item))
+    return strings
+
+
+def validate(data: Any, checks: Optional[List[str]] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """Coerce a parsed response to RESPONSE_SCHEMA, returning the results and any invalid fields
+
+    Invalid fields are dotted paths such as "checks.Audit logging" or
+    "compliance_score"; they are left out of the results. Only the given
+    checks (all schema checks by default) count as required.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+    schema = Config.RESPONSE_SCHEMA
+    required = list(schema["checks"]) if checks is None else checks
+    fields = {_key(key): value for key, value in data.items()}
+    results: Dict[str, Any] = {}
+    invalid = []
+
+    raw_checks = fields.get("checks")
+    raw_checks = {_key(key): value for key, value in raw_checks.items()} if isinstance(raw_checks, dict) else {}
+    results["checks"] = {}
+    for check in schema["checks"]:
+        status = _to_bool(raw_checks.get(_key(check)))
+        if status is not None:
+            results["checks"][check] = status
+        elif check in required:
+            invalid.append(f"checks.{check}")
+
+    score = _to_score(fields.get("compliance score"))
+    if score is not None:
+        results["compliance_score"] = score
+    else:
+        invalid.append("compliance_score")
+
+    recommendations = _to_strings(fields.get("recommendations"))
+    if recommendations is not None:
+        results["recommendations"] = recommendations
+    else:
+        invalid.append("recommendations")
+
+    raw_analysis = fields.get("analysis")
+    raw_analysis = {_key(key): value for key, value in raw_analysis.items()} if isinstance(raw_analysis, dict) else {}
+    results["analysis"] = {}
+    for key in schema["analysis"]:
+        items = _to_strings(raw_analysis.get(_key(key)))
+        if items is not None:
+            results["analysis"][key] = items
+        else:
+            invalid.append(f"analysis.{key}")
+
+    return results, invalid
+
+
+def normalize_event(event: Event) -> Optional[Event]:
+    """A streamed event with its check name and value coerced as validate would; None if invalid"""
+    kind, key, value = event
+    if kind == "check":
+        names = {_key(check): check for check in Config.RESPONSE_SCHEMA["checks"]}
+        name = names.get(_key(key))
+        status = _to_bool(value)
+        return None if name is None or status is None else (kind, name, status)
+    if kind == "compliance_score":
+        score = _to_score(value)
+        return None if score is None else (kind, None, score)
+    if kind == "recommendation":
+        strings = _to_strings([value])
+        return (kind, None, strings[0]) if strings else None
+    return event
+
+
+def _truncated_fields(truncated: List[Tuple[Optional[str], ...]]) -> List[str]:
+    """Schema fields whose value was cut off; the root object and sections alone don't count"""
+    schema = Config.RESPONSE_SCHEMA
+    fields = []
+    for path in truncated:
+        if not path or path[0] is None:
+            continue
+        section = _key(path[0])
+        if section in ("compliance score", "recommendations"):
+            fields.append(section.replace(' ', '_'))
+        elif section in schema and len(path) > 1 and path[1] is not None:
+            name = next((key for key in schema[section] if _key(key) == _key(path[1])), None)
+            if name is not None:
+                fields.append(f"{section}.{name}")
+    return fields
+
+
+def _drop_field(results: Dict[str, Any], field: str):
+    section, _, key = field.partition('.')
+    if key:
+        results.get(section, {}).pop(key, None)
+    else:
+        results.pop(section, None)
+
+
+def parse_response(text: str, checks: Optional[List[str]] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """Tolerantly parse and validate a model response; raises if nothing in it is usable
+
+    Values cut off by truncation may look complete (an array missing its
+    last items), so they count as invalid and are asked for again.
+    """
+    data, truncated = _load(text)
+    results, invalid = validate(data, checks)
+    for field in _truncated_fields(truncated):
+        if field not in invalid:
+            _drop_field(results, field)
+            invalid.append(field)
+    required = len(checks if checks is not None else Config.RESPONSE_SCHEMA["checks"])
+    if len(invalid) == required + 2 + len(Config.RESPONSE_SCHEMA["analysis"]):
+        raise ValueError("Response matches none of the schema fields")
+    return results, invalid
+
+
+def _sub_schema(fields: List[str]) -> Dict[str, Any]:
+    schema: Dict[str, Any] = {}
+    for field in fields:
+        section, _, key = field.partition('.')
+        if key:
+            schema.setdefault(section, {})[key] = Config.RESPONSE_SCHEMA[section][key]
+        else:
+            schema[section] = Config.RESPONSE_SCHEMA[section]
+    return schema
+
+
+def followup_prompt(prompt: str, results: Dict[str, Any], fields: List[str]) -> str:
+    """The original request's context asking only for the fields that were missing or invalid"""
+    context = prompt.rsplit(_SCHEMA_INSTRUCTION, 1)[0].rstrip()
+    return FOLLOWUP_TEMPLATE.format(
+        context=context,
+        partial=compact_json(results),
+        schema=compact_json(_sub_schema(fields))
+    )
+
+
+def merge_fields(results: Dict[str, Any], text: str, fields: List[str]) -> List[str]:
+    """Copy the requested fields from a follow-up response into results; returns those still missing"""
+    data, truncated = _load(text)
+    extra, _ = validate(data)
+    cut_off = _truncated_fields(truncated)
+    remaining = []
+    for field in fields:
+        section, _, key = field.partition('.')
+        if field in cut_off:
+            remaining.append(field)
+        elif key and key in extra.get(section, {}):
+            results.setdefault(section, {})[key] = extra[section][key]
+        elif not key and section in extra:
+            results[section] = extra[section]
+        else:
+            remaining.append(field)
+    return remaining
+
+
+def fill_defaults(results: Dict[str, Any], fields: List[str]):
+    """Conservative values for fields the model never supplied: failing checks, Low score, empty lists"""
+    for field in fields:
+        section, _, key = field.partition('.')
+        if section == "checks":
+            results.setdefault("checks", {})[key] = False
+        elif section == "compliance_score":
+            results["compliance_score"] = "Low"
+        elif key:
+            results.setdefault(section, {})[key] = []
+        else:
+            results[section] = []
@@ -0,0 +1,106 @@
+import re
+from typing import Any, Dict, List
+from src.utils.config import Config
+
+# Terms that, when labeled on the diagram, settle a check without the LLM.
+# Absence of a term is never conclusive (OCR may have missed it), so rules
+# only ever decide a check as passing. A false pass is the costly mistake,
+# so only terms that name the control itself are listed: product names that
+# mean something else (Redis Sentinel, git checkpoints) and terms that are
+# present whether or not the control is (VLAN, subnet, VPC, security group)
+# are left to the LLM.
+CHECK_EVIDENCE = {
+    "Firewalls present": ["firewall", "firewalls", "ngfw", "fortigate", "palo alto"],
+    "Network segmentation": ["dmz", "segmentation", "segmented", "network zone", "security zone"],
+    "Encryption in transit": ["tls", "https", "ssl", "mtls", "ipsec", "vpn", "sftp"],
+    "Encryption at rest": ["encryption at rest", "encrypted at rest", "encrypted database",
+                           "aes-256", "aes256", "kms", "hsm", "tde", "tokenization", "tokenized"],
+    "Access controls": ["access control", "rbac", "iam", "mfa", "2fa", "sso", "ldap",
+                        "active directory", "okta", "bastion", "jump server"],
+    "Audit logging": ["audit log", "audit logs", "audit logging", "siem", "splunk", "syslog",
+                      "log server", "log management", "qradar"]
+}
+
+# CDE isolation depends on topology the text doesn't show, so it is only
+# decided when one label names both the CDE and its isolation ("Isolated CDE",
+# "CDE segment"). The CDE terms alone also mark changes that affect the check.
+CDE_TERMS = ["cde", "cardholder data environment", "cardholder data"]
+ISOLATION_TERMS = ["isolated", "isolation", "segment", "segmented", "segmentation", "enclave"]
+
+# Rule-decided results are capped here; only the LLM may rate a diagram "High"
+LOCAL_SCORE = "Medium"
+
+# Lines that deny or undermine the control they mention
+NEGATIONS = re.compile(r'\b(no|not|missing|without|lacks?|absent|disabled|shares?|shared|flat)\b')
+
+
+def _compile(terms: List[str]):
+    alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf'(?<![a-z0-9])(?:{alternation})(?![a-z0-9])')
+
+
+class RuleEngine:
+    """Decides schema checks locally from OCR text when the evidence is unambiguous"""
+
+    _patterns = {check: _compile(terms) for check, terms in CHECK_EVIDENCE.items()}
+    _cde_pattern = _compile(CDE_TERMS)
+    _isolation_pattern = _compile(ISOLATION_TERMS)
+
+    def evaluate(self, components: Dict[str, Any]) -> Dict[str, Any]:
+        """Return decided checks with their evidence and the checks left for the LLM"""
+        lines = self._lines(components)
+
+        evidence = {}
+        for check, pattern in self._patterns.items():
+            matches = [line for line in lines if pattern.search(line)]
+            if matches:
+                evidence[check] = matches
+        isolated = [line for line in lines
+                    if self._cde_pattern.search(line) and self._isolation_pattern.search(line)]
+        if isolated:
+            evidence["CDE isolation"] = isolated
+
+        decided = {check: True for check in Config.RESPONSE_SCHEMA["checks"] if check in evidence}
+        pending = [check for check in Config.RESPONSE_SCHEMA["checks"] if check not in decided]
+
+        return {
+            "decided": decided,
+            "pending": pending,
+            "evidence": evidence
+        }
+
+    def local_results(self, outcome: Dict[str, Any]) -> Dict[str, Any]:
+        """Complete results when every check was decided without the LLM"""
+        controls = sorted({line for lines in outcome["evidence"].values() for line in lines})
+        return {
+            "checks": dict(outcome["decided"]),
+            "compliance_score": LOCAL_SCORE,
+            "recommendations": [
+                "All checks were satisfied by labeled controls; verify their configuration with the security team"
+            ],
+            "analysis": {
+                "architecture_patterns": [],
+                "security_zones": outcome["evidence"].get("Network segmentation", []),
+                "key_risks": [],
+                "attack_vectors": [],
+                "security_controls": controls
+            },
+            "note": "This is an automated initial assessment. Please consult security team for detailed review."
+        }
+
+    def merge(self, results: Dict[str, Any], outcome: Dict[str, Any]) -> Dict[str, Any]:
+        """Overlay locally decided checks on LLM results, in schema order"""
+        checks = results.get("checks", {})
+        results["checks"] = {
+            check: outcome["decided"].get(check, checks.get(check, False))
+            for check in Config.RESPONSE_SCHEMA["checks"]
+        }
+        return results
+
+    def _lines(self, components: Dict[str, Any]) -> List[str]:
+        """Lowercased diagram text, skipping lines that negate what they mention"""
+        lines = set(components.get("text", "").split("\n"))
+        for items in components.get("detected_items", {}).values():
+            lines.update(items)
+        return sorted(line.strip().lower() for line in lines
+                      if line.strip() and not NEGATIONS.search(line.lower()))
@@ -0,0 +1,123 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# (kind, key, value): ("check", name, bool), ("compliance_score", None, str),
+# ("recommendation", None, str), and after validation ("corrected", field
+# path, value) for a streamed field whose final value differs
+Event = Tuple[str, Optional[str], Any]
+
+
+class IncrementalJSONParser:
+    """Scans a streamed JSON response and emits result fields as soon as each is complete"""
+
+    def __init__(self):
+        # Each open container is [kind, current key]
+        self._stack: List[list] = []
+        self._started = False
+        self._done = False
+        self._expect_key = False
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._string: List[str] = []
+        self._literal: List[str] = []
+
+    def feed(self, chunk: str) -> List[Event]:
+        """Consume the next piece of the response and return any completed fields"""
+        events = []
+        for char in chunk:
+            if self._done:
+                break
+            self._consume(char, events)
+        return events
+
+    def _consume(self, char: str, events: List[Event]):
+        # Anything before the first brace (e.g. a ```json fence) is skipped
+        if not self._started:
+            if char == '{':
+                self._started = True
+                self._stack.append(['object', None])
+                self._expect_key = True
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+                self._string.append(char)
+            elif char == '\\':
+                self._escape = True
+                self._string.append(char)
+            elif char == '"':
+                self._end_string(events)
+            else:
+                self._string.append(char)
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._string_is_key = self._stack[-1][0] == 'object' and self._expect_key
+            self._string = []
+        elif char in '{[':
+            self._stack.append(['object' if char == '{' else 'array', None])
+            self._expect_key = char == '{'
+        elif char in '}]':
+            self._flush_literal(events)
+            self._stack.pop()
+            self._expect_key = False
+            if not self._stack:
+                self._done = True
+        elif char == ':':
+            self._expect_key = False
+        elif char == ',':
+            self._flush_literal(events)
+            self._expect_key = self._stack[-1][0] == 'object'
+        elif char.isspace():
+            self._flush_literal(events)
+        else:
+            self._literal.append(char)
+
+    def _end_string(self, events: List[Event]):
+        self._in_string = False
+        try:
+            value = json.loads('"' + ''.join(self._string) + '"')
+        except ValueError:
+            value = ''.join(self._string)
+
+        if self._string_is_key:
+            self._stack[-1][1] = value
+        else:
+            self._emit(value, events)
+
+    def _flush_literal(self, events: List[Event]):
+        """Complete a true/false/null/number value"""
+        if not self._literal:
+            return
+        text = ''.join(self._literal)
+        self._literal = []
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = text
+        self._emit(value, events)
+
+    def _emit(self, value: Any, events: List[Event]):
+        """Report values at the paths the CLI renders progressively"""
+        depth = len(self._stack)
+        root_key = self._stack[0][1]
+        kind = self._stack[-1][0]
+
+        if depth == 1 and root_key == 'compliance_score':
+            events.append(('compliance_score', None, value))
+        elif depth == 2 and root_key == 'checks' and kind == 'object':
+            events.append(('check', self._stack[-1][1], value))
+        elif depth == 2 and root_key == 'recommendations' and kind == 'array':
+            events.append(('recommendation', None, value))
+
+
+def events_from_results(results: Dict[str, Any]) -> List[Event]:
+    """Replay already-complete results (e.g. from cache) as stream events"""
+    events = [('check', name, status) for name, status in results.get('checks', {}).items()]
+    if 'compliance_score' in results:
+        events.append(('compliance_score', None, results['compliance_score']))
+    events.extend(('recommendation', None, rec) for rec in results.get('recommendations', []))
+    return events
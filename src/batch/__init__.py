@@ -0,0 +1,4 @@
+from .inputs import is_batch_input, resolve_inputs
+from .pipeline import BatchPipeline
+
+__all__ = ['BatchPipeline', 'is_batch_input', 'resolve_inputs']
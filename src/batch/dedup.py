@@ -0,0 +1,217 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.ocr.adapters import VECTOR_EXTENSIONS
+from src.utils.config import Config
+
+# pHash: DCT of a DCT_SIZE x DCT_SIZE thumbnail, keeping the lowest
+# HASH_FREQUENCIES x HASH_FREQUENCIES coefficients minus DC (255 bits)
+DCT_SIZE = 64
+HASH_FREQUENCIES = 16
+
+# Grey levels a pixel may differ from the background and still count as margin
+BACKGROUND_TOLERANCE = 24
+
+# Near-duplicates must also have a similar content aspect ratio (relative difference)
+MAX_ASPECT_DELTA = 0.1
+
+# Hash matches are confirmed on aligned thumbnails of this width, compared in
+# square cells; re-exports stay within a few grey levels per cell while an
+# edited label or box stands out in its cell
+VERIFY_WIDTH = 768
+VERIFY_CELL = 24
+
+
+def _content(image):
+    """The image cropped to its content, with a light background
+
+    Trimming the uniform margin makes re-exports with different padding or
+    slightly different crops line up; inverting dark backgrounds makes dark
+    and light theme exports of the same diagram hash alike.
+    """
+    import numpy as np
+
+    border = np.concatenate([image[0], image[-1], image[:, 0], image[:, -1]])
+    background = int(np.median(border))
+    if background < 128:
+        image = 255 - image
+        background = 255 - background
+
+    content = np.abs(image.astype(np.int16) - background) > BACKGROUND_TOLERANCE
+    rows = np.flatnonzero(content.any(axis=1))
+    columns = np.flatnonzero(content.any(axis=0))
+    if not rows.size:
+        return None
+    return image[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+
+
+def _load_content(image_path: str, reduction):
+    import cv2
+
+    image = cv2.imread(image_path, reduction)
+    if image is None:
+        return None
+    image = _content(image)
+    if image is None or min(image.shape) < 2:
+        return None
+    return image
+
+
+def phash(image_path: str) -> Optional[Tuple[int, float]]:
+    """Perceptual hash and content aspect ratio, or None if the file has no raster to hash"""
+    if image_path.lower().endswith(VECTOR_EXTENSIONS):
+        # Vector diagrams skip OCR already; their labels are cheap to read
+        return None
+
+    import cv2
+    import numpy as np
+
+    # A reduced decode is plenty for the hash thumbnail and much cheaper
+    image = _load_content(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if image is None:
+        return None
+
+    thumbnail = cv2.resize(image, (DCT_SIZE, DCT_SIZE), interpolation=cv2.INTER_AREA)
+    frequencies = cv2.dct(thumbnail.astype(np.float32))[:HASH_FREQUENCIES, :HASH_FREQUENCIES].flatten()[1:]
+    bits = frequencies > np.median(frequencies)
+    value = int.from_bytes(np.packbits(bits).tobytes(), 'big')
+    return value, image.shape[1] / image.shape[0]
+
+
+def _safe_phash(image_path: str):
+    try:
+        return phash(image_path)
+    except Exception:
+        # Unreadable files are left to the OCR stage to report
+        return None
+
+
+def max_cell_difference(image_path: str, other_path: str) -> Optional[float]:
+    """Largest mean grey-level difference over any cell of the two diagrams' aligned content"""
+    import cv2
+    import numpy as np
+
+    first = _load_content(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+    second = _load_content(other_path, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+    if first is None or second is None:
+        return None
+
+    height = max(VERIFY_CELL, round(VERIFY_WIDTH * first.shape[0] / first.shape[1]))
+    aligned = []
+    for image in (first, second):
+        image = cv2.resize(image, (VERIFY_WIDTH, height), interpolation=cv2.INTER_AREA)
+        # Forgives resampling and anti-aliasing differences between exports
+        aligned.append(cv2.GaussianBlur(image, (5, 5), 0).astype(np.float32))
+
+    difference = np.abs(aligned[0] - aligned[1])
+    cells = cv2.resize(difference, (VERIFY_WIDTH // VERIFY_CELL, height // VERIFY_CELL),
+                       interpolation=cv2.INTER_AREA)
+    return float(cells.max())
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance for nearest-neighbour hash lookups"""
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, value: int, item: Any):
+        node = [value, item, {}]
+        self.size += 1
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """Items within max_distance of value, closest first"""
+        if self._root is None:
+            return []
+        matches = []
+        candidates = [self._root]
+        while candidates:
+            node = candidates.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                matches.append((distance, node[1]))
+            # Triangle inequality: only subtrees at these distances can match
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    candidates.append(child)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+class DuplicateIndex:
+    """In-memory index of diagram hashes that maps near-duplicates to the first diagram seen
+
+    A hash match only nominates a candidate: a one-label edit moves the hash
+    about as far as a re-export does, so candidates are confirmed with
+    max_cell_difference before a result is reused.
+    """
+
+    def __init__(self, max_distance: Optional[int] = None, max_cell_difference: Optional[float] = None):
+        self.max_distance = Config.DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+        self.max_cell_difference = (Config.DEDUP_MAX_CELL_DIFF if max_cell_difference is None
+                                    else max_cell_difference)
+        self._tree = BKTree()
+
+    def find_or_add(self, image_path: str, value: int, aspect: float) -> Optional[Tuple[str, int]]:
+        """The canonical diagram and distance if image_path duplicates one, otherwise index it"""
+        for distance, (canonical, canonical_aspect) in self._tree.search(value, self.max_distance):
+            if abs(aspect - canonical_aspect) > MAX_ASPECT_DELTA * max(aspect, canonical_aspect):
+                continue
+            if self._same_content(image_path, canonical):
+                return canonical, distance
+        self._tree.add(value, (image_path, aspect))
+        return None
+
+    def _same_content(self, image_path: str, canonical: str) -> bool:
+        try:
+            difference = max_cell_difference(canonical, image_path)
+        except Exception:
+            return False
+        return difference is not None and difference <= self.max_cell_difference
+
+
+def find_duplicates(image_paths: List[str], max_distance: Optional[int] = None,
+                    workers: Optional[int] = None) -> Tuple[List[str], Dict[str, Dict[str, Any]], int]:
+    """Split diagrams into those to analyze and near-duplicates of them
+
+    Returns the unique paths in input order, for each duplicate the
+    canonical path it matches and the Hamming distance between them, and
+    how many diagrams were hashed (vector and unreadable files are not).
+    """
+    raster = [path for path in image_paths if not path.lower().endswith(VECTOR_EXTENSIONS)]
+    if len(raster) < 2:
+        return list(image_paths), {}, 0
+
+    workers = min(workers or os.cpu_count() or 1, len(raster))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        hashes = dict(zip(raster, pool.map(_safe_phash, raster, chunksize=16)))
+
+    index = DuplicateIndex(max_distance)
+    unique = []
+    duplicates = {}
+    for path in image_paths:
+        hashed = hashes.get(path)
+        match = index.find_or_add(path, *hashed) if hashed is not None else None
+        if match is None:
+            unique.append(path)
+        else:
+            duplicates[path] = {"duplicate_of": match[0], "distance": match[1]}
+    hashed = sum(value is not None for value in hashes.values())
+    return unique, duplicates, hashed
@@ -0,0 +1,65 @@
+import glob
+import os
+from typing import List
+
+# File types accepted when scanning a directory; vector formats skip OCR
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp',
+                    '.svg', '.drawio', '.pdf')
+
+# Plain-text manifests list one diagram path per line
+MANIFEST_EXTENSIONS = ('.txt', '.lst', '.manifest')
+
+GLOB_CHARS = ('*', '?', '[')
+
+
+def is_batch_input(spec: str) -> bool:
+    """Return True if the CLI argument names more than a single diagram"""
+    if os.path.isdir(spec):
+        return True
+    if spec.lower().endswith(MANIFEST_EXTENSIONS):
+        return True
+    # An existing file is a diagram even if its name looks like a pattern
+    if os.path.isfile(spec):
+        return False
+    return any(char in spec for char in GLOB_CHARS)
+
+
+def resolve_inputs(spec: str) -> List[str]:
+    """Expand a directory, glob pattern or manifest file into diagram paths"""
+    if os.path.isdir(spec):
+        paths = [
+            os.path.join(spec, name) for name in os.listdir(spec)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+    elif spec.lower().endswith(MANIFEST_EXTENSIONS):
+        paths = _read_manifest(spec)
+    elif os.path.isfile(spec):
+        paths = [spec]
+    elif any(char in spec for char in GLOB_CHARS):
+        paths = [
+            path for path in glob.glob(spec, recursive=True)
+            if os.path.isfile(path)
+        ]
+    else:
+        paths = [spec]
+
+    if not paths:
+        raise ValueError(f"No diagrams found for: {spec}")
+
+    # Keep order stable and drop duplicates
+    return sorted(set(paths))
+
+
+def _read_manifest(manifest_path: str) -> List[str]:
+    """Read diagram paths from a manifest, relative to the manifest's folder"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    paths = []
+    with open(manifest_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not os.path.isabs(line):
+                line = os.path.join(base_dir, line)
+            paths.append(line)
+    return paths
@@ -0,0 +1,308 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List
+
+from src.analysis import event_loop
+from src.storage import build_record
+from .dedup import find_duplicates
+from src.utils.cache import hash_file
+from src.utils.config import Config
+from src.utils.metrics import metrics
+
+# Marks the end of the OCR stage output
+_SENTINEL = None
+
+
+def _ocr_task(image_path: str, profile: str, engine: str, use_cache: bool,
+              strategy: str, collect_metrics: bool) -> Dict[str, Any]:
+    """Run OCR for one diagram inside a worker process"""
+    from src.ocr.extractor import extract_components
+
+    # Worker processes keep their own metrics; each task's are sent back to the parent
+    metrics.enabled = collect_metrics
+    metrics.reset()
+
+    started = time.perf_counter()
+    components = extract_components(image_path, profile=profile, engine=engine, use_cache=use_cache,
+                                    strategy=strategy)
+    return {
+        "image_path": image_path,
+        "image_hash": hash_file(image_path),
+        "components": components,
+        "ocr_time": time.perf_counter() - started,
+        "metrics": metrics.report() if collect_metrics else None
+    }
+
+
+class _StageStats:
+    """Thread-safe throughput bookkeeping for one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.first_start = None
+        self.last_end = None
+        self._lock = threading.Lock()
+
+    def record(self, started: float, elapsed: float, error: bool = False):
+        with self._lock:
+            self.count += 1
+            self.errors += int(error)
+            self.busy_time += elapsed
+            if self.first_start is None or started < self.first_start:
+                self.first_start = started
+            ended = started + elapsed
+            if self.last_end is None or ended > self.last_end:
+                self.last_end = ended
+
+    def summary(self) -> Dict[str, Any]:
+        wall_time = 0.0
+        if self.first_start is not None:
+            wall_time = self.last_end - self.first_start
+        return {
+            "processed": self.count,
+            "errors": self.errors,
+            "busy_time": round(self.busy_time, 3),
+            "wall_time": round(wall_time, 3),
+            "throughput": round(self.count / wall_time, 3) if wall_time else 0.0
+        }
+
+
+class BatchPipeline:
+    """Runs OCR and LLM analysis as two concurrent, bounded stages"""
+
+    def __init__(self, provider_type=None, fallback_provider=None, hedge_delay=None, use_rules=None,
+                 ocr_profile=None, ocr_engine=None, ocr_strategy=None, use_cache=None,
+                 ocr_workers=None, llm_workers=None, queue_size=None, sink=None,
+                 dedup=None, dedup_distance=None):
+        self.provider_type = provider_type or Config.DEFAULT_PROVIDER
+        self.fallback_provider = fallback_provider
+        self.hedge_delay = hedge_delay
+        self.use_rules = use_rules
+        self.ocr_profile = ocr_profile or Config.OCR_PROFILE
+        self.ocr_engine = ocr_engine or Config.OCR_ENGINE
+        self.ocr_strategy = ocr_strategy or Config.OCR_STRATEGY
+        self.use_cache = Config.OCR_CACHE_ENABLED if use_cache is None else use_cache
+        self.ocr_workers = ocr_workers or Config.BATCH_OCR_WORKERS
+        self.llm_workers = llm_workers or Config.BATCH_LLM_WORKERS
+        self.queue_size = queue_size or Config.BATCH_QUEUE_SIZE
+        # Optional ResultStore or JsonlSink receiving each diagram's record as it finishes
+        self.sink = sink
+        # Near-duplicate raster diagrams reuse the result of the first one seen
+        self.dedup = Config.BATCH_DEDUP if dedup is None else dedup
+        self.dedup_distance = Config.DEDUP_MAX_DISTANCE if dedup_distance is None else dedup_distance
+
+    def run(self, image_paths: List[str]) -> Dict[str, Any]:
+        """Process all diagrams and return per-diagram results and stage stats"""
+        started = time.perf_counter()
+        ocr_stats = _StageStats('ocr')
+        llm_stats = _StageStats('llm')
+
+        duplicates = {}
+        analyzed_paths = image_paths
+        if self.dedup:
+            dedup_started = time.perf_counter()
+            analyzed_paths, duplicates, hashed = find_duplicates(image_paths, self.dedup_distance,
+                                                                 self.ocr_workers)
+            dedup_time = time.perf_counter() - dedup_started
+
+        # Bounded hand-off between the stages provides backpressure on OCR
+        extracted = queue.Queue(maxsize=self.queue_size)
+        results = []
+        results_lock = threading.Lock()
+
+        # LLM requests for extracted diagrams overlap on a single event loop
+        llm_thread = threading.Thread(
+            target=self._llm_stage,
+            args=(extracted, results, results_lock, llm_stats),
+            daemon=True
+        )
+        llm_thread.start()
+
+        self._ocr_stage(analyzed_paths, extracted, results, results_lock, ocr_stats)
+
+        llm_thread.join()
+
+        if duplicates:
+            self._reuse_results(duplicates, results, results_lock)
+
+        # Report in input order regardless of completion order
+        order = {path: index for index, path in enumerate(image_paths)}
+        results.sort(key=lambda item: order.get(item["image_path"], len(order)))
+
+        stages = {
+            "ocr": ocr_stats.summary(),
+            "llm": llm_stats.summary()
+        }
+        if self.dedup:
+            stages["dedup"] = {
+                "hashed": hashed,
+                "duplicates": len(duplicates),
+                "wall_time": round(dedup_time, 3)
+            }
+
+        return {
+            "results": results,
+            "stages": stages,
+            "deduplicated": [
+                {"image_path": path, **match} for path, match in duplicates.items()
+            ],
+            "workers": {
+                "ocr": self.ocr_workers,
+                "llm": self.llm_workers,
+                "queue_size": self.queue_size
+            },
+            "total_time": round(time.perf_counter() - started, 3)
+        }
+
+    def _ocr_stage(self, image_paths, extracted, results, results_lock, stats):
+        """Feed diagrams through a process pool, never more than the queue allows"""
+        max_in_flight = self.ocr_workers + self.queue_size
+        paths = iter(image_paths)
+        pending = {}
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.ocr_workers) as pool:
+                while True:
+                    while len(pending) < max_in_flight:
+                        path = next(paths, None)
+                        if path is None:
+                            break
+                        future = pool.submit(_ocr_task, path, self.ocr_profile,
+                                             self.ocr_engine, self.use_cache, self.ocr_strategy,
+                                             metrics.enabled)
+                        pending[future] = (path, time.perf_counter())
+
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, submitted = pending.pop(future)
+                        try:
+                            item = future.result()
+                        except Exception as e:
+                            stats.record(submitted, time.perf_counter() - submitted, error=True)
+                            self._finish_item(self._error_item(path, f"OCR failed: {e}"),
+                                              results, results_lock)
+                            continue
+
+                        ocr_error = item["components"].get("error")
+                        stats.record(time.perf_counter() - item["ocr_time"], item["ocr_time"],
+                                     error=ocr_error is not None)
+                        metrics.merge(item.pop("metrics"))
+                        if ocr_error is not None:
+                            # Without its text the LLM can only guess, so the diagram stops here
+                            item["error"] = f"OCR failed: {ocr_error}"
+                            item["results"] = None
+                            self._finish_item(item, results, results_lock)
+                            continue
+                        # Blocks while the LLM stage is behind
+                        extracted.put(item)
+        finally:
+            extracted.put(_SENTINEL)
+
+    def _llm_stage(self, extracted, results, results_lock, stats):
+        """Consume extracted components, overlapping provider calls on one event loop"""
+        event_loop.run(self._llm_stage_async(extracted, results, results_lock, stats))
+
+    async def _llm_stage_async(self, extracted, results, results_lock, stats):
+        from src.analysis.analyzer import SecurityAnalyzer
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.llm_workers)
+
+        analyzer = None
+        setup_error = None
+        try:
+            analyzer = SecurityAnalyzer(
+                provider_type=self.provider_type,
+                use_cache=self.use_cache,
+                fallback_provider=self.fallback_provider,
+                hedge_delay=self.hedge_delay,
+                use_rules=self.use_rules
+            )
+        except Exception as e:
+            setup_error = e
+
+        tasks = []
+        while True:
+            # Hold a slot before taking work so the queue keeps backpressure on OCR
+            await semaphore.acquire()
+            item = await loop.run_in_executor(None, extracted.get)
+            if item is _SENTINEL:
+                semaphore.release()
+                break
+
+            tasks.append(asyncio.ensure_future(
+                self._analyze_item(analyzer, setup_error, item, semaphore, results, results_lock, stats)
+            ))
+
+        await asyncio.gather(*tasks)
+
+    async def _analyze_item(self, analyzer, setup_error, item, semaphore, results, results_lock, stats):
+        """Analyze one extracted diagram and release its concurrency slot"""
+        started = time.perf_counter()
+        try:
+            if setup_error is not None:
+                raise setup_error
+            item["results"] = await analyzer.analyze_security_async(item["components"])
+            error = False
+        except Exception as e:
+            item["error"] = f"Analysis failed: {e}"
+            error = True
+        finally:
+            semaphore.release()
+
+        item["llm_time"] = time.perf_counter() - started
+        stats.record(started, item["llm_time"], error=error)
+
+        self._finish_item(item, results, results_lock)
+
+    def _reuse_results(self, duplicates, results, results_lock):
+        """Give each near-duplicate a copy of its canonical diagram's outcome"""
+        by_path = {item["image_path"]: item for item in results}
+        for path, match in duplicates.items():
+            canonical = by_path[match["duplicate_of"]]
+            self._finish_item({
+                "image_path": path,
+                "image_hash": hash_file(path),
+                "components": canonical.get("components"),
+                "results": canonical.get("results"),
+                "error": canonical.get("error"),
+                "ocr_time": 0.0,
+                "llm_time": 0.0,
+                "duplicate_of": match["duplicate_of"],
+                "distance": match["distance"]
+            }, results, results_lock)
+
+    def _finish_item(self, item, results, results_lock):
+        """Attach the diagram's record, hand it to the sink and collect it for the report"""
+        item["record"] = build_record(
+            item["image_path"], item.get("components"), item.get("results"),
+            provider=self.provider_type,
+            model=Config.PROVIDERS.get(self.provider_type, {}).get('model'),
+            image_hash=item.get("image_hash"),
+            ocr_time=item.get("ocr_time"),
+            llm_time=item.get("llm_time"),
+            error=item.get("error") or (item.get("components") or {}).get("error"),
+            duplicate_of=item.get("duplicate_of")
+        )
+        if self.sink is not None:
+            self.sink.add(item["record"])
+        with results_lock:
+            results.append(item)
+
+    def _error_item(self, image_path: str, message: str) -> Dict[str, Any]:
+        """Result entry for a diagram that never reached the LLM stage"""
+        return {
+            "image_path": image_path,
+            "components": None,
+            "results": None,
+            "error": message
+        }
@@ -0,0 +1,22 @@
+import importlib
+import os
+
+# Vector formats whose labels can be read directly instead of OCR'd
+_adapters = {
+    '.svg': ('.svg_adapter', 'extract_svg_labels'),
+    '.drawio': ('.drawio_adapter', 'extract_drawio_labels'),
+    '.pdf': ('.pdf_adapter', 'extract_pdf_labels')
+}
+
+VECTOR_EXTENSIONS = tuple(_adapters)
+
+def get_adapter(path):
+    """Return the label extractor for a vector diagram, or None for raster images"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _adapters:
+        return None
+
+    module_name, function_name = _adapters[extension]
+    return getattr(importlib.import_module(module_name, __name__), function_name)
+
+__all__ = ['VECTOR_EXTENSIONS', 'get_adapter']
@@ -0,0 +1,49 @@
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+_SPACE_PATTERN = re.compile(r'\s+')
+
+# Elements that end a line of rich text; a label is flattened to one line
+_BREAK_TAGS = {'br', 'div', 'p', 'li', 'tr'}
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the text of an HTML fragment, with entities decoded after the tags are parsed"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _BREAK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in _BREAK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+
+def clean_label(value: str) -> str:
+    """Single-line label text with whitespace collapsed; markup-like text is kept as is"""
+    return _SPACE_PATTERN.sub(' ', value).strip()
+
+
+def html_label(value: str) -> str:
+    """Plain single-line text from a label stored as HTML, such as a draw.io cell with html=1"""
+    parser = _TextExtractor()
+    parser.feed(value)
+    parser.close()
+    return clean_label(''.join(parser.parts))
+
+
+def make_label(text: str, bbox: Optional[List[float]], path: List[str]) -> Dict[str, Any]:
+    """Standard label record shared by all adapters; bbox is [x, y, width, height]"""
+    return {
+        "text": text,
+        "bbox": [round(value, 1) for value in bbox] if bbox else None,
+        "path": list(path)
+    }
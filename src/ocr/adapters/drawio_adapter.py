@@ -0,0 +1,97 @@
+import base64
+import urllib.parse
+import xml.etree.ElementTree as ET
+import zlib
+from .base import clean_label, html_label, make_label
+
+
+def _decode_diagram(diagram):
+    """Return the mxGraphModel of a <diagram>, inflating compressed pages"""
+    model = diagram.find('mxGraphModel')
+    if model is not None:
+        return model
+
+    payload = (diagram.text or '').strip()
+    if not payload:
+        return None
+
+    # Compressed pages are base64(raw deflate(url-encoded XML))
+    inflated = zlib.decompress(base64.b64decode(payload), -15).decode('utf-8')
+    return ET.fromstring(urllib.parse.unquote(inflated))
+
+
+def _cells(model):
+    """Yield (cell attributes, label, geometry) for every mxCell in a model"""
+    root = model.find('root')
+    if root is None:
+        return
+
+    for element in root:
+        if element.tag == 'mxCell':
+            cell, label = element, element.get('value', '')
+            attributes = dict(element.attrib)
+        else:
+            # UserObject/object wrap an mxCell and carry the label themselves
+            cell = element.find('mxCell')
+            if cell is None:
+                continue
+            label = element.get('label', '')
+            attributes = dict(cell.attrib, id=element.get('id', cell.get('id')))
+        # Only html=1 labels are markup; in the others "<" and "&" are literal text
+        if 'html=1' in attributes.get('style', '').split(';'):
+            label = html_label(label)
+        else:
+            label = clean_label(label)
+        yield attributes, label, cell.find('mxGeometry')
+
+
+def extract_drawio_labels(path):
+    """Read cell labels with absolute positions and container nesting from a .drawio file"""
+    root = ET.parse(path).getroot()
+    diagrams = [root] if root.tag == 'mxGraphModel' else root.findall('diagram')
+
+    labels = []
+    for page_index, diagram in enumerate(diagrams):
+        model = diagram if diagram.tag == 'mxGraphModel' else _decode_diagram(diagram)
+        if model is None:
+            continue
+        page = diagram.get('name') or f"Page-{page_index + 1}"
+
+        cells = {}
+        for attributes, label, geometry in _cells(model):
+            box = None
+            if geometry is not None and geometry.get('relative') != '1':
+                box = [float(geometry.get(name, 0)) for name in ('x', 'y', 'width', 'height')]
+            cells[attributes.get('id')] = {
+                "parent": attributes.get('parent'),
+                "label": label,
+                "box": box,
+                "vertex": attributes.get('vertex') == '1'
+            }
+
+        def ancestry(cell_id):
+            """Absolute offset and labeled containers above a cell"""
+            offset_x = offset_y = 0.0
+            path = []
+            parent_id = cells[cell_id]["parent"]
+            while parent_id in cells:
+                parent = cells[parent_id]
+                if parent["vertex"] and parent["box"]:
+                    offset_x += parent["box"][0]
+                    offset_y += parent["box"][1]
+                if parent["label"]:
+                    path.insert(0, parent["label"])
+                parent_id = parent["parent"]
+            return offset_x, offset_y, [page] + path
+
+        for cell_id, cell in cells.items():
+            if not cell["label"]:
+                continue
+            offset_x, offset_y, path = ancestry(cell_id)
+            bbox = None
+            if cell["box"]:
+                x, y, width, height = cell["box"]
+                bbox = [x + offset_x, y + offset_y, width, height]
+            labels.append(make_label(cell["label"], bbox, path))
+
+    return labels
@@ -0,0 +1,29 @@
+from .base import clean_label, make_label
+
+
+def extract_pdf_labels(path):
+    """Read text lines with positions from a text-bearing PDF via PyMuPDF"""
+    try:
+        import fitz
+    except ImportError:
+        raise ImportError("Reading PDF diagrams requires PyMuPDF: pip install pymupdf")
+
+    labels = []
+    with fitz.open(path) as document:
+        for page_index, page in enumerate(document):
+            page_name = f"Page-{page_index + 1}"
+            for block_index, block in enumerate(page.get_text("dict")["blocks"]):
+                # Image blocks (type 1) have no text layer
+                if block.get("type") != 0:
+                    continue
+                for line in block["lines"]:
+                    text = clean_label(" ".join(span["text"] for span in line["spans"]))
+                    if not text:
+                        continue
+                    x0, y0, x1, y1 = line["bbox"]
+                    labels.append(make_label(text, [x0, y0, x1 - x0, y1 - y0],
+                                             [page_name, f"block-{block_index + 1}"]))
+
+    if not labels:
+        raise ValueError(f"{path} has no text layer; export the diagram as PNG or SVG instead")
+    return labels
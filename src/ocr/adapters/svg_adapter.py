@@ -0,0 +1,131 @@
+import re
+import xml.etree.ElementTree as ET
+from .base import clean_label, make_label
+
+_NUMBER_PATTERN = re.compile(r'[-+]?(?:\d*\.\d+|\d+)(?:[eE][-+]?\d+)?')
+_TRANSFORM_PATTERN = re.compile(r'(matrix|translate|scale)\s*\(([^)]*)\)')
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+DEFAULT_FONT_SIZE = 12.0
+
+
+def _local(tag):
+    """Tag or attribute name without its XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _numbers(value):
+    return [float(number) for number in _NUMBER_PATTERN.findall(value or '')]
+
+
+def _multiply(m, n):
+    """Compose two affine matrices given as (a, b, c, d, e, f)"""
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a * a2 + c * b2, b * a2 + d * b2,
+            a * c2 + c * d2, b * c2 + d * d2,
+            a * e2 + c * f2 + e, b * e2 + d * f2 + f)
+
+
+def _parse_transform(value):
+    """Affine part of an SVG transform; rotations and skews are ignored"""
+    matrix = IDENTITY
+    for name, args in _TRANSFORM_PATTERN.findall(value or ''):
+        numbers = _numbers(args)
+        if name == 'matrix' and len(numbers) == 6:
+            step = tuple(numbers)
+        elif name == 'translate' and numbers:
+            step = (1.0, 0.0, 0.0, 1.0, numbers[0], numbers[1] if len(numbers) > 1 else 0.0)
+        elif name == 'scale' and numbers:
+            step = (numbers[0], 0.0, 0.0, numbers[1] if len(numbers) > 1 else numbers[0], 0.0, 0.0)
+        else:
+            continue
+        matrix = _multiply(matrix, step)
+    return matrix
+
+
+def _apply(matrix, x, y):
+    a, b, c, d, e, f = matrix
+    return a * x + c * y + e, b * x + d * y + f
+
+
+def _group_name(element):
+    """Human-readable name of a group: its <title>, Inkscape label or id"""
+    for child in element:
+        if _local(child.tag) == 'title' and (child.text or '').strip():
+            return child.text.strip()
+    for name, value in element.attrib.items():
+        if _local(name) == 'label' and value.strip():
+            return value.strip()
+    return element.get('id')
+
+
+def _first_coordinate(element, attribute):
+    """x/y may be a list of per-glyph positions; also fall back to the first tspan"""
+    values = _numbers(element.get(attribute))
+    if values:
+        return values[0]
+    for child in element:
+        if _local(child.tag) == 'tspan':
+            values = _numbers(child.get(attribute))
+            if values:
+                return values[0]
+    return 0.0
+
+
+def extract_svg_labels(path):
+    """Read text labels, their positions and group nesting from an SVG file"""
+    root = ET.parse(path).getroot()
+    labels = []
+    seen = set()
+
+    def visit(element, matrix, groups):
+        tag = _local(element.tag)
+        matrix = _multiply(matrix, _parse_transform(element.get('transform')))
+
+        if tag == 'text':
+            text = clean_label(' '.join(element.itertext()))
+            if text:
+                font_size = (_numbers(element.get('font-size')) or [DEFAULT_FONT_SIZE])[0]
+                x, y = _apply(matrix, _first_coordinate(element, 'x'), _first_coordinate(element, 'y'))
+                # Text is anchored at its baseline; approximate the box from the font size
+                bbox = [x, y - font_size, len(text) * font_size * 0.6, font_size * 1.2]
+                add(text, bbox, groups)
+            return
+
+        if tag == 'foreignObject':
+            # draw.io and similar tools render HTML labels inside foreignObject
+            text = clean_label(' '.join(element.itertext()))
+            if text:
+                x, y = _apply(matrix, (_numbers(element.get('x')) or [0.0])[0],
+                              (_numbers(element.get('y')) or [0.0])[0])
+                width = (_numbers(element.get('width')) or [0.0])[0] * matrix[0]
+                height = (_numbers(element.get('height')) or [0.0])[0] * matrix[3]
+                add(text, [x, y, width, height], groups)
+            return
+
+        if tag in ('title', 'desc', 'metadata', 'style', 'script', 'defs'):
+            return
+
+        if tag == 'g':
+            name = _group_name(element)
+            if name:
+                groups = groups + [name]
+
+        children = [child for child in element if _local(child.tag) not in ('title', 'desc')]
+        if tag == 'switch':
+            # Only the first alternative of a <switch> is rendered, e.g. an HTML
+            # label in foreignObject with a plain <text> fallback after it
+            children = children[:1]
+
+        for child in children:
+            visit(child, matrix, groups)
+
+    def add(text, bbox, groups):
+        key = (text, round(bbox[0]), round(bbox[1]))
+        if key not in seen:
+            seen.add(key)
+            labels.append(make_label(text, bbox, groups))
+
+    visit(root, IDENTITY, [])
+    return labels
@@ -0,0 +1,18 @@
+import threading
+from src.utils.cache import DiskCache, hash_key
+from src.utils.config import Config
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_ocr_cache() -> DiskCache:
+    """Return the process-wide OCR result cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(Config.OCR_CACHE_DIR, Config.OCR_CACHE_MAX_MB * 1024 * 1024)
+        return _cache
+
+def ocr_cache_key(image_bytes: bytes, params) -> str:
+    """Content address for an image under a given set of preprocessing parameters"""
+    return hash_key(image_bytes, params)
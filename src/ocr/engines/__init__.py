@@ -0,0 +1,30 @@
+import importlib
+import threading
+from src.utils.config import Config
+from .base import OCREngine
+
+# Engine modules are imported on first use so only the selected backend loads
+_engines = {
+    'pytesseract': ('.pytesseract_engine', 'PytesseractEngine'),
+    'tesserocr': ('.tesserocr_engine', 'TesserocrEngine')
+}
+
+# Engines are process-wide singletons so persistent handles survive across diagrams
+_instances = {}
+_instances_lock = threading.Lock()
+
+def get_engine(engine_type=None) -> OCREngine:
+    """Return the shared instance of the specified engine or the configured default"""
+    engine_type = engine_type or Config.OCR_ENGINE
+
+    if engine_type not in _engines:
+        raise ValueError(f"Unsupported OCR engine: {engine_type}")
+
+    with _instances_lock:
+        if engine_type not in _instances:
+            module_name, class_name = _engines[engine_type]
+            engine_class = getattr(importlib.import_module(module_name, __name__), class_name)
+            _instances[engine_type] = engine_class()
+        return _instances[engine_type]
+
+__all__ = ['OCREngine', 'get_engine']
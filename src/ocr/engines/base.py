@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+
+class OCREngine(ABC):
+    """Base class for OCR backends with a standardized pass result"""
+
+    @abstractmethod
+    def recognize(self, binary, psm: int) -> Dict[str, Any]:
+        """Engine-specific method to OCR one binarized image with a PSM mode"""
+        pass
+
+    @abstractmethod
+    def version(self) -> str:
+        """Version string of the underlying Tesseract build"""
+        pass
+
+    def _build_result(self, lines: List[str], confidences: List[float],
+                      boxes: Optional[List[List[int]]] = None) -> Dict[str, Any]:
+        """Standard pass result shared by all engines; boxes are [x, y, width, height] per line"""
+        if boxes is None:
+            boxes = [None] * len(lines)
+        kept = [(line.strip(), box) for line, box in zip(lines, boxes) if line.strip()]
+        return {
+            "lines": [line for line, _ in kept],
+            "boxes": [box for _, box in kept],
+            "confidence": sum(confidences) / len(confidences) if confidences else 0.0
+        }
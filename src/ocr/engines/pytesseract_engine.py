@@ -0,0 +1,52 @@
+import pytesseract
+from .base import OCREngine
+
+
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract binary once per pass through pytesseract"""
+
+    def __init__(self):
+        self._version = None
+
+    def recognize(self, binary, psm: int):
+        """OCR via image_to_data, grouping words back into lines"""
+        data = pytesseract.image_to_data(
+            binary,
+            config=f'--oem 3 --psm {psm}',
+            output_type=pytesseract.Output.DICT
+        )
+
+        # Group words back into lines the same way image_to_string does
+        lines = {}
+        boxes = {}
+        confidences = []
+        for i, word in enumerate(data['text']):
+            word = word.strip()
+            conf = float(data['conf'][i])
+            if not word or conf < 0:
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(word)
+            confidences.append(conf)
+
+            # Line box is the union of its word boxes
+            left, top = data['left'][i], data['top'][i]
+            right, bottom = left + data['width'][i], top + data['height'][i]
+            if key in boxes:
+                x0, y0, x1, y1 = boxes[key]
+                boxes[key] = (min(x0, left), min(y0, top), max(x1, right), max(y1, bottom))
+            else:
+                boxes[key] = (left, top, right, bottom)
+
+        keys = sorted(lines)
+        return self._build_result(
+            [" ".join(lines[key]) for key in keys],
+            confidences,
+            [[x0, y0, x1 - x0, y1 - y0] for x0, y0, x1, y1 in (boxes[key] for key in keys)]
+        )
+
+    def version(self):
+        # Asking the binary spawns a process, so only do it once
+        if self._version is None:
+            self._version = str(pytesseract.get_tesseract_version())
+        return self._version
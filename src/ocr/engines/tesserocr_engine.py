@@ -0,0 +1,65 @@
+import queue
+import numpy as np
+from .base import OCREngine
+
+
+class TesserocrEngine(OCREngine):
+    """Keeps Tesseract API handles alive in-process and feeds them raw pixel buffers"""
+
+    def __init__(self, lang='eng'):
+        try:
+            import tesserocr
+        except ImportError:
+            raise ImportError("The tesserocr engine requires the tesserocr package: pip install tesserocr")
+
+        self._tesserocr = tesserocr
+        self.lang = lang
+
+        # TessBaseAPI is not thread-safe, so each concurrent pass checks out
+        # its own handle; handles are reused across passes and diagrams
+        self._handles = queue.LifoQueue()
+
+    def recognize(self, binary, psm: int):
+        """OCR a binarized numpy array without spawning a process or encoding an image"""
+        binary = binary.astype(np.uint8, copy=False)
+        height, width = binary.shape[:2]
+        # SetImageBytes only accepts bytes, so one copy is unavoidable; tobytes
+        # makes it in row order whatever the array's layout, so it is the only one
+        pixels = binary.tobytes()
+
+        api = self._acquire()
+        try:
+            api.SetPageSegMode(psm)
+            # Raw 8-bit pixels go straight to Tesseract; no PNG round-trip
+            api.SetImageBytes(pixels, width, height, 1, width)
+            api.Recognize()
+
+            lines = []
+            boxes = []
+            level = self._tesserocr.RIL.TEXTLINE
+            for line in self._tesserocr.iterate_level(api.GetIterator(), level):
+                text = line.GetUTF8Text(level)
+                box = line.BoundingBox(level)
+                if text is None or box is None:
+                    continue
+                x0, y0, x1, y1 = box
+                lines.append(text)
+                boxes.append([x0, y0, x1 - x0, y1 - y0])
+
+            confidences = [float(conf) for conf in api.AllWordConfidences()]
+        finally:
+            # A failed pass must not leave its image and results on a reused handle
+            api.Clear()
+            self._handles.put(api)
+
+        return self._build_result(lines, confidences, boxes)
+
+    def version(self):
+        return self._tesserocr.tesseract_version().split('\n')[0]
+
+    def _acquire(self):
+        """Reuse an idle API handle, creating one only when all are busy"""
+        try:
+            return self._handles.get_nowait()
+        except queue.Empty:
+            return self._tesserocr.PyTessBaseAPI(lang=self.lang, oem=self._tesserocr.OEM.DEFAULT)
@@ -1,97 +1,155 @@
-import pytesseract
 from PIL import Image
 import cv2
 import numpy as np
+import sys
+from src.utils.config import Config
+from src.utils.metrics import metrics
+from .adapters import get_adapter
+from .cache import get_ocr_cache, ocr_cache_key
+from .engines import get_engine
+from .preprocessing import LOWER_BLACK, PSM_MODES, SCALE_FACTOR, UPPER_BLACK, preprocess
+from .scheduler import PassScheduler
+from .taxonomy import get_taxonomy
+from .regions import RegionOCR
+from .tiling import TiledOCR
 
-def extract_components(image_path):
+OCR_STRATEGIES = ('auto', 'full', 'regions', 'tiled')
+
+def _cache_params(profile, ocr_engine, strategy):
+    """Everything besides the image bytes that can change the OCR output"""
+    return {
+        "scale_factor": SCALE_FACTOR,
+        "lower_black": LOWER_BLACK.tolist(),
+        "upper_black": UPPER_BLACK.tolist(),
+        "psm_modes": PSM_MODES,
+        "profile": profile,
+        "profile_settings": Config.OCR_PROFILES[profile],
+        "engine": ocr_engine.__class__.__name__,
+        "tesseract_version": ocr_engine.version(),
+        "taxonomy": get_taxonomy().fingerprint,
+        "strategy": strategy,
+        "tiling": {
+            "threshold_px": Config.OCR_TILE_THRESHOLD_PX,
+            "overlap": Config.OCR_TILE_OVERLAP,
+            "workers": Config.OCR_TILE_WORKERS,
+            "max_memory_mb": Config.OCR_MAX_MEMORY_MB
+        } if strategy != 'full' else None
+    }
+
+def _resolve_strategy(strategy, image):
+    """Pick tiles for very large images and whole-image OCR for the rest under 'auto'
+
+    Region OCR is opt-in: it splits large titles into fragments and misses
+    light text on dark boxes (see benchmarks.recall), so it is not the default.
+    """
+    if strategy != 'auto':
+        return strategy
+    if image.shape[0] * image.shape[1] > Config.OCR_TILE_THRESHOLD_PX:
+        return 'tiled'
+    return 'full'
+
+def build_components(lines):
+    """Deduplicate text lines and bucket them into component categories"""
+    # Remove duplicates and empty lines
+    unique_results = list(set(line for line in lines if line))
+    
+    # Categorize detected components against the configured taxonomy
+    with metrics.timer("ocr.categorize"):
+        components = {
+            "text": "\n".join(unique_results),
+            "detected_items": get_taxonomy().categorize(unique_results)
+        }
+    metrics.observe("ocr.lines", len(unique_results))
+    
+    if Config.DEBUG:
+        print("\nDebug - Raw OCR Text:", file=sys.stderr)
+        print("\n".join(unique_results), file=sys.stderr)
+        
+        print("\nDebug - Detected Components:", file=sys.stderr)
+        for category, items in components["detected_items"].items():
+            if items:
+                print(f"{category}: {items}", file=sys.stderr)
+    
+    return components
+
+def extract_components(image_path, profile=None, engine=None, use_cache=None, strategy=None):
     """Extract components from architecture diagram using OCR."""
+    with metrics.timer("ocr.extract"):
+        return _extract_components(image_path, profile, engine, use_cache, strategy)
+
+def _extract_components(image_path, profile, engine, use_cache, strategy):
     try:
-        # Read image
-        image = cv2.imread(image_path)
-        height, width = image.shape[:2]
-        
-        # Enlarge image
-        scale_factor = 2
-        image = cv2.resize(image, (width * scale_factor, height * scale_factor))
-        
-        # Convert to HSV to handle colored text better
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        # Vector sources carry their labels as text, so OCR is skipped entirely
+        adapter = get_adapter(image_path)
+        if adapter is not None:
+            labels = adapter(image_path)
+            components = build_components([label["text"] for label in labels])
+            components["labels"] = labels
+            components["source"] = "vector"
+            return components
         
-        # Create masks for different colored text
-        # Dark text
-        lower_black = np.array([0, 0, 0])
-        upper_black = np.array([180, 255, 100])
-        mask_black = cv2.inRange(hsv, lower_black, upper_black)
+        profile = profile or Config.OCR_PROFILE
+        strategy = strategy or Config.OCR_STRATEGY
+        if strategy not in OCR_STRATEGIES:
+            raise ValueError(f"Unsupported OCR strategy: {strategy}")
+        ocr_engine = get_engine(engine)
+        if use_cache is None:
+            use_cache = Config.OCR_CACHE_ENABLED
         
-        # Process each color channel separately
-        results = []
-        
-        # Process original and black mask
-        for mask in [None, mask_black]:
-            if mask is not None:
-                processed = cv2.bitwise_and(image, image, mask=mask)
-            else:
-                processed = image.copy()
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(processed, cv2.COLOR_BGR2GRAY)
-            
-            # Threshold
-            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            # OCR with different PSM modes
-            for psm in [3, 6, 11]:  # Try different page segmentation modes
-                config = f'--oem 3 --psm {psm}'
-                text = pytesseract.image_to_string(binary, config=config)
-                results.extend([line.strip() for line in text.split('\n') if line.strip()])
-        
-        # Remove duplicates and empty lines
-        unique_results = list(set(results))
+        # Read image
+        with metrics.timer("ocr.image_read"):
+            with open(image_path, 'rb') as f:
+                image_bytes = f.read()
+        metrics.observe("ocr.image_bytes", len(image_bytes))
         
-        # Categorize detected components
-        components = {
-            "text": "\n".join(unique_results),
-            "detected_items": {
-                "client": [],
-                "server": [],
-                "data": [],
-                "network": [],
-                "interfaces": [],
-                "security": []
-            }
-        }
+        # Identical bytes and parameters always give identical components
+        if use_cache:
+            cache_key = ocr_cache_key(image_bytes, _cache_params(profile, ocr_engine, strategy))
+            cached = get_ocr_cache().get(cache_key)
+            if cached is not None:
+                metrics.incr("ocr.cache_hit")
+                if Config.DEBUG:
+                    print(f"Debug - OCR cache hit for {image_path}", file=sys.stderr)
+                return cached
+            metrics.incr("ocr.cache_miss")
         
-        # Keywords to look for
-        keywords = {
-            "client": ["client", "web interface"],
-            "server": ["server", "kernel", "system manager"],
-            "data": ["sql", "database", "firebird", "data"],
-            "network": ["internet", "intranet"],
-            "interfaces": ["interface", "api", "access interface"],
-            "security": ["firewall", "security", "rule"]
-        }
+        with metrics.timer("ocr.image_decode"):
+            image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
         
-        # Categorize each detected text
-        for text in unique_results:
-            text_lower = text.lower()
-            for category, terms in keywords.items():
-                if any(term in text_lower for term in terms):
-                    components["detected_items"][category].append(text)
+        strategy = _resolve_strategy(strategy, image)
+        metrics.incr(f"ocr.strategy.{strategy}")
+        labels = None
+        if strategy == 'tiled':
+            # Large diagrams are never upscaled whole; tiles keep memory bounded
+            labels = TiledOCR(profile=profile, engine=ocr_engine).run(image)
+        elif strategy == 'regions':
+            # Only label-like regions are upscaled and OCR'd
+            labels = RegionOCR(profile=profile, engine=ocr_engine).run(image)
+            if not labels:
+                if Config.DEBUG:
+                    print("Debug - No text regions found, falling back to full-image OCR", file=sys.stderr)
+                labels = None
         
-        print("\nDebug - Raw OCR Text:")
-        print("\n".join(unique_results))
+        if labels is not None:
+            components = build_components([label["text"] for label in labels])
+            components["labels"] = labels
+        else:
+            with metrics.timer("ocr.preprocess"):
+                binaries = preprocess(image)
+            
+            # OCR passes run concurrently and may stop early depending on profile
+            results = PassScheduler(profile=profile, engine=ocr_engine).run(binaries, PSM_MODES)
+            components = build_components(results)
         
-        print("\nDebug - Detected Components:")
-        for category, items in components["detected_items"].items():
-            if items:
-                print(f"{category}: {items}")
+        if use_cache:
+            get_ocr_cache().set(cache_key, components)
         
         return components
         
     except Exception as e:
-        print(f"Error in OCR processing: {e}")
+        print(f"Error in OCR processing: {e}", file=sys.stderr)
         return {
             "text": "",
             "detected_items": {},
             "error": str(e)
-        }
\ No newline at end of file
+        }
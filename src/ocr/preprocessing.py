@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+# Preprocessing parameters
+SCALE_FACTOR = 2
+LOWER_BLACK = np.array([0, 0, 0])
+UPPER_BLACK = np.array([180, 255, 100])
+PSM_MODES = [3, 6, 11]  # Try different page segmentation modes
+
+# Working memory per upscaled pixel: scaled + HSV + masked (3 channels each),
+# black mask, grayscale and two binaries (1 channel each)
+BYTES_PER_SCALED_PIXEL = 12
+
+def _buffer(buffers, name, shape):
+    """Reuse a named scratch array when its shape matches, otherwise allocate it"""
+    array = buffers.get(name)
+    if array is None or array.shape != shape:
+        array = np.empty(shape, dtype=np.uint8)
+        buffers[name] = array
+    return array
+
+def preprocess(image, buffers=None):
+    """Build the binarized images each OCR pass runs on, keyed by mask name
+
+    Passing the same `buffers` dict for equally sized images reuses the
+    scratch arrays; the returned binaries are views into those buffers.
+    """
+    if buffers is None:
+        buffers = {}
+    height, width = image.shape[:2]
+    scaled_height, scaled_width = height * SCALE_FACTOR, width * SCALE_FACTOR
+    
+    # Enlarge image
+    image = cv2.resize(image, (scaled_width, scaled_height),
+                       dst=_buffer(buffers, 'scaled', (scaled_height, scaled_width, 3)))
+    
+    # Convert to HSV to handle colored text better
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV,
+                       dst=_buffer(buffers, 'hsv', (scaled_height, scaled_width, 3)))
+    
+    # Create masks for different colored text
+    # Dark text
+    mask_black = cv2.inRange(hsv, LOWER_BLACK, UPPER_BLACK,
+                             dst=_buffer(buffers, 'mask', (scaled_height, scaled_width)))
+    
+    binaries = {}
+    
+    # Process original and black mask
+    for name, mask in [("original", None), ("black", mask_black)]:
+        if mask is not None:
+            # Masked-out pixels keep the destination's old value, so clear it first
+            processed = _buffer(buffers, 'masked', (scaled_height, scaled_width, 3))
+            processed.fill(0)
+            cv2.bitwise_and(image, image, dst=processed, mask=mask)
+        else:
+            processed = image
+        
+        # Convert to grayscale
+        gray = cv2.cvtColor(processed, cv2.COLOR_BGR2GRAY,
+                            dst=_buffer(buffers, 'gray', (scaled_height, scaled_width)))
+        
+        # Threshold
+        _, binaries[name] = cv2.threshold(
+            gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+            dst=_buffer(buffers, f'binary_{name}', (scaled_height, scaled_width))
+        )
+    
+    return binaries
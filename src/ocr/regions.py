@@ -0,0 +1,157 @@
+import bisect
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.utils.config import Config
+from src.utils.metrics import metrics
+from .engines import OCREngine, get_engine
+from .preprocessing import SCALE_FACTOR, preprocess
+from .scheduler import PassScheduler
+
+# Label candidates, in source pixels
+MIN_TEXT_HEIGHT = 6
+MAX_TEXT_HEIGHT = 120
+MIN_TEXT_WIDTH = 4
+MIN_FILL_RATIO = 0.2
+REGION_PADDING = 4
+# Box borders and arrows are at least this long and get removed before grouping
+LINE_LENGTH = 40
+# Joins characters into words and words into a line, but not lines into paragraphs
+CHAR_GAP_KERNEL = (9, 3)
+
+# Crops are stacked into montages so Tesseract runs once per montage, not per label
+MONTAGE_GAP = 16
+MONTAGE_MAX_HEIGHT = 4096
+# Each montage band holds roughly one line of text
+REGION_PSM_MODES = [6]
+
+
+def detect_text_regions(image: Any) -> List[List[int]]:
+    """[x, y, width, height] boxes of likely text lines, found without OCR"""
+    height, width = image.shape[:2]
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    # Strip long horizontal and vertical strokes so boxes do not swallow their labels
+    horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN,
+                                  cv2.getStructuringElement(cv2.MORPH_RECT, (LINE_LENGTH, 1)))
+    vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN,
+                                cv2.getStructuringElement(cv2.MORPH_RECT, (1, LINE_LENGTH)))
+    text = cv2.subtract(binary, cv2.bitwise_or(horizontal, vertical))
+
+    grouped = cv2.morphologyEx(text, cv2.MORPH_CLOSE,
+                               cv2.getStructuringElement(cv2.MORPH_RECT, CHAR_GAP_KERNEL))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(grouped, connectivity=8)
+
+    regions = []
+    for x, y, w, h, area in stats[1:count]:
+        if not MIN_TEXT_HEIGHT <= h <= MAX_TEXT_HEIGHT or w < MIN_TEXT_WIDTH:
+            continue
+        if area / (w * h) < MIN_FILL_RATIO:
+            continue
+        x0, y0 = max(0, x - REGION_PADDING), max(0, y - REGION_PADDING)
+        x1, y1 = min(width, x + w + REGION_PADDING), min(height, y + h + REGION_PADDING)
+        regions.append([int(x0), int(y0), int(x1 - x0), int(y1 - y0)])
+
+    # Reading order
+    return sorted(regions, key=lambda box: (box[1], box[0]))
+
+
+class RegionOCR:
+    """OCR only the label regions of a diagram, batched into montages"""
+
+    def __init__(self, profile: Optional[str] = None, engine: Optional[OCREngine] = None,
+                 workers: Optional[int] = None):
+        self.profile = profile or Config.OCR_PROFILE
+        self.engine = engine or get_engine()
+        self.workers = workers or Config.OCR_WORKERS
+
+    def run(self, image: Any, regions: Optional[List[List[int]]] = None) -> List[Dict[str, Any]]:
+        """OCR every region, returning labels with their bbox in source pixels"""
+        if regions is None:
+            with metrics.timer("ocr.region_detect"):
+                regions = detect_text_regions(image)
+        metrics.observe("ocr.regions", len(regions))
+        if not regions:
+            return []
+
+        batches = self._batches(regions)
+        if Config.DEBUG:
+            print(f"Debug - Region OCR: {len(regions)} regions in {len(batches)} montages", file=sys.stderr)
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+            per_batch = pool.map(lambda batch: self._ocr_batch(image, regions, batch), batches)
+            return [label for labels in per_batch for label in labels]
+
+    def _batches(self, regions: List[List[int]]) -> List[List[int]]:
+        """Group region indices so each montage stays under MONTAGE_MAX_HEIGHT"""
+        batches, current, used = [], [], 0
+        for index, (_, _, _, height) in enumerate(regions):
+            band = height * SCALE_FACTOR + MONTAGE_GAP
+            if current and used + band > MONTAGE_MAX_HEIGHT:
+                batches.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += band
+        if current:
+            batches.append(current)
+        return batches
+
+    def _ocr_batch(self, image: Any, regions: List[List[int]], batch: List[int]) -> List[Dict[str, Any]]:
+        """Stack the upscaled crops, OCR the stack once, then split lines back to regions"""
+        with metrics.timer("ocr.preprocess"):
+            crops = []
+            for index in batch:
+                x, y, width, height = regions[index]
+                crops.append(preprocess(np.ascontiguousarray(image[y:y + height, x:x + width])))
+
+            montages, bands = self._montage(crops)
+        pairs = PassScheduler(profile=self.profile, workers=1, engine=self.engine).run_with_boxes(
+            montages, REGION_PSM_MODES)
+
+        starts = [start for start, _ in bands]
+        labels = []
+        seen = set()
+        for line, box in pairs:
+            if box is None:
+                continue
+            # The band a line's vertical centre falls in is the region it came from
+            position = bisect.bisect_right(starts, box[1] + box[3] // 2) - 1
+            if position < 0:
+                continue
+            region = regions[batch[position]]
+            key = (position, line.lower())
+            if key in seen:
+                continue
+            seen.add(key)
+            labels.append({"text": line, "bbox": list(region)})
+        return labels
+
+    def _montage(self, crops: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Tuple[int, int]]]:
+        """One tall image per mask, with each crop in its own band"""
+        width = max(binary.shape[1] for crop in crops for binary in crop.values()) + 2 * MONTAGE_GAP
+        height = sum(crop["original"].shape[0] + MONTAGE_GAP for crop in crops) + MONTAGE_GAP
+
+        montages = {}
+        bands = []
+        for mask in crops[0]:
+            montage = np.empty((height, width), dtype=np.uint8)
+            y = MONTAGE_GAP
+            bands = []
+            for crop in crops:
+                binary = crop[mask]
+                crop_height, crop_width = binary.shape
+                # Pad with the crop's own background so band edges add no strokes
+                background = 255 if binary.mean() > 127 else 0
+                montage[y - MONTAGE_GAP:y + crop_height].fill(background)
+                montage[y:y + crop_height, MONTAGE_GAP:MONTAGE_GAP + crop_width] = binary
+                # A band includes the gap above it, so every row belongs to one crop
+                bands.append((y - MONTAGE_GAP, y + crop_height))
+                y += crop_height + MONTAGE_GAP
+            montage[y - MONTAGE_GAP:].fill(255)
+            montages[mask] = montage
+        return montages, bands
@@ -0,0 +1,132 @@
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.config import Config
+from src.utils.metrics import metrics
+from .engines import OCREngine, get_engine
+
+
+class PassScheduler:
+    """Runs OCR passes concurrently and stops once further passes add little"""
+
+    def __init__(self, profile: Optional[str] = None, workers: Optional[int] = None,
+                 engine: Optional[OCREngine] = None):
+        profile = profile or Config.OCR_PROFILE
+        if profile not in Config.OCR_PROFILES:
+            raise ValueError(f"Unsupported OCR profile: {profile}")
+
+        settings = Config.OCR_PROFILES[profile]
+        self.profile = profile
+        self.workers = workers or Config.OCR_WORKERS
+        self.engine = engine or get_engine()
+        self.pass_order = settings['pass_order']
+        self.min_passes = settings['min_passes']
+        self.target_confidence = settings['target_confidence']
+        self.min_new_lines = settings['min_new_lines']
+        self.max_passes = settings['max_passes']
+
+        # Profiles that can stop early only keep about min_passes running, so
+        # that a stop decision comes before the remaining passes have started
+        if self.target_confidence is None and self.min_new_lines is None:
+            self.in_flight = self.workers
+        else:
+            self.in_flight = max(1, min(self.workers, self.min_passes))
+
+    def plan(self, psm_modes: List[int], masks: List[str]) -> List[Tuple[str, int]]:
+        """Order passes so the most productive ones run first"""
+        passes = [(mask, psm) for mask, psm in self.pass_order
+                  if mask in masks and psm in psm_modes]
+        # Passes not covered by the profile order still run, last
+        passes += [(mask, psm) for psm in psm_modes for mask in masks
+                   if (mask, psm) not in passes]
+        if self.max_passes:
+            passes = passes[:self.max_passes]
+        return passes
+
+    def run(self, binaries: Dict[str, Any], psm_modes: List[int]) -> List[str]:
+        """Run passes over the preprocessed images, returning all OCR lines"""
+        return [line for line, _ in self.run_with_boxes(binaries, psm_modes)]
+
+    def run_with_boxes(self, binaries: Dict[str, Any], psm_modes: List[int]) -> List[Tuple[str, Any]]:
+        """Run passes, returning (line, [x, y, width, height]) pairs in binary-image pixels"""
+        passes = self.plan(psm_modes, list(binaries))
+        results = []
+        seen = set()
+        completed = 0
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.in_flight, len(passes))))
+        pending = {}
+        queued = iter(passes)
+        try:
+            while True:
+                # Passes that never start are what stopping early saves
+                while len(pending) < self.in_flight:
+                    ocr_pass = next(queued, None)
+                    if ocr_pass is None:
+                        break
+                    mask, psm = ocr_pass
+                    pending[pool.submit(self._recognize, binaries[mask], mask, psm)] = ocr_pass
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                stop = False
+                for future in done:
+                    outcome, new_lines = self._collect(pending.pop(future), future, results, seen)
+                    completed += 1
+                    if self._should_stop(completed, outcome, new_lines):
+                        stop = True
+
+                if stop:
+                    # Passes already running can't be interrupted; their Tesseract
+                    # runs are paid for, so wait and keep their lines
+                    running = [future for future in pending if not future.cancel()]
+                    for future in running:
+                        self._collect(pending[future], future, results, seen)
+                    completed += len(running)
+                    metrics.incr("ocr.passes_skipped", len(passes) - completed)
+                    if Config.DEBUG:
+                        print(f"Debug - OCR stopped early after {completed}/{len(passes)} passes", file=sys.stderr)
+                    break
+        finally:
+            # Passes still queued after an error are dropped, not run
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+        return results
+
+    def _collect(self, ocr_pass: Tuple[str, int], future, results: List[Tuple[str, Any]],
+                 seen: set) -> Tuple[Dict[str, Any], List[str]]:
+        """Add a finished pass's lines to the results, returning its outcome and new lines"""
+        mask, psm = ocr_pass
+        outcome = future.result()
+        metrics.incr("ocr.passes")
+
+        new_lines = [line for line in outcome["lines"] if line not in seen]
+        seen.update(new_lines)
+        results.extend(zip(outcome["lines"], outcome["boxes"]))
+
+        if Config.DEBUG:
+            print(f"Debug - OCR pass {mask}/psm {psm}: "
+                  f"{len(outcome['lines'])} lines, {len(new_lines)} new, "
+                  f"confidence {outcome['confidence']:.1f}", file=sys.stderr)
+        return outcome, new_lines
+
+    def _recognize(self, binary: Any, mask: str, psm: int) -> Dict[str, Any]:
+        """One Tesseract pass, timed per mask and page segmentation mode"""
+        with metrics.timer(f"ocr.pass.{mask}.psm{psm}"):
+            return self.engine.recognize(binary, psm)
+
+    def _should_stop(self, completed: int, outcome: Dict[str, Any], new_lines: List[str]) -> bool:
+        """Check the profile's confidence and coverage thresholds"""
+        if completed < self.min_passes:
+            return False
+        if self.target_confidence is not None and outcome["confidence"] >= self.target_confidence:
+            return True
+        # Coverage is only meaningful once a previous pass exists to compare against
+        if self.min_new_lines is not None and completed > 1 and len(new_lines) < self.min_new_lines:
+            return True
+        return False
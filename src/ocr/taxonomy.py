@@ -0,0 +1,178 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.utils.cache import hash_key
+from src.utils.config import Config
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'taxonomy.json')
+
+# Characters Tesseract commonly confuses are folded to one form in both the
+# taxonomy and the OCR text, so "F1rewall" and "firewall" compare equal
+_CONFUSED_PAIRS = [('rn', 'm'), ('vv', 'w')]
+_CONFUSED_CHARS = str.maketrans({'0': 'o', '1': 'l', '|': 'l', '!': 'l', '5': 's', '$': 's'})
+_SEPARATORS = re.compile(r'[\s_\-]+')
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Only words at least this long are matched fuzzily; short abbreviations
+# like WAF or HSM are too close to unrelated words
+FUZZY_MIN_LENGTH = 5
+FUZZY_CACHE_SIZE = 50000
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold OCR confusions and collapse separators"""
+    text = _SEPARATORS.sub(' ', text.lower()).strip().translate(_CONFUSED_CHARS)
+    for wrong, right in _CONFUSED_PAIRS:
+        text = text.replace(wrong, right)
+    return text
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Regex alternation shaped like a trie, so shared prefixes are tried once"""
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        ends = '' in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if ends:
+            # The term may stop here; the greedy branch still prefers the longer term
+            body = '(?:' + body + ')?'
+        return body
+
+    return render(trie)
+
+
+def _deletes(word: str) -> Set[str]:
+    """The word with each single character removed"""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Levenshtein distance of at most one, plus adjacent transpositions"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    shorter, longer = sorted((a, b), key=len)
+    return any(longer[:i] + longer[i + 1:] == shorter for i in range(len(longer)))
+
+
+class Taxonomy:
+    """Component categories compiled into a single word-boundary matcher"""
+
+    def __init__(self, categories: Dict[str, List[str]], fuzzy: bool = True):
+        self.categories = list(categories)
+        self.fuzzy = fuzzy
+        # Cached components are only valid for the taxonomy that produced them
+        self.fingerprint = hash_key(categories, fuzzy)
+
+        # Folded term -> categories it belongs to
+        self._terms: Dict[str, Set[str]] = {}
+        for category, terms in categories.items():
+            for term in terms:
+                folded = normalize(term)
+                if folded:
+                    self._terms.setdefault(folded, set()).add(category)
+
+        # The lookahead finds a match at every word start, so overlapping terms
+        # ("web interface" and "interface") all report their categories
+        self._pattern = re.compile(
+            rf'(?<![a-z0-9])(?=({_trie_pattern(self._terms)})(?:e?s)?(?![a-z0-9]))')
+
+        # Symmetric-delete index over single-word terms for one-edit OCR errors
+        self._fuzzy_index: Dict[str, Set[str]] = {}
+        if fuzzy:
+            for term in self._terms:
+                if ' ' in term or len(term) < FUZZY_MIN_LENGTH:
+                    continue
+                for variant in _deletes(term) | {term}:
+                    self._fuzzy_index.setdefault(variant, set()).add(term)
+        # OCR text repeats the same words across lines and passes
+        self._fuzzy_cache: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def from_file(cls, path: str, fuzzy: bool = True) -> 'Taxonomy':
+        """Load a JSON object mapping each category to its list of terms"""
+        with open(path, encoding='utf-8') as f:
+            categories = json.load(f)
+        if not isinstance(categories, dict) or not all(isinstance(terms, list) for terms in categories.values()):
+            raise ValueError(f"Taxonomy {path} must map category names to lists of terms")
+        return cls(categories, fuzzy=fuzzy)
+
+    def match(self, line: str) -> Set[str]:
+        """Categories whose terms appear in a line"""
+        text = normalize(line)
+        matched = set()
+        exact_words = set()
+        for found in self._pattern.finditer(text):
+            term = found.group(1)
+            matched |= self._terms[term]
+            exact_words.update(term.split())
+
+        if self._fuzzy_index:
+            for word in _TOKEN.findall(text):
+                if len(word) < FUZZY_MIN_LENGTH or word in exact_words:
+                    continue
+                matched |= self._fuzzy_match(word)
+        return matched
+
+    def _fuzzy_match(self, word: str) -> Set[str]:
+        cached = self._fuzzy_cache.get(word)
+        if cached is not None:
+            return cached
+
+        candidates = set()
+        for variant in _deletes(word) | {word}:
+            candidates |= self._fuzzy_index.get(variant, set())
+        # Also try the singular so "frewalls" still finds "firewall"
+        if word.endswith('s'):
+            for variant in _deletes(word[:-1]) | {word[:-1]}:
+                candidates |= self._fuzzy_index.get(variant, set())
+
+        categories = set()
+        for term in candidates:
+            if _within_one_edit(word, term) or (word.endswith('s') and _within_one_edit(word[:-1], term)):
+                categories |= self._terms[term]
+
+        if len(self._fuzzy_cache) < FUZZY_CACHE_SIZE:
+            self._fuzzy_cache[word] = categories
+        return categories
+
+    def categorize(self, lines: Iterable[str]) -> Dict[str, List[str]]:
+        """Bucket lines into every category they mention, in taxonomy order"""
+        detected = {category: [] for category in self.categories}
+        for line in lines:
+            for category in self.match(line):
+                detected[category].append(line)
+        return detected
+
+
+_taxonomy: Optional[Taxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_taxonomy() -> Taxonomy:
+    """Process-wide taxonomy, compiled on first use from TAXONOMY_PATH"""
+    global _taxonomy
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            _taxonomy = Taxonomy.from_file(Config.TAXONOMY_PATH or DEFAULT_TAXONOMY_PATH,
+                                           fuzzy=Config.TAXONOMY_FUZZY)
+        return _taxonomy
@@ -0,0 +1,245 @@
+import math
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.config import Config
+from src.utils.metrics import metrics
+from .engines import OCREngine, get_engine
+from .preprocessing import BYTES_PER_SCALED_PIXEL, PSM_MODES, SCALE_FACTOR, preprocess
+from .scheduler import PassScheduler
+
+# Smallest tile worth running Tesseract on, in source pixels
+MIN_TILE_SIZE = 512
+# Headroom for Tesseract's own allocations on top of the preprocessing buffers
+MEMORY_SAFETY_FACTOR = 2
+# A line this close to an interior tile edge was probably cut by the seam
+EDGE_MARGIN = 2
+
+
+class MemoryBudgetError(ValueError):
+    """OCR_MAX_MEMORY_MB cannot hold the image and one minimum-size tile"""
+
+
+def tile_size_for_budget(image_shape: Tuple[int, ...], max_memory_mb: int, workers: int) -> int:
+    """Largest square tile whose working buffers keep every worker within the memory limit
+
+    Raises MemoryBudgetError when even MIN_TILE_SIZE tiles would exceed it.
+    """
+    # The decoded source image has to stay resident while tiles are cut from it
+    image_bytes = int(np.prod(image_shape))
+    budget = max_memory_mb * 1024 * 1024 - image_bytes
+    per_tile = budget / (workers * MEMORY_SAFETY_FACTOR)
+    pixels = per_tile / (BYTES_PER_SCALED_PIXEL * SCALE_FACTOR ** 2)
+
+    if pixels < MIN_TILE_SIZE ** 2:
+        raise MemoryBudgetError(
+            f"OCR_MAX_MEMORY_MB={max_memory_mb} is too low for a {image_bytes // (1024 * 1024)} MB image "
+            f"with {workers} tile worker(s); {MIN_TILE_SIZE}px tiles would exceed it")
+    return int(math.sqrt(pixels))
+
+
+def plan_budget(image_shape: Tuple[int, ...], max_memory_mb: int, workers: int) -> Tuple[int, int]:
+    """Tile size and worker count within the memory limit, running fewer tiles at once before giving up"""
+    for count in range(workers, 0, -1):
+        try:
+            tile_size = tile_size_for_budget(image_shape, max_memory_mb, count)
+        except MemoryBudgetError:
+            if count == 1:
+                raise
+            continue
+        if count < workers:
+            print(f"Warning: OCR_MAX_MEMORY_MB={max_memory_mb} only fits {count} of "
+                  f"{workers} tile workers for this image", file=sys.stderr)
+        return tile_size, count
+    raise MemoryBudgetError("OCR_TILE_WORKERS must be at least 1")
+
+
+def _positions(length: int, tile_size: int, overlap: int) -> List[int]:
+    """Tile offsets along one axis; the last tile is aligned to the far edge"""
+    if length <= tile_size:
+        return [0]
+    step = tile_size - overlap
+    positions = list(range(0, length - tile_size + 1, step))
+    if positions[-1] + tile_size < length:
+        positions.append(length - tile_size)
+    return positions
+
+
+def plan_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """Overlapping (x, y, width, height) tiles covering the image"""
+    overlap = min(overlap, tile_size // 2)
+    return [(x, y, min(tile_size, width - x), min(tile_size, height - y))
+            for y in _positions(height, tile_size, overlap)
+            for x in _positions(width, tile_size, overlap)]
+
+
+def _area(box: List[int]) -> int:
+    return box[2] * box[3]
+
+
+def _intersection(a: List[int], b: List[int]) -> int:
+    width = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    height = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    return max(0, width) * max(0, height)
+
+
+def _iou(a: List[int], b: List[int]) -> float:
+    inter = _intersection(a, b)
+    union = _area(a) + _area(b) - inter
+    return inter / union if union else 0.0
+
+
+def _union(a: List[int], b: List[int]) -> List[int]:
+    x0, y0 = min(a[0], b[0]), min(a[1], b[1])
+    x1, y1 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return [x0, y0, x1 - x0, y1 - y0]
+
+
+def _join_text(left: str, right: str) -> str:
+    """Join two halves of a line, dropping the words both tiles read in the overlap"""
+    left_words, right_words = left.split(), right.split()
+    for size in range(min(len(left_words), len(right_words)), 0, -1):
+        if [w.lower() for w in left_words[-size:]] == [w.lower() for w in right_words[:size]]:
+            return " ".join(left_words + right_words[size:])
+    return " ".join(left_words + right_words)
+
+
+class TiledOCR:
+    """OCR for very large images in overlapping tiles with bounded working memory"""
+
+    def __init__(self, profile: Optional[str] = None, engine: Optional[OCREngine] = None,
+                 overlap: Optional[int] = None, workers: Optional[int] = None,
+                 max_memory_mb: Optional[int] = None):
+        self.profile = profile or Config.OCR_PROFILE
+        self.engine = engine or get_engine()
+        self.overlap = Config.OCR_TILE_OVERLAP if overlap is None else overlap
+        self.workers = workers or Config.OCR_TILE_WORKERS
+        self.max_memory_mb = max_memory_mb or Config.OCR_MAX_MEMORY_MB
+        # Each worker thread keeps one set of preprocessing buffers for all its tiles
+        self._local = threading.local()
+
+    def run(self, image: Any) -> List[Dict[str, Any]]:
+        """OCR every tile and return merged labels with bboxes in source pixels"""
+        height, width = image.shape[:2]
+        tile_size, workers = plan_budget(image.shape, self.max_memory_mb, self.workers)
+        tiles = plan_tiles(width, height, tile_size, self.overlap)
+
+        if Config.DEBUG:
+            print(f"Debug - Tiled OCR: {len(tiles)} tiles of up to {tile_size}px "
+                  f"for a {width}x{height} image", file=sys.stderr)
+
+        metrics.incr("ocr.tiles", len(tiles))
+        with ThreadPoolExecutor(max_workers=min(workers, len(tiles))) as pool:
+            per_tile = pool.map(lambda tile: self._ocr_tile(image, tile), tiles)
+            items = [item for tile_items in per_tile for item in tile_items]
+
+        with metrics.timer("ocr.tile_merge"):
+            return self.merge(items)
+
+    def _ocr_tile(self, image: Any, tile: Tuple[int, int, int, int]) -> List[Dict[str, Any]]:
+        """OCR one tile and map its line boxes back to source coordinates"""
+        x, y, width, height = tile
+        if not hasattr(self._local, 'buffers'):
+            self._local.buffers = {}
+
+        crop = np.ascontiguousarray(image[y:y + height, x:x + width])
+        with metrics.timer("ocr.preprocess"):
+            binaries = preprocess(crop, buffers=self._local.buffers)
+        # Tiles already run in parallel, so passes within a tile do not
+        pairs = PassScheduler(profile=self.profile, workers=1, engine=self.engine).run_with_boxes(
+            binaries, PSM_MODES)
+
+        image_height, image_width = image.shape[:2]
+        items = []
+        for line, box in pairs:
+            if box is None:
+                bbox = [x, y, width, height]
+            else:
+                bbox = [x + box[0] // SCALE_FACTOR, y + box[1] // SCALE_FACTOR,
+                        max(1, box[2] // SCALE_FACTOR), max(1, box[3] // SCALE_FACTOR)]
+            items.append({
+                "text": line,
+                "bbox": bbox,
+                "tile": tile,
+                "clipped": self._clipped_sides(bbox, tile, image_width, image_height)
+            })
+        return items
+
+    def _clipped_sides(self, bbox: List[int], tile: Tuple[int, int, int, int],
+                       image_width: int, image_height: int) -> set:
+        """Interior tile edges the line touches"""
+        x, y, width, height = tile
+        sides = set()
+        if x > 0 and bbox[0] - x <= EDGE_MARGIN:
+            sides.add('left')
+        if x + width < image_width and x + width - (bbox[0] + bbox[2]) <= EDGE_MARGIN:
+            sides.add('right')
+        if y > 0 and bbox[1] - y <= EDGE_MARGIN:
+            sides.add('top')
+        if y + height < image_height and y + height - (bbox[1] + bbox[3]) <= EDGE_MARGIN:
+            sides.add('bottom')
+        return sides
+
+    def merge(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Resolve lines read twice in overlaps and lines cut by tile seams"""
+        # The same line from several passes or overlapping tiles; prefer whole reads
+        kept = []
+        for item in sorted(items, key=lambda item: (bool(item["clipped"]), -_area(item["bbox"]))):
+            if any(item["text"].lower() == other["text"].lower() and _iou(item["bbox"], other["bbox"]) > 0.5
+                   for other in kept):
+                continue
+            kept.append(item)
+
+        # A cut line is redundant when a neighbouring tile saw it whole
+        whole = [item for item in kept if not item["clipped"]]
+        clipped = [item for item in kept if item["clipped"]
+                   and not any(_intersection(item["bbox"], other["bbox"]) > 0.5 * _area(item["bbox"])
+                               for other in whole)]
+
+        labels = [{"text": item["text"], "bbox": item["bbox"]}
+                  for item in whole + self._join_seams(clipped)]
+        return sorted(labels, key=lambda label: (label["bbox"][1], label["bbox"][0]))
+
+    def _join_seams(self, clipped: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Stitch halves of lines that run across vertical tile seams"""
+        pieces = sorted(clipped, key=lambda item: item["bbox"][0])
+        merged = True
+        while merged:
+            merged = False
+            for left in pieces:
+                if 'right' not in left["clipped"]:
+                    continue
+                right = self._seam_partner(left, pieces)
+                if right is None:
+                    continue
+                pieces.remove(left)
+                pieces.remove(right)
+                pieces.append({
+                    "text": _join_text(left["text"], right["text"]),
+                    "bbox": _union(left["bbox"], right["bbox"]),
+                    "tile": right["tile"],
+                    # A line spanning three tiles keeps joining to the right
+                    "clipped": (left["clipped"] - {'right'}) | (right["clipped"] - {'left'})
+                })
+                pieces.sort(key=lambda item: item["bbox"][0])
+                merged = True
+                break
+        return pieces
+
+    def _seam_partner(self, left: Dict[str, Any], pieces: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Left-clipped piece from another tile continuing `left` on the same row"""
+        lx, ly, lw, lh = left["bbox"]
+        for right in pieces:
+            if right is left or right["tile"] == left["tile"] or 'left' not in right["clipped"]:
+                continue
+            rx, ry, rw, rh = right["bbox"]
+            vertical = min(ly + lh, ry + rh) - max(ly, ry)
+            if vertical < 0.5 * min(lh, rh):
+                continue
+            if lx <= rx <= lx + lw + self.overlap:
+                return right
+        return None
@@ -0,0 +1,4 @@
+from .jobs import AnalysisService, QueueFullError
+from .server import make_server, serve
+
+__all__ = ['AnalysisService', 'QueueFullError', 'make_server', 'serve']
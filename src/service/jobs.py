@@ -0,0 +1,223 @@
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src.analysis.event_loop import close_thread_loop
+from src.analysis.rate_limit import rate_limiter_stats
+from src.batch.inputs import IMAGE_EXTENSIONS
+from src.utils.config import Config
+from src.utils.metrics import metrics
+
+# Tells a worker thread to exit
+_SENTINEL = None
+
+
+class QueueFullError(Exception):
+    """The job queue is at capacity; the client should retry later"""
+
+
+class AnalysisService:
+    """Job queue in front of worker threads that keep OCR and providers warm"""
+
+    def __init__(self, provider_type=None, fallback_provider=None, hedge_delay=None, use_rules=None,
+                 ocr_profile=None, ocr_engine=None, ocr_strategy=None, use_cache=None,
+                 workers=None, queue_size=None, max_jobs=None):
+        self.provider_type = provider_type or Config.DEFAULT_PROVIDER
+        self.fallback_provider = fallback_provider
+        self.hedge_delay = hedge_delay
+        self.use_rules = use_rules
+        self.ocr_profile = ocr_profile or Config.OCR_PROFILE
+        self.ocr_engine = ocr_engine or Config.OCR_ENGINE
+        self.ocr_strategy = ocr_strategy or Config.OCR_STRATEGY
+        self.use_cache = use_cache
+        self.workers = workers or Config.SERVICE_WORKERS
+        self.max_jobs = max_jobs or Config.SERVICE_MAX_JOBS
+
+        self._queue = queue.Queue(maxsize=queue_size or Config.SERVICE_QUEUE_SIZE)
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._done_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._upload_dir = None
+        self._started_at = None
+
+    def start(self):
+        """Load OCR and provider state once, then start the workers"""
+        from src.ocr.engines import get_engine
+        from src.ocr.extractor import extract_components
+        from src.ocr.taxonomy import get_taxonomy
+        from src.analysis.analyzer import SecurityAnalyzer
+
+        self._extract_components = extract_components
+        get_taxonomy()
+        try:
+            # Starts tesseract once so the first job does not pay for it
+            get_engine(self.ocr_engine).version()
+        except Exception as e:
+            # Vector diagrams still work without Tesseract
+            print(f"Warning: OCR engine unavailable: {e}", file=sys.stderr)
+
+        self._upload_dir = tempfile.mkdtemp(prefix='architecture-security-checker-')
+        self._started_at = time.time()
+
+        for index in range(self.workers):
+            # Each worker owns its analyzer; provider clients are shared per process
+            analyzer = SecurityAnalyzer(
+                provider_type=self.provider_type,
+                use_cache=self.use_cache,
+                fallback_provider=self.fallback_provider,
+                hedge_delay=self.hedge_delay,
+                use_rules=self.use_rules
+            )
+            thread = threading.Thread(target=self._worker, args=(analyzer,),
+                                      name=f"analysis-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Let queued jobs finish, then stop the workers"""
+        for _ in self._threads:
+            self._queue.put(_SENTINEL)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._upload_dir:
+            try:
+                os.rmdir(self._upload_dir)
+            except OSError:
+                pass
+
+    def submit(self, data: bytes, filename: str) -> Dict[str, Any]:
+        """Store an uploaded diagram and queue it for analysis"""
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unsupported diagram type: {extension or filename!r}")
+
+        job_id = uuid.uuid4().hex
+        # Keep the extension; it decides between OCR and the vector adapters
+        path = os.path.join(self._upload_dir, job_id + extension)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        job = {
+            "id": job_id,
+            "filename": os.path.basename(filename),
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "ocr_time": None,
+            "llm_time": None,
+            "results": None,
+            "error": None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._done_events[job_id] = threading.Event()
+
+        try:
+            self._queue.put_nowait((job_id, path))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+                del self._done_events[job_id]
+            os.remove(path)
+            raise QueueFullError("Job queue is full")
+
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Block until a job finishes or the timeout passes, then return its snapshot
+
+        Returns None if the job is unknown, or finished and was evicted by
+        newer jobs before the snapshot was taken.
+        """
+        with self._lock:
+            event = self._done_events.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+        return self.get(job_id)
+
+    def health(self) -> Dict[str, Any]:
+        """Liveness and queue statistics"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "status": "ok" if any(thread.is_alive() for thread in self._threads) else "stopped",
+            "provider": self.provider_type,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "jobs": counts,
+            "rate_limits": rate_limiter_stats(),
+            "uptime": round(time.time() - self._started_at, 3) if self._started_at else 0.0
+        }
+
+    def _worker(self, analyzer):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _SENTINEL:
+                    return
+                job_id, path = item
+                try:
+                    self._run(job_id, path, analyzer)
+                finally:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    self._finish(job_id)
+        finally:
+            # Hedged jobs reuse this thread's event loop and its async clients
+            close_thread_loop()
+
+    def _run(self, job_id: str, path: str, analyzer):
+        """OCR and analyze one uploaded diagram"""
+        started_at = time.time()
+        self._update(job_id, status="running", started_at=started_at)
+        metrics.record("service.queue_wait", started_at - self.get(job_id)["submitted_at"])
+        try:
+            started = time.perf_counter()
+            components = self._extract_components(path, profile=self.ocr_profile, engine=self.ocr_engine,
+                                                  use_cache=self.use_cache, strategy=self.ocr_strategy)
+            ocr_time = time.perf_counter() - started
+            if components.get("error"):
+                self._update(job_id, status="failed", error=components["error"], ocr_time=ocr_time)
+                return
+
+            started = time.perf_counter()
+            results = analyzer.analyze_security(components)
+            self._update(job_id, status="done", results=results, ocr_time=ocr_time,
+                         llm_time=time.perf_counter() - started)
+        except Exception as e:
+            if Config.DEBUG:
+                print(f"Job {job_id} failed: {e}", file=sys.stderr)
+            self._update(job_id, status="failed", error=str(e))
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _finish(self, job_id: str):
+        """Mark a job finished, wake waiters and drop the oldest finished jobs"""
+        with self._lock:
+            self._jobs[job_id]["finished_at"] = time.time()
+            self._done_events.pop(job_id).set()
+
+            finished = [key for key, job in self._jobs.items() if job["finished_at"] is not None]
+            for key in finished[:max(0, len(finished) - self.max_jobs)]:
+                del self._jobs[key]
@@ -0,0 +1,133 @@
+import json
+import math
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+from urllib.parse import parse_qs, urlparse
+
+from src.utils.config import Config
+from src.utils.metrics import metrics
+from .jobs import AnalysisService, QueueFullError
+
+_JOB_PATH = re.compile(r'^/jobs/([0-9a-f]{32})$')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON API: POST /jobs, GET /jobs/<id>, GET /health, GET /metrics"""
+
+    server_version = "ArchitectureSecurityChecker"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self._send_json(200, self.service.health())
+            return
+        if url.path == '/metrics':
+            self._send_json(200, dict(metrics.report(), enabled=metrics.enabled))
+            return
+
+        match = _JOB_PATH.match(url.path)
+        if match is None:
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        job = self.service.get(match.group(1))
+        if job is None:
+            self._send_json(404, {"error": "Unknown job"})
+            return
+        self._send_json(200, job)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/jobs':
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        query = parse_qs(url.query)
+        # The raw request body is the diagram; its name carries the file type
+        filename = query.get('filename', [self.headers.get('X-Filename', '')])[0]
+        if not filename:
+            self._send_json(400, {"error": "Pass the diagram file name as ?filename= or X-Filename"})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send_json(400, {"error": "Request body must contain the diagram"})
+            return
+        if length > Config.SERVICE_MAX_UPLOAD_MB * 1024 * 1024:
+            self._send_json(413, {"error": f"Diagram exceeds {Config.SERVICE_MAX_UPLOAD_MB} MB"})
+            return
+        data = self.rfile.read(length)
+
+        # ?wait=<seconds> answers synchronously when the job finishes in time;
+        # it is checked before queueing so a bad value never leaves a job behind
+        try:
+            wait = float(query.get('wait', ['0'])[0] or 0)
+        except ValueError:
+            wait = -1.0
+        if not math.isfinite(wait) or wait < 0:
+            self._send_json(400, {"error": "?wait= must be a non-negative number of seconds"})
+            return
+
+        try:
+            job = self.service.submit(data, filename)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except QueueFullError as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": "1"})
+            return
+
+        if wait > 0:
+            job_id = job["id"]
+            job = self.service.wait(job_id, wait)
+            if job is None:
+                # Finished and already evicted by newer jobs (SERVICE_MAX_JOBS)
+                self._send_json(410, {"error": "Job finished but its result has expired", "id": job_id})
+                return
+
+        status = 200 if job["finished_at"] is not None else 202
+        self._send_json(status, job, {"Location": f"/jobs/{job['id']}"})
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if Config.DEBUG:
+            super().log_message(format, *args)
+
+
+def make_server(service: AnalysisService, host: str = None, port: int = None) -> ThreadingHTTPServer:
+    """HTTP server bound to a started AnalysisService"""
+    server = ThreadingHTTPServer((host or Config.SERVICE_HOST, port or Config.SERVICE_PORT), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve(service: AnalysisService, host: str = None, port: int = None):
+    """Start the service workers and handle requests until interrupted"""
+    service.start()
+    server = make_server(service, host, port)
+    bound_host, bound_port = server.server_address[:2]
+    print(f"Serving on http://{bound_host}:{bound_port} "
+          f"({service.workers} workers, provider {service.provider_type})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        service.stop()
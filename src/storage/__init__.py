@@ -0,0 +1,5 @@
+from .jsonl import JsonlSink
+from .records import build_record
+from .store import ResultStore, open_store
+
+__all__ = ['JsonlSink', 'ResultStore', 'build_record', 'open_store']
@@ -0,0 +1,44 @@
+import json
+import threading
+from typing import Any, Dict, List, Optional, TextIO
+
+
+class JsonlSink:
+    """Append-only JSON Lines export, one record per line, written in batches"""
+
+    def __init__(self, path: Optional[str] = None, stream: Optional[TextIO] = None, batch_size: int = 1):
+        if (path is None) == (stream is None):
+            raise ValueError("Pass either a path or a stream")
+        self._file = open(path, 'a', encoding='utf-8') if path is not None else stream
+        self._owns_file = path is not None
+        self.batch_size = max(1, batch_size)
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]):
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= self.batch_size:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def close(self):
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+
+    def _write(self):
+        if self._pending:
+            self._file.write("\n".join(self._pending) + "\n")
+            self._file.flush()
+            self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,29 @@
+import time
+from typing import Any, Dict, Optional
+
+
+def build_record(image_path: str, components: Optional[Dict[str, Any]], results: Optional[Dict[str, Any]],
+                 provider: Optional[str] = None, model: Optional[str] = None, image_hash: Optional[str] = None,
+                 ocr_time: Optional[float] = None, llm_time: Optional[float] = None,
+                 error: Optional[str] = None, duplicate_of: Optional[str] = None) -> Dict[str, Any]:
+    """One analyzed diagram as stored and emitted by --output json/jsonl"""
+    results = results or {}
+    return {
+        "image_path": image_path,
+        "image_hash": image_hash,
+        "provider": provider,
+        "model": model,
+        "created_at": time.time(),
+        "checks": results.get("checks", {}),
+        "compliance_score": results.get("compliance_score"),
+        "recommendations": results.get("recommendations", []),
+        "analysis": results.get("analysis", {}),
+        "timings": {
+            "ocr": round(ocr_time, 3) if ocr_time is not None else None,
+            "llm": round(llm_time, 3) if llm_time is not None else None
+        },
+        "components": components,
+        "error": error,
+        # Set when the result was reused from a near-identical diagram
+        "duplicate_of": duplicate_of
+    }
@@ -0,0 +1,157 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+from src.utils.config import Config
+from .jsonl import JsonlSink
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    image_path TEXT,
+    image_hash TEXT,
+    provider TEXT,
+    model TEXT,
+    compliance_score TEXT,
+    ocr_time REAL,
+    llm_time REAL,
+    error TEXT,
+    duplicate_of TEXT,
+    recommendations TEXT,
+    analysis TEXT,
+    components TEXT
+);
+-- One row per check so fleet-wide queries hit an index instead of parsing JSON
+CREATE TABLE IF NOT EXISTS checks (
+    result_id INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    PRIMARY KEY (result_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS checks_by_outcome ON checks(name, passed, result_id);
+CREATE INDEX IF NOT EXISTS results_by_hash ON results(image_hash, created_at);
+CREATE INDEX IF NOT EXISTS results_by_path ON results(image_path, created_at);
+CREATE INDEX IF NOT EXISTS results_by_score ON results(compliance_score);
+"""
+
+# Columns returned by the query helpers; the bulky JSON columns are left out
+SUMMARY_COLUMNS = "r.id, r.created_at, r.image_path, r.image_hash, r.provider, r.model, r.compliance_score"
+
+
+class ResultStore:
+    """SQLite store for analysis records with batched writes and indexed check outcomes"""
+
+    def __init__(self, path: str, batch_size: Optional[int] = None):
+        self.path = os.path.expanduser(path)
+        self.batch_size = max(1, batch_size or Config.STORE_BATCH_SIZE)
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+        # Records may arrive from the batch pipeline's threads; the lock serializes access
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+    def add(self, record: Dict[str, Any]):
+        """Queue a record; queued records are written together once a batch fills"""
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.batch_size:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def failing(self, check: str, latest: bool = True) -> List[Dict[str, Any]]:
+        """Diagrams whose analysis failed `check`; by default only each diagram path's latest result"""
+        query = f"""
+            SELECT {SUMMARY_COLUMNS} FROM checks c JOIN results r ON r.id = c.result_id
+            WHERE c.name = ? AND c.passed = 0
+        """
+        if latest:
+            query += """
+            AND r.id = (SELECT MAX(id) FROM results WHERE image_path IS r.image_path)
+            """
+        return self._query(query + " ORDER BY r.id", (check,))
+
+    def history(self, image_hash: str) -> List[Dict[str, Any]]:
+        """Every stored result for one image, oldest first"""
+        return self._query(f"SELECT {SUMMARY_COLUMNS} FROM results r WHERE r.image_hash = ? "
+                           f"ORDER BY r.created_at", (image_hash,))
+
+    def get(self, result_id: int) -> Optional[Dict[str, Any]]:
+        """A stored record in the same shape it was added"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM results WHERE id = ?", (result_id,)).fetchone()
+            if row is None:
+                return None
+            checks = self._conn.execute("SELECT name, passed FROM checks WHERE result_id = ?",
+                                        (result_id,)).fetchall()
+        return {
+            "image_path": row["image_path"],
+            "image_hash": row["image_hash"],
+            "provider": row["provider"],
+            "model": row["model"],
+            "created_at": row["created_at"],
+            "checks": {name: bool(passed) for name, passed in checks},
+            "compliance_score": row["compliance_score"],
+            "recommendations": json.loads(row["recommendations"] or "[]"),
+            "analysis": json.loads(row["analysis"] or "{}"),
+            "timings": {"ocr": row["ocr_time"], "llm": row["llm_time"]},
+            "components": json.loads(row["components"]) if row["components"] else None,
+            "error": row["error"],
+            "duplicate_of": row["duplicate_of"]
+        }
+
+    def _query(self, query: str, params) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._write()
+            return [dict(row) for row in self._conn.execute(query, params)]
+
+    def _write(self):
+        """Insert queued records in one transaction"""
+        if not self._pending:
+            return
+        with self._conn:
+            for record in self._pending:
+                timings = record.get("timings") or {}
+                cursor = self._conn.execute(
+                    "INSERT INTO results (created_at, image_path, image_hash, provider, model, "
+                    "compliance_score, ocr_time, llm_time, error, duplicate_of, recommendations, analysis, "
+                    "components) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (record["created_at"], record.get("image_path"), record.get("image_hash"),
+                     record.get("provider"), record.get("model"), record.get("compliance_score"),
+                     timings.get("ocr"), timings.get("llm"), record.get("error"), record.get("duplicate_of"),
+                     json.dumps(record.get("recommendations", [])),
+                     json.dumps(record.get("analysis", {})),
+                     json.dumps(record["components"], default=str) if record.get("components") else None)
+                )
+                self._conn.executemany(
+                    "INSERT INTO checks (result_id, name, passed) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, name, int(bool(passed)))
+                     for name, passed in record.get("checks", {}).items()]
+                )
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_store(path: str):
+    """JSONL sink for *.jsonl paths, SQLite store otherwise"""
+    if path.endswith('.jsonl'):
+        return JsonlSink(path, batch_size=Config.STORE_BATCH_SIZE)
+    return ResultStore(path)
@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 from typing import Dict, Any
 
@@ -10,6 +11,8 @@ class Config:
     
     # Debug Settings
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
+    # Collect per-stage timings and counters (see src/utils/metrics.py)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False').lower() == 'true'
     
     # Determine default provider based on available API keys
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
@@ -24,15 +27,166 @@ class Config:
             'api_key': GOOGLE_API_KEY,
             'model': 'gemini-pro',
             'temperature': 0.3,
+            'prompt_token_budget': int(os.getenv('GEMINI_PROMPT_TOKEN_BUDGET', '6000')),
+            'rpm': int(os.getenv('GEMINI_RPM', '60')),
+            'tpm': int(os.getenv('GEMINI_TPM', '120000')),
         },
         'openai': {
             'api_key': OPENAI_API_KEY,
             'base_url': os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1'),
             'model': os.getenv('OPENAI_MODEL', 'gpt-4'),
             'temperature': 0.3,
+            'prompt_token_budget': int(os.getenv('OPENAI_PROMPT_TOKEN_BUDGET', '3000')),
+            'rpm': int(os.getenv('OPENAI_RPM', '500')),
+            'tpm': int(os.getenv('OPENAI_TPM', '30000')),
+        },
+        # Offline provider for local runs, CI and benchmarks
+        'stub': {
+            'api_key': None,
+            'requires_api_key': False,
+            'model': 'stub',
+            'temperature': 0.0,
+            'prompt_token_budget': int(os.getenv('STUB_PROMPT_TOKEN_BUDGET', '4000')),
+            'rpm': int(os.getenv('STUB_RPM', '0')),
+            'tpm': int(os.getenv('STUB_TPM', '0')),
+            'latency': float(os.getenv('STUB_LATENCY', '0')),
+            'response_path': os.getenv('STUB_RESPONSE_PATH'),
         }
     }
     
+    # Decide clear-cut checks locally and only ask the LLM about the rest
+    RULES_ENABLED = os.getenv('RULES_ENABLED', 'True').lower() == 'true'
+    
+    # Default prompt size limit for providers without their own budget
+    PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '4000'))
+    
+    # Incremental re-analysis falls back to a full analysis when more than
+    # this share of the diagram's labels changed
+    INCREMENTAL_MAX_CHANGE_RATIO = float(os.getenv('INCREMENTAL_MAX_CHANGE_RATIO', '0.5'))
+    
+    # HTTP Client Settings
+    # Provider clients are created once per process and reuse connections
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+    HTTP_KEEPALIVE = float(os.getenv('HTTP_KEEPALIVE', '30'))
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '120'))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+    GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT', 'grpc')
+    
+    # Failover Settings
+    # Secondary provider that receives a hedged request once the primary has
+    # been outstanding for HEDGE_DELAY seconds
+    FALLBACK_PROVIDER = os.getenv('FALLBACK_PROVIDER')
+    HEDGE_DELAY = float(os.getenv('HEDGE_DELAY', '10'))
+    RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', '3'))
+    RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', '0.5'))
+    RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '8'))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+    BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '60'))
+    
+    # Rate Limiting
+    # Requests are paced per provider model within each provider's 'rpm' and
+    # 'tpm' quotas (0 disables a quota). TPM counts the estimated prompt plus
+    # RATE_LIMIT_RESPONSE_TOKENS for the answer. 429 responses are retried
+    # after the provider's retry-after hint, up to RATE_LIMIT_RETRIES times.
+    RATE_LIMIT_RESPONSE_TOKENS = int(os.getenv('RATE_LIMIT_RESPONSE_TOKENS', '1000'))
+    RATE_LIMIT_RETRIES = int(os.getenv('RATE_LIMIT_RETRIES', '5'))
+    RATE_LIMIT_DEFAULT_DELAY = float(os.getenv('RATE_LIMIT_DEFAULT_DELAY', '5'))
+    RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', '120'))
+    
+    # Maximum concurrent provider requests for async batch analysis
+    LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', '4'))
+    
+    # Batch Settings
+    BATCH_OCR_WORKERS = int(os.getenv('BATCH_OCR_WORKERS', os.cpu_count() or 1))
+    BATCH_LLM_WORKERS = int(os.getenv('BATCH_LLM_WORKERS', '4'))
+    BATCH_QUEUE_SIZE = int(os.getenv('BATCH_QUEUE_SIZE', '8'))
+    # Raster diagrams whose perceptual hashes differ by at most
+    # DEDUP_MAX_DISTANCE of 255 bits, and whose aligned content differs by at
+    # most DEDUP_MAX_CELL_DIFF grey levels in any cell, reuse the first
+    # diagram's result
+    BATCH_DEDUP = os.getenv('BATCH_DEDUP', 'True').lower() == 'true'
+    DEDUP_MAX_DISTANCE = int(os.getenv('DEDUP_MAX_DISTANCE', '40'))
+    DEDUP_MAX_CELL_DIFF = float(os.getenv('DEDUP_MAX_CELL_DIFF', '8'))
+
+    # Result Store Settings (--store)
+    # Records are written in batches of this many diagrams
+    STORE_BATCH_SIZE = int(os.getenv('STORE_BATCH_SIZE', '100'))
+
+    # Service Settings (`main.py serve`)
+    SERVICE_HOST = os.getenv('SERVICE_HOST', '127.0.0.1')
+    SERVICE_PORT = int(os.getenv('SERVICE_PORT', '8080'))
+    SERVICE_WORKERS = int(os.getenv('SERVICE_WORKERS', '2'))
+    SERVICE_QUEUE_SIZE = int(os.getenv('SERVICE_QUEUE_SIZE', '32'))
+    SERVICE_MAX_UPLOAD_MB = int(os.getenv('SERVICE_MAX_UPLOAD_MB', '50'))
+    # Finished jobs kept for status queries before the oldest are dropped
+    SERVICE_MAX_JOBS = int(os.getenv('SERVICE_MAX_JOBS', '1000'))
+
+    # OCR Settings
+    # Profile trades accuracy for speed: 'accurate' always runs every pass,
+    # 'balanced' and 'fast' stop once passes reach the confidence target or
+    # stop contributing new lines
+    OCR_PROFILE = os.getenv('OCR_PROFILE', 'balanced')
+    # 'pytesseract' spawns the tesseract binary per pass, 'tesserocr' keeps
+    # Tesseract loaded in-process
+    OCR_ENGINE = os.getenv('OCR_ENGINE', 'pytesseract')
+    OCR_WORKERS = int(os.getenv('OCR_WORKERS', min(6, os.cpu_count() or 1)))
+    OCR_PROFILES: Dict[str, Dict[str, Any]] = {
+        'accurate': {
+            'pass_order': [('original', 11), ('black', 11), ('original', 6),
+                           ('black', 6), ('original', 3), ('black', 3)],
+            'min_passes': 6,
+            'target_confidence': None,
+            'min_new_lines': None,
+            'max_passes': None,
+        },
+        'balanced': {
+            'pass_order': [('original', 11), ('black', 11), ('original', 6),
+                           ('black', 6), ('original', 3), ('black', 3)],
+            'min_passes': 2,
+            'target_confidence': float(os.getenv('OCR_TARGET_CONFIDENCE', '85')),
+            'min_new_lines': 1,
+            'max_passes': None,
+        },
+        'fast': {
+            'pass_order': [('original', 11), ('black', 6), ('original', 6)],
+            'min_passes': 1,
+            'target_confidence': float(os.getenv('OCR_TARGET_CONFIDENCE', '70')),
+            'min_new_lines': 2,
+            'max_passes': 3,
+        }
+    }
+    # 'full' preprocesses the whole image at once, 'regions' only OCRs
+    # detected label regions, 'tiled' works on overlapping tiles sized to
+    # OCR_MAX_MEMORY_MB; 'auto' tiles images larger than
+    # OCR_TILE_THRESHOLD_PX pixels and OCRs the whole image otherwise
+    OCR_STRATEGY = os.getenv('OCR_STRATEGY', 'auto')
+    OCR_TILE_THRESHOLD_PX = int(os.getenv('OCR_TILE_THRESHOLD_PX', str(16_000_000)))
+    OCR_TILE_OVERLAP = int(os.getenv('OCR_TILE_OVERLAP', '96'))
+    OCR_TILE_WORKERS = int(os.getenv('OCR_TILE_WORKERS', min(4, os.cpu_count() or 1)))
+    OCR_MAX_MEMORY_MB = int(os.getenv('OCR_MAX_MEMORY_MB', '1024'))
+
+    # Component Taxonomy
+    # JSON file mapping each component category to its terms; the bundled
+    # src/ocr/taxonomy.json is used when unset
+    TAXONOMY_PATH = os.getenv('TAXONOMY_PATH')
+    # Also match words one OCR error away from a taxonomy term
+    TAXONOMY_FUZZY = os.getenv('TAXONOMY_FUZZY', 'True').lower() == 'true'
+
+    # OCR Cache Settings
+    OCR_CACHE_ENABLED = os.getenv('OCR_CACHE_ENABLED', 'True').lower() == 'true'
+    OCR_CACHE_DIR = os.getenv('OCR_CACHE_DIR', '~/.cache/architecture-security-checker/ocr')
+    OCR_CACHE_MAX_MB = int(os.getenv('OCR_CACHE_MAX_MB', '256'))
+
+    # LLM Response Cache Settings
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'True').lower() == 'true'
+    LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', '~/.cache/architecture-security-checker/llm')
+    LLM_CACHE_MAX_MB = int(os.getenv('LLM_CACHE_MAX_MB', '64'))
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+
+    # Follow-up requests for fields a response left missing or invalid
+    # before they fall back to conservative defaults
+    RESPONSE_REPAIR_ATTEMPTS = int(os.getenv('RESPONSE_REPAIR_ATTEMPTS', '1'))
+
     # Response Format Schema (used by all providers)
     RESPONSE_SCHEMA = {
         "checks": {
@@ -63,16 +217,27 @@ class Config:
             raise ValueError(f"Unsupported provider: {provider_name}")
             
         config = cls.PROVIDERS[provider_name]
-        if not config.get('api_key'):
+        if not cls.is_configured(provider_name):
             if provider_name == cls.DEFAULT_PROVIDER:
                 raise ValueError(f"API key not found for default provider: {provider_name}")
             elif cls.DEBUG:
-                print(f"Warning: API key not found for provider: {provider_name}")
+                print(f"Warning: API key not found for provider: {provider_name}", file=sys.stderr)
         return config
     
     @classmethod
-    def validate(cls):
+    def is_configured(cls, provider_name: str) -> bool:
+        """Whether a provider can be used, i.e. has its API key if it needs one"""
+        config = cls.PROVIDERS.get(provider_name, {})
+        return bool(config.get('api_key')) or not config.get('requires_api_key', True)
+    
+    @classmethod
+    def validate(cls, provider_name: str = None):
         """Validate configuration"""
+        # Providers without API keys need nothing else configured
+        provider_name = provider_name or cls.DEFAULT_PROVIDER
+        if not cls.PROVIDERS.get(provider_name, {}).get('requires_api_key', True):
+            return
+        
         # Ensure at least one provider is configured
         if not cls.GOOGLE_API_KEY and not cls.OPENAI_API_KEY:
             raise ValueError("No API keys found. Please configure at least one provider (Gemini or OpenAI)")
@@ -81,7 +246,7 @@ class Config:
         if cls.DEFAULT_PROVIDER == 'openai' and not cls.OPENAI_API_KEY:
             if cls.GOOGLE_API_KEY:
                 if cls.DEBUG:
-                    print("Warning: OpenAI key not found, falling back to Gemini")
+                    print("Warning: OpenAI key not found, falling back to Gemini", file=sys.stderr)
                 cls.DEFAULT_PROVIDER = 'gemini'
             else:
                 raise ValueError("No available API keys found") 
\ No newline at end of file
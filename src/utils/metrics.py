@@ -0,0 +1,140 @@
+import threading
+import time
+from typing import Any, Dict
+
+from src.utils.config import Config
+
+
+class _NullTimer:
+    """Shared do-nothing context manager handed out while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """Process-wide timers, counters and size observations
+
+    Every method returns immediately while disabled, so instrumentation can
+    stay in hot paths.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._timers: Dict[str, list] = {}
+            self._counters: Dict[str, int] = {}
+            self._values: Dict[str, list] = {}
+
+    def timer(self, name: str):
+        """Context manager timing the enclosed block under `name`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name: str, seconds: float):
+        """Add one timing sample"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._timers.get(name)
+            if stats is None:
+                self._timers[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def incr(self, name: str, amount: int = 1):
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float):
+        """Record a size such as prompt characters"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._values.get(name)
+            if stats is None:
+                self._values[name] = [1, value, value]
+            else:
+                stats[0] += 1
+                stats[1] += value
+                stats[2] = max(stats[2], value)
+
+    def merge(self, report: Dict[str, Any]):
+        """Fold in a report from another process, e.g. a batch OCR worker"""
+        if not self.enabled or not report:
+            return
+        with self._lock:
+            for name, stats in report.get("timers", {}).items():
+                self._merge(self._timers, name, stats["count"], stats["total_ms"] / 1000,
+                            stats["max_ms"] / 1000)
+            for name, count in report.get("counters", {}).items():
+                self._counters[name] = self._counters.get(name, 0) + count
+            for name, stats in report.get("values", {}).items():
+                self._merge(self._values, name, stats["count"], stats["total"], stats["max"])
+
+    def _merge(self, target: Dict[str, list], name: str, count: int, total: float, maximum: float):
+        stats = target.get(name)
+        if stats is None:
+            target[name] = [count, total, maximum]
+        else:
+            stats[0] += count
+            stats[1] += total
+            stats[2] = max(stats[2], maximum)
+
+    def report(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of everything recorded so far"""
+        with self._lock:
+            return {
+                "timers": {
+                    name: {
+                        "count": count,
+                        "total_ms": round(total * 1000, 3),
+                        "mean_ms": round(total * 1000 / count, 3),
+                        "max_ms": round(maximum * 1000, 3)
+                    }
+                    for name, (count, total, maximum) in sorted(self._timers.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+                "values": {
+                    name: {
+                        "count": count,
+                        "total": total,
+                        "mean": round(total / count, 3),
+                        "max": maximum
+                    }
+                    for name, (count, total, maximum) in sorted(self._values.items())
+                }
+            }
+
+
+metrics = Metrics(enabled=Config.METRICS_ENABLED)
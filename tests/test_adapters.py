@@ -0,0 +1,92 @@
+import base64
+import os
+import tempfile
+import unittest
+import urllib.parse
+import zlib
+
+from src.ocr.adapters import get_adapter
+from src.ocr.adapters.base import clean_label, html_label
+from src.ocr.adapters.drawio_adapter import extract_drawio_labels
+from src.ocr.adapters.svg_adapter import extract_svg_labels
+
+DRAWIO_MODEL = """<mxGraphModel><root>
+  <mxCell id="0"/>
+  <mxCell id="1" parent="0"/>
+  <mxCell id="zone" value="DMZ" style="swimlane" vertex="1" parent="1">
+    <mxGeometry x="100" y="50" width="400" height="300" as="geometry"/>
+  </mxCell>
+  <mxCell id="web" value="Web &amp;lt;-&amp;gt; API&lt;br&gt;Server" style="rounded=1;html=1;" vertex="1" parent="zone">
+    <mxGeometry x="20" y="40" width="120" height="60" as="geometry"/>
+  </mxCell>
+  <mxCell id="plain" value="Web &lt;-&gt; API  Server" style="rounded=1;" vertex="1" parent="zone">
+    <mxGeometry x="200" y="40" width="120" height="60" as="geometry"/>
+  </mxCell>
+  <UserObject id="db" label="&lt;b&gt;Card&lt;/b&gt; Vault &amp;amp; HSM">
+    <mxCell style="shape=cylinder;html=1" vertex="1" parent="1">
+      <mxGeometry x="600" y="50" width="80" height="80" as="geometry"/>
+    </mxCell>
+  </UserObject>
+</root></mxGraphModel>"""
+
+SVG = """<svg xmlns="http://www.w3.org/2000/svg">
+  <g transform="translate(10, 20)"><title>CDE</title>
+    <text x="5" y="30" font-size="10">Payments &lt;API&gt;</text>
+    <text x="5" y="30" font-size="10">Payments &lt;API&gt;</text>
+  </g>
+  <text x="0" y="12">R&amp;D   LAN</text>
+</svg>"""
+
+
+class LabelTextTest(unittest.TestCase):
+    def test_clean_label_keeps_markup_like_text(self):
+        self.assertEqual(clean_label(" Web <-> API\n Server "), "Web <-> API Server")
+        self.assertEqual(clean_label("a &lt; b"), "a &lt; b")
+
+    def test_html_label_unescapes_after_stripping(self):
+        self.assertEqual(html_label("Web &lt;-&gt; API<br>Server"), "Web <-> API Server")
+        self.assertEqual(html_label("<div><b>App</b></div><div>Tier &amp; DB</div>"), "App Tier & DB")
+        self.assertEqual(html_label("a < b"), "a < b")
+
+
+class AdapterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_get_adapter(self):
+        self.assertIs(get_adapter("arch.DRAWIO"), extract_drawio_labels)
+        self.assertIs(get_adapter("arch.svg"), extract_svg_labels)
+        self.assertIsNone(get_adapter("arch.png"))
+
+    def test_drawio_labels(self):
+        labels = extract_drawio_labels(self.write("arch.drawio", DRAWIO_MODEL))
+        # The HTML and the plain cell read the same
+        self.assertEqual([label["text"] for label in labels],
+                         ["DMZ", "Web <-> API Server", "Web <-> API Server", "Card Vault & HSM"])
+        web = labels[1]
+        self.assertEqual(web["bbox"], [120.0, 90.0, 120.0, 60.0])
+        self.assertEqual(web["path"], ["Page-1", "DMZ"])
+
+    def test_compressed_drawio_page(self):
+        deflate = zlib.compressobj(9, zlib.DEFLATED, -15)
+        raw = deflate.compress(urllib.parse.quote(DRAWIO_MODEL).encode()) + deflate.flush()
+        document = f'<mxfile><diagram name="Network">{base64.b64encode(raw).decode()}</diagram></mxfile>'
+        labels = extract_drawio_labels(self.write("arch.drawio", document))
+        self.assertIn(["Network", "DMZ"], [label["path"] for label in labels])
+
+    def test_svg_labels_are_not_stripped_or_unescaped_twice(self):
+        labels = extract_svg_labels(self.write("arch.svg", SVG))
+        self.assertEqual([label["text"] for label in labels], ["Payments <API>", "R&D LAN"])
+        self.assertEqual(labels[0]["path"], ["CDE"])
+        self.assertEqual(labels[0]["bbox"][:2], [15.0, 40.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
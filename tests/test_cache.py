@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from src.utils.cache import DiskCache, hash_file, hash_key
+
+
+class HashKeyTest(unittest.TestCase):
+    def test_parts_are_separated(self):
+        self.assertNotEqual(hash_key("ab", "c"), hash_key("a", "bc"))
+
+    def test_dict_order_does_not_matter(self):
+        self.assertEqual(hash_key({"a": 1, "b": 2}), hash_key({"b": 2, "a": 1}))
+
+    def test_bytes_and_files(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"\x89PNG")
+        try:
+            self.assertEqual(hash_file(f.name), hash_key(b"\x89PNG"))
+        finally:
+            os.remove(f.name)
+
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_round_trip(self):
+        cache = DiskCache(self.directory.name, 1024 * 1024)
+        cache.set("key", {"text": "Web Server"})
+        self.assertEqual(cache.get("key"), {"text": "Web Server"})
+        self.assertIsNone(cache.get("other"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = DiskCache(self.directory.name, 1024 * 1024)
+        with open(os.path.join(self.directory.name, "key.json"), "w") as f:
+            f.write('{"value": ')
+        self.assertIsNone(cache.get("key"))
+
+    def test_expired_entry_is_removed(self):
+        cache = DiskCache(self.directory.name, 1024 * 1024, ttl=60)
+        cache.set("key", 1)
+        with mock.patch("src.utils.cache.time.time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("key"))
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "key.json")))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        entry_size = len(json.dumps({"created_at": time.time(), "value": "x" * 100}))
+        cache = DiskCache(self.directory.name, entry_size * 2 + 10)
+        cache.set("old", "x" * 100)
+        cache.set("used", "x" * 100)
+        # Make the access order unambiguous despite coarse mtimes
+        os.utime(os.path.join(self.directory.name, "old.json"), (1, 1))
+        os.utime(os.path.join(self.directory.name, "used.json"), (2, 2))
+        cache.set("new", "x" * 100)
+        self.assertIsNone(cache.get("old"))
+        self.assertEqual(cache.get("used"), "x" * 100)
+        self.assertEqual(cache.get("new"), "x" * 100)
+
+    def test_clear(self):
+        cache = DiskCache(self.directory.name, 1024 * 1024)
+        cache.set("key", 1)
+        cache.clear()
+        self.assertIsNone(cache.get("key"))
+
+
+class OcrCacheKeyTest(unittest.TestCase):
+    def test_parameters_change_the_key(self):
+        from src.ocr.cache import ocr_cache_key
+
+        image = b"\x89PNG image"
+        self.assertEqual(ocr_cache_key(image, {"profile": "fast"}), ocr_cache_key(image, {"profile": "fast"}))
+        self.assertNotEqual(ocr_cache_key(image, {"profile": "fast"}),
+                            ocr_cache_key(image, {"profile": "accurate"}))
+        self.assertNotEqual(ocr_cache_key(image, {"profile": "fast"}),
+                            ocr_cache_key(image + b"!", {"profile": "fast"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
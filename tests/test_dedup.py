@@ -0,0 +1,98 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from src.batch.dedup import BKTree, DuplicateIndex, find_duplicates, hamming, phash
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+
+
+class BKTreeTest(unittest.TestCase):
+    def test_search_matches_brute_force(self):
+        rng = random.Random(7)
+        values = [rng.getrandbits(64) for _ in range(300)]
+        tree = BKTree()
+        for index, value in enumerate(values):
+            tree.add(value, index)
+        self.assertEqual(tree.size, 300)
+
+        for query in values[:20] + [rng.getrandbits(64) for _ in range(20)]:
+            expected = sorted((hamming(query, value), index) for index, value in enumerate(values)
+                              if hamming(query, value) <= 24)
+            found = tree.search(query, 24)
+            self.assertEqual(sorted(found), expected)
+            self.assertEqual([distance for distance, _ in found], sorted(d for d, _ in found))
+
+    def test_empty(self):
+        self.assertEqual(BKTree().search(0, 10), [])
+
+
+class DuplicateIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = DuplicateIndex(max_distance=4, max_cell_difference=5)
+
+    def test_near_hash_with_same_content_is_a_duplicate(self):
+        with mock.patch("src.batch.dedup.max_cell_difference", return_value=1.0):
+            self.assertIsNone(self.index.find_or_add("a.png", 0b1111, 1.5))
+            self.assertEqual(self.index.find_or_add("b.png", 0b0111, 1.52), ("a.png", 1))
+
+    def test_edited_content_is_not_a_duplicate(self):
+        with mock.patch("src.batch.dedup.max_cell_difference", return_value=40.0):
+            self.index.find_or_add("a.png", 0b1111, 1.5)
+            self.assertIsNone(self.index.find_or_add("b.png", 0b1111, 1.5))
+
+    def test_different_aspect_ratio_is_not_a_duplicate(self):
+        with mock.patch("src.batch.dedup.max_cell_difference", return_value=0.0) as difference:
+            self.index.find_or_add("a.png", 0b1111, 1.0)
+            self.assertIsNone(self.index.find_or_add("b.png", 0b1111, 2.0))
+        difference.assert_not_called()
+
+
+class FindDuplicatesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_vector_diagrams_are_not_hashed(self):
+        paths = ["a.svg", "b.drawio", "c.pdf"]
+        self.assertIsNone(phash("a.svg"))
+        self.assertEqual(find_duplicates(paths), (paths, {}, 0))
+
+    def test_unreadable_rasters_are_all_analyzed(self):
+        paths = [self.path("a.png"), self.path("b.png")]
+        for path in paths:
+            with open(path, "wb") as f:
+                f.write(b"not an image")
+        self.assertEqual(find_duplicates(paths, workers=1), (paths, {}, 0))
+
+    @unittest.skipIf(cv2 is None, "needs OpenCV")
+    def test_reexport_is_a_duplicate_and_edit_is_not(self):
+        image = np.full((600, 900), 255, np.uint8)
+        for x in range(60, 840, 200):
+            cv2.rectangle(image, (x, 200), (x + 140, 320), 0, 3)
+            cv2.putText(image, "API", (x + 30, 270), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+        cv2.imwrite(self.path("a.png"), image)
+        # Same diagram with a wider margin
+        cv2.imwrite(self.path("b.png"), cv2.copyMakeBorder(image, 40, 40, 40, 40, cv2.BORDER_CONSTANT, value=255))
+        edited = image.copy()
+        cv2.rectangle(edited, (300, 420), (600, 560), 0, -1)
+        cv2.imwrite(self.path("c.png"), edited)
+
+        paths = [self.path(name) for name in ("a.png", "b.png", "c.png")]
+        unique, duplicates, hashed = find_duplicates(paths, workers=1)
+        self.assertEqual(hashed, 3)
+        self.assertEqual(unique, [paths[0], paths[2]])
+        self.assertEqual(duplicates[paths[1]]["duplicate_of"], paths[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.analysis.analyzer import SecurityAnalyzer
+from src.analysis.incremental import (
+    build_delta_prompt, diff_components, load_bundle, merge_delta, plan_update, save_bundle
+)
+from src.utils.config import Config
+
+LABELS = ["Web Server", "Application Server", "Payments Database", "Load Balancer",
+          "Message Queue", "Reporting Service", "Customer Portal", "Admin Console"]
+
+
+def components(labels, **categories):
+    return {"text": "\n".join(labels), "detected_items": categories}
+
+
+def previous_results():
+    return {
+        "checks": {check: False for check in Config.RESPONSE_SCHEMA["checks"]},
+        "compliance_score": "Low",
+        "recommendations": ["Add a firewall"],
+        "analysis": {"key_risks": ["No firewall"]}
+    }
+
+
+class DiffTest(unittest.TestCase):
+    def test_ocr_jitter_and_noise_are_not_changes(self):
+        current = components(["Web Servr", "|~|"] + LABELS[1:])
+        diff = diff_components(components(LABELS), current)
+        self.assertEqual((diff["added"], diff["removed"]), ([], []))
+
+    def test_added_and_removed_labels(self):
+        previous = components(LABELS, data=["Payments Database"])
+        current = components(LABELS[1:] + ["Perimeter Firewall"], data=["Payments Database"],
+                             security=["Perimeter Firewall"])
+        diff = diff_components(previous, current)
+        self.assertEqual(diff["added"], ["Perimeter Firewall"])
+        self.assertEqual(diff["removed"], ["Web Server"])
+        self.assertEqual(diff["categories"], {"security": ["perimeter firewall"]})
+
+
+class PlanTest(unittest.TestCase):
+    def test_unchanged_diagram_is_reused(self):
+        self.assertEqual(plan_update(components(LABELS), components(LABELS))["mode"], "reuse")
+
+    def test_small_change_is_a_delta_on_the_affected_checks(self):
+        plan = plan_update(components(LABELS), components(LABELS + ["Perimeter Firewall"]))
+        self.assertEqual(plan["mode"], "delta")
+        self.assertEqual(plan["checks"], ["Firewalls present"])
+
+    def test_cde_labels_affect_cde_isolation(self):
+        plan = plan_update(components(LABELS), components(LABELS + ["Cardholder data store"]))
+        self.assertIn("CDE isolation", plan["checks"])
+
+    def test_mostly_new_diagram_is_analyzed_in_full(self):
+        plan = plan_update(components(LABELS), components(["Perimeter Firewall", "SIEM", "Card Vault"]))
+        self.assertEqual(plan["mode"], "full")
+
+    def test_unattributable_change_is_analyzed_in_full(self):
+        plan = plan_update(components(LABELS), components(LABELS + ["Marketing Website"]))
+        self.assertEqual(plan["mode"], "full")
+
+
+class DeltaTest(unittest.TestCase):
+    def test_prompt_asks_only_for_affected_checks(self):
+        diff = {"added": ["Perimeter Firewall"], "removed": ["Web Server"], "categories": {}, "total_lines": 8}
+        prompt = build_delta_prompt(previous_results(), diff, ["Firewalls present"])
+        schema = json.loads(prompt.rsplit("\n", 1)[1])
+        self.assertEqual(list(schema["checks"]), ["Firewalls present"])
+        self.assertIn("Perimeter Firewall", prompt)
+        self.assertIn("Web Server", prompt)
+
+    def test_merge_applies_only_affected_checks(self):
+        delta = {"checks": {"Firewalls present": True, "Audit logging": True}, "compliance_score": "Medium",
+                 "recommendations": []}
+        merged = merge_delta(previous_results(), delta, ["Firewalls present"])
+        self.assertTrue(merged["checks"]["Firewalls present"])
+        self.assertFalse(merged["checks"]["Audit logging"])
+        self.assertEqual(merged["compliance_score"], "Medium")
+        # Empty refreshed findings keep the earlier ones
+        self.assertEqual(merged["recommendations"], ["Add a firewall"])
+
+
+class BundleTest(unittest.TestCase):
+    def test_round_trip_and_rejects_other_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bundle.json")
+            save_bundle(path, components(LABELS), previous_results(), image_hash="abc")
+            bundle = load_bundle(path)
+            self.assertEqual(bundle["results"], previous_results())
+            self.assertEqual(bundle["image_hash"], "abc")
+
+            with open(path, "w") as f:
+                json.dump({"checks": {}}, f)
+            with self.assertRaises(ValueError):
+                load_bundle(path)
+
+
+class AnalyzeIncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = SecurityAnalyzer(provider_type='stub', use_cache=False, use_rules=True)
+        self.previous = {"components": components(LABELS), "results": previous_results()}
+
+    def test_reuse_never_calls_the_provider(self):
+        with mock.patch.object(self.analyzer.provider, '_generate') as generate:
+            results = self.analyzer.analyze_incremental(components(LABELS), self.previous)
+        generate.assert_not_called()
+        self.assertEqual(results["incremental"]["mode"], "reuse")
+        self.assertEqual(results["compliance_score"], "Low")
+
+    def test_change_decided_by_rules_needs_no_provider(self):
+        with mock.patch.object(self.analyzer.provider, '_generate') as generate:
+            results = self.analyzer.analyze_incremental(components(LABELS + ["Perimeter Firewall"]),
+                                                        self.previous)
+        generate.assert_not_called()
+        self.assertEqual(results["incremental"]["mode"], "delta")
+        self.assertTrue(results["checks"]["Firewalls present"])
+        self.assertFalse(results["checks"]["Audit logging"])
+
+
+if __name__ == '__main__':
+    unittest.main()
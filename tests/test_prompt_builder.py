@@ -0,0 +1,72 @@
+import unittest
+
+from src.analysis.prompt_builder import PromptBuilder, estimate_tokens, is_noise, rank_line
+from src.utils.config import Config
+
+
+def components(count):
+    labels = [f"Payment Service {i}" for i in range(count)]
+    return {
+        "detected_items": {"services": labels, "databases": ["Card Vault", "payment service 0"]},
+        "text": "\n".join(labels + ["Card Vault", "|~|", "Audit log shipping to SIEM"])
+    }
+
+
+class RankTest(unittest.TestCase):
+    def test_noise(self):
+        for line in ("ab", "|~|-=", "12345", "a-b-c-d"):
+            self.assertTrue(is_noise(line), line)
+            self.assertIsNone(rank_line(line), line)
+        self.assertFalse(is_noise("Web-to-App"))
+
+    def test_longer_word_runs_rank_higher(self):
+        self.assertGreater(rank_line("Audit log shipping to SIEM"), rank_line("DB 01"))
+
+
+class BudgetTest(unittest.TestCase):
+    def test_small_input_is_kept_whole(self):
+        builder = PromptBuilder(token_budget=4000)
+        prompt = builder.build(components(3))
+        self.assertIn('"databases":["Card Vault"]', prompt)
+        self.assertIn("Audit log shipping to SIEM", prompt)
+        self.assertEqual(builder.stats["dropped_duplicate_items"], 1)
+        self.assertEqual(builder.stats["dropped_items_over_budget"], 0)
+        self.assertEqual(builder.stats["dropped_noise"], 1)
+
+    def test_components_are_not_repeated_in_raw_text(self):
+        prompt = PromptBuilder(token_budget=4000).build(components(3))
+        raw_text = prompt.split("**Raw Text:**", 1)[1].split("**Instructions:**", 1)[0]
+        self.assertNotIn("Card Vault", raw_text)
+        self.assertNotIn("Payment Service 1", raw_text)
+
+    def test_large_input_fits_budget(self):
+        builder = PromptBuilder(token_budget=4000)
+        prompt = builder.build(components(2000))
+        self.assertLessEqual(estimate_tokens(prompt), 4000)
+        self.assertEqual(builder.stats["prompt_tokens"], estimate_tokens(prompt))
+        self.assertGreater(builder.stats["dropped_items_over_budget"], 0)
+        self.assertGreater(builder.stats["kept_items"], 0)
+
+    def test_kept_items_stay_in_reading_order(self):
+        # Room for both real names but not the noise between them
+        selected = PromptBuilder().select_detected_items(
+            {"services": ["Zeta gateway service", "xx", "Alpha payment service"]}, 22)
+        self.assertEqual(selected, {"services": ["Zeta gateway service", "Alpha payment service"]})
+
+
+class ScopeTest(unittest.TestCase):
+    def test_schema_narrowed_to_pending_checks(self):
+        builder = PromptBuilder()
+        data = components(3)
+        data["pending_checks"] = ["CDE isolation"]
+        self.assertEqual(list(builder.build_schema(data)["checks"]), ["CDE isolation"])
+        self.assertIn("Firewalls present", builder.build_scope(data))
+
+    def test_full_schema_without_rules(self):
+        builder = PromptBuilder()
+        self.assertEqual(builder.build_schema(components(3)), Config.RESPONSE_SCHEMA)
+        self.assertEqual(builder.build_scope(components(3)), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+
+from src.analysis.rate_limit import RateLimitExceeded, RateLimiter, TokenBucket, rate_limit_delay
+from src.utils.config import Config
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.bucket = TokenBucket(60)  # one per second
+        self.now = self.bucket.updated
+
+    def test_full_bucket_does_not_wait(self):
+        self.assertEqual(self.bucket.reserve(60, self.now), 0.0)
+
+    def test_debt_is_paid_back_at_the_refill_rate(self):
+        self.bucket.reserve(60, self.now)
+        self.assertAlmostEqual(self.bucket.reserve(1, self.now), 1.0)
+        # Reservations queue up behind the debt
+        self.assertAlmostEqual(self.bucket.reserve(2, self.now), 3.0)
+
+    def test_refills_over_time_up_to_capacity(self):
+        self.bucket.reserve(60, self.now)
+        self.assertEqual(self.bucket.reserve(10, self.now + 10), 0.0)
+        self.bucket.reserve(0, self.now + 1000)
+        self.assertEqual(self.bucket.level, 60)
+
+    def test_oversized_request_waits_for_a_full_bucket(self):
+        self.bucket.reserve(30, self.now)
+        self.assertAlmostEqual(self.bucket.reserve(500, self.now), 30.0)
+
+    def test_refund(self):
+        self.bucket.reserve(60, self.now)
+        self.bucket.refund(60)
+        self.assertEqual(self.bucket.reserve(60, self.now), 0.0)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_disabled_limiter_never_waits(self):
+        limiter = RateLimiter("test/model")
+        self.assertFalse(limiter.enabled)
+        self.assertEqual(limiter._reserve(10 ** 6), 0.0)
+
+    def test_waits_for_the_scarcer_quota(self):
+        limiter = RateLimiter("test/model", rpm=600, tpm=60)
+        self.assertEqual(limiter._reserve(60), 0.0)
+        self.assertAlmostEqual(limiter._reserve(30), 30.0, places=1)
+        self.assertEqual(limiter.waiting, 1)
+
+    def test_too_long_a_wait_raises_and_refunds(self):
+        limiter = RateLimiter("test/model", rpm=60, tpm=60)
+        limiter._reserve(60)
+        with mock.patch.object(Config, 'RATE_LIMIT_MAX_WAIT', 10):
+            with self.assertRaises(RateLimitExceeded):
+                limiter._reserve(30)
+        # The rejected request gave back its request and tokens
+        self.assertAlmostEqual(limiter.requests.level, 59, places=1)
+        self.assertAlmostEqual(limiter.tokens.level, 0, places=1)
+
+    def test_penalize_delays_every_request(self):
+        limiter = RateLimiter("test/model", rpm=600)
+        limiter.penalize(5)
+        self.assertAlmostEqual(limiter._reserve(1), 5.0, places=1)
+
+    def test_penalize_applies_even_without_quotas(self):
+        limiter = RateLimiter("test/model")
+        limiter.penalize(5)
+        self.assertGreater(limiter._reserve(1), 4.0)
+
+
+class RateLimitDelayTest(unittest.TestCase):
+    def error(self, name="RateLimitError", message="", **attributes):
+        error = type(name, (Exception,), {})(message)
+        for key, value in attributes.items():
+            setattr(error, key, value)
+        return error
+
+    def test_other_errors_are_not_rate_limits(self):
+        self.assertIsNone(rate_limit_delay(ValueError("Please retry in 5s")))
+        self.assertIsNone(rate_limit_delay(self.error("APIError", status_code=500)))
+
+    def test_retry_after_headers(self):
+        response = mock.Mock(headers={"retry-after": "7"})
+        self.assertEqual(rate_limit_delay(self.error(response=response)), 7.0)
+        response = mock.Mock(headers={"retry-after-ms": "1500"})
+        self.assertEqual(rate_limit_delay(self.error(response=response)), 1.5)
+
+    def test_hint_in_message(self):
+        error = self.error("ResourceExhausted", "429 Quota exceeded. retry_delay { seconds: 12 }")
+        self.assertEqual(rate_limit_delay(error), 12.0)
+        self.assertEqual(rate_limit_delay(self.error("Error", "Please retry in 2.5s", code=429)), 2.5)
+
+    def test_defaults_and_caps(self):
+        with mock.patch.object(Config, 'RATE_LIMIT_DEFAULT_DELAY', 3), \
+                mock.patch.object(Config, 'RATE_LIMIT_MAX_WAIT', 60):
+            self.assertEqual(rate_limit_delay(self.error()), 3)
+            self.assertEqual(rate_limit_delay(self.error(retry_after=600)), 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from src.analysis.llm_providers import StubProvider
+from src.utils.cache import DiskCache
+from src.utils.config import Config
+
+COMPONENTS = {"text": "Web Server\nPayments DB", "detected_items": {"services": ["Web Server"]}}
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = DiskCache(directory.name, 1024 * 1024)
+        patcher = mock.patch("src.analysis.llm_providers.base.get_response_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.provider = StubProvider()
+        self.provider.latency = 0
+        self.provider.use_cache = True
+
+    def analyze(self, provider=None):
+        provider = provider or self.provider
+        with mock.patch.object(provider, '_generate', wraps=provider._generate) as generate:
+            results = provider._analyze(COMPONENTS)
+        return results, generate.call_count
+
+    def test_repeated_prompt_is_served_from_cache(self):
+        first, calls = self.analyze()
+        self.assertEqual(calls, 1)
+        second, calls = self.analyze()
+        self.assertEqual(calls, 0)
+        self.assertEqual(second, first)
+
+    def test_model_is_part_of_the_key(self):
+        self.analyze()
+        other = StubProvider()
+        other.latency = 0
+        other.use_cache = True
+        other.config = dict(other.config, model="other-model")
+        _, calls = self.analyze(other)
+        self.assertEqual(calls, 1)
+
+    def test_incomplete_responses_are_not_cached(self):
+        response = json.loads(self.provider.response)
+        del response["recommendations"]
+        self.provider.response = json.dumps(response)
+        with mock.patch.object(Config, 'RESPONSE_REPAIR_ATTEMPTS', 0):
+            results, _ = self.analyze()
+            # Filled with defaults, so the next request asks again
+            self.assertIn("recommendations", results)
+            _, calls = self.analyze()
+        self.assertEqual(calls, 1)
+
+    def test_disabled_cache_is_not_touched(self):
+        self.provider.use_cache = False
+        with mock.patch.object(self.cache, 'get') as get, mock.patch.object(self.cache, 'set') as set_:
+            _, calls = self.analyze()
+        self.assertEqual(calls, 1)
+        get.assert_not_called()
+        set_.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import json
+import unittest
+
+from src.analysis.response_parser import (
+    extract_json, fill_defaults, followup_prompt, loads_tolerant, merge_fields, parse_response,
+    repair_json, validate
+)
+from src.utils.config import Config
+
+
+def complete_response(**overrides):
+    response = {
+        "checks": {check: True for check in Config.RESPONSE_SCHEMA["checks"]},
+        "compliance_score": "Medium",
+        "analysis": {key: [] for key in Config.RESPONSE_SCHEMA["analysis"]},
+        # Last, so truncating the text cuts into this array
+        "recommendations": ["Use TLS 1.2 between the web and app tiers"]
+    }
+    response.update(overrides)
+    return response
+
+
+class ExtractJsonTest(unittest.TestCase):
+    def test_markdown_fence_and_prose(self):
+        text = 'Here is the analysis:\n```json\n{"a": {"b": "}"}}\n```\nLet me know.'
+        self.assertEqual(extract_json(text), '{"a": {"b": "}"}}')
+
+    def test_no_object(self):
+        self.assertIsNone(extract_json("I cannot analyze this diagram."))
+
+    def test_truncated_object_runs_to_end(self):
+        self.assertEqual(extract_json('ok {"a": [1, 2'), '{"a": [1, 2')
+
+
+class RepairTest(unittest.TestCase):
+    def test_trailing_commas(self):
+        self.assertEqual(json.loads(repair_json('{"a": [1, 2,], "b": 3,}')), {"a": [1, 2], "b": 3})
+
+    def test_python_literals(self):
+        self.assertEqual(loads_tolerant('{"a": True, "b": None}'), {"a": True, "b": None})
+
+    def test_single_quoted_python_dict(self):
+        self.assertEqual(loads_tolerant("{'a': 'x', 'b': False}"), {"a": "x", "b": False})
+
+    def test_truncated_string_is_dropped(self):
+        self.assertEqual(json.loads(repair_json('{"a": ["x", "partial')), {"a": ["x"]})
+
+    def test_truncated_key_and_literal(self):
+        self.assertEqual(json.loads(repair_json('{"a": 1, "b": tr')), {"a": 1})
+        self.assertEqual(json.loads(repair_json('{"a": 1, "b"')), {"a": 1})
+
+    def test_escaped_quote_inside_string(self):
+        self.assertEqual(loads_tolerant('{"a": "say \\"hi\\"", }'), {"a": 'say "hi"'})
+
+    def test_unrepairable(self):
+        with self.assertRaises(ValueError):
+            loads_tolerant('{"a": <nope>}')
+
+
+class ValidateTest(unittest.TestCase):
+    def test_complete_response(self):
+        results, invalid = validate(complete_response())
+        self.assertEqual(invalid, [])
+        self.assertEqual(results["compliance_score"], "Medium")
+
+    def test_coerces_loose_values(self):
+        data = complete_response(compliance_score="Overall: low risk of compliance")
+        data["checks"] = {"firewalls_present": "yes", "Audit Logging": {"status": "missing"}}
+        data["recommendations"] = [{"title": "Add a WAF"}, "", 3]
+        results, invalid = validate(data)
+        self.assertTrue(results["checks"]["Firewalls present"])
+        self.assertFalse(results["checks"]["Audit logging"])
+        self.assertEqual(results["compliance_score"], "Low")
+        self.assertEqual(results["recommendations"], ["Add a WAF", "3"])
+        self.assertIn("checks.CDE isolation", invalid)
+
+    def test_only_requested_checks_are_required(self):
+        data = complete_response(checks={"CDE isolation": False})
+        _, invalid = validate(data, checks=["CDE isolation"])
+        self.assertEqual(invalid, [])
+
+
+class ParseResponseTest(unittest.TestCase):
+    def test_truncated_final_array_is_invalid(self):
+        text = json.dumps(complete_response())
+        text = text[:text.index('"Use TLS')] + '"Use TLS'
+        results, invalid = parse_response(text)
+        self.assertEqual(invalid, ["recommendations"])
+        self.assertNotIn("recommendations", results)
+
+    def test_truncated_array_after_complete_item_is_invalid(self):
+        text = json.dumps(complete_response())
+        text = text[:text.index('"Use TLS')] + '"Add MFA", '
+        _, invalid = parse_response(text)
+        self.assertEqual(invalid, ["recommendations"])
+
+    def test_truncated_analysis_list_is_invalid(self):
+        data = complete_response()
+        del data["recommendations"]
+        text = json.dumps(data)
+        text = text[:text.rindex('[]')] + '["WAF"'
+        results, invalid = parse_response(text)
+        self.assertIn("analysis.security_controls", invalid)
+        self.assertIn("recommendations", invalid)
+        self.assertNotIn("security_controls", results["analysis"])
+
+    def test_fenced_response(self):
+        text = "```json\n" + json.dumps(complete_response(), indent=2) + "\n```"
+        _, invalid = parse_response(text)
+        self.assertEqual(invalid, [])
+
+    def test_prose_after_object(self):
+        text = "Analysis: " + json.dumps(complete_response()) + "\nNote: {braces} in prose are ignored."
+        _, invalid = parse_response(text)
+        self.assertEqual(invalid, [])
+
+    def test_nothing_usable(self):
+        with self.assertRaises(ValueError):
+            parse_response('{"summary": "looks fine"}')
+
+
+class FollowupTest(unittest.TestCase):
+    def test_prompt_asks_only_for_missing_fields(self):
+        prompt = followup_prompt("Context.\nRespond ONLY with a valid JSON object matching {}",
+                                 {"compliance_score": "High"}, ["checks.Audit logging", "recommendations"])
+        self.assertTrue(prompt.startswith("Context."))
+        schema = json.loads(prompt.rsplit("\n", 1)[1])
+        self.assertEqual(set(schema), {"checks", "recommendations"})
+        self.assertEqual(list(schema["checks"]), ["Audit logging"])
+
+    def test_merge_fields(self):
+        results = {"checks": {"Firewalls present": True}}
+        remaining = merge_fields(results, '{"checks": {"Audit logging": "no"}, "compliance_score": "High"}',
+                                 ["checks.Audit logging", "recommendations"])
+        self.assertEqual(remaining, ["recommendations"])
+        self.assertEqual(results["checks"], {"Firewalls present": True, "Audit logging": False})
+        self.assertNotIn("compliance_score", results)
+
+    def test_merge_fields_ignores_truncated_values(self):
+        results = {}
+        remaining = merge_fields(results, '{"recommendations": ["Add MFA", "Rot', ["recommendations"])
+        self.assertEqual(remaining, ["recommendations"])
+        self.assertNotIn("recommendations", results)
+
+    def test_fill_defaults_is_conservative(self):
+        results = {"checks": {}}
+        fill_defaults(results, ["checks.CDE isolation", "compliance_score", "analysis.key_risks"])
+        self.assertEqual(results, {"checks": {"CDE isolation": False}, "compliance_score": "Low",
+                                   "analysis": {"key_risks": []}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.analysis.analyzer import SecurityAnalyzer
+from src.analysis.rules import LOCAL_SCORE, RuleEngine
+from src.utils.config import Config
+
+ALL_CONTROLS = [
+    "Perimeter Firewall", "DMZ", "Isolated CDE segment", "TLS 1.2", "KMS",
+    "RBAC", "SIEM"
+]
+
+
+def components(*lines):
+    return {"text": "\n".join(lines), "detected_items": {}}
+
+
+class EvaluateTest(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleEngine()
+
+    def test_labeled_controls_decide_checks(self):
+        outcome = self.rules.evaluate(components("Palo Alto NGFW", "Audit log server"))
+        self.assertEqual(outcome["decided"], {"Firewalls present": True, "Audit logging": True})
+        self.assertNotIn("Firewalls present", outcome["pending"])
+        self.assertIn("CDE isolation", outcome["pending"])
+
+    def test_negated_lines_are_not_evidence(self):
+        outcome = self.rules.evaluate(components("No firewall", "CDE not isolated", "Flat network zone"))
+        self.assertEqual(outcome["decided"], {})
+
+    def test_terms_inside_words_do_not_match(self):
+        outcome = self.rules.evaluate(components("Redis Sentinel", "Firewallet app", "Materialized view"))
+        self.assertEqual(outcome["decided"], {})
+
+    def test_cde_needs_isolation_on_the_same_label(self):
+        outcome = self.rules.evaluate(components("CDE", "Isolated subnet"))
+        self.assertNotIn("CDE isolation", outcome["decided"])
+        outcome = self.rules.evaluate(components("Cardholder data enclave"))
+        self.assertEqual(outcome["decided"], {"CDE isolation": True})
+
+    def test_merge_keeps_schema_order_and_local_passes(self):
+        outcome = self.rules.evaluate(components("SIEM"))
+        results = self.rules.merge({"checks": {"Audit logging": False, "Firewalls present": True}}, outcome)
+        self.assertEqual(list(results["checks"]), list(Config.RESPONSE_SCHEMA["checks"]))
+        self.assertTrue(results["checks"]["Audit logging"])
+        self.assertFalse(results["checks"]["CDE isolation"])
+
+
+class AllDecidedLocallyTest(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = SecurityAnalyzer(provider_type='stub', use_cache=False, use_rules=True)
+        self.components = components(*ALL_CONTROLS)
+
+    def assert_local(self, results):
+        self.assertTrue(all(results["checks"].values()))
+        self.assertEqual(list(results["checks"]), list(Config.RESPONSE_SCHEMA["checks"]))
+        self.assertEqual(results["compliance_score"], LOCAL_SCORE)
+
+    def test_provider_is_never_called(self):
+        with mock.patch.object(self.analyzer.provider, '_generate') as generate:
+            results = self.analyzer.analyze_security(self.components)
+        generate.assert_not_called()
+        self.assert_local(results)
+
+    def test_async_provider_is_never_called(self):
+        with mock.patch.object(self.analyzer.provider, '_generate_async') as generate:
+            results = asyncio.run(self.analyzer.analyze_security_async(self.components))
+        generate.assert_not_called()
+        self.assert_local(results)
+
+    def test_stream_provider_is_never_called(self):
+        events = []
+        with mock.patch.object(self.analyzer.provider, '_stream') as stream:
+            results = self.analyzer.analyze_security_stream(self.components, events.append)
+        stream.assert_not_called()
+        self.assert_local(results)
+        self.assertEqual(sum(event[0] == 'check' for event in events), len(Config.RESPONSE_SCHEMA["checks"]))
+
+    def test_one_missing_control_goes_to_the_provider(self):
+        with mock.patch.object(self.analyzer.provider, '_generate',
+                               return_value=self.analyzer.provider.response) as generate:
+            self.analyzer.analyze_security(components(*ALL_CONTROLS[1:]))
+        generate.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import http.client
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from src.service.jobs import AnalysisService, QueueFullError
+from src.service.server import make_server
+
+
+def make_service(**options):
+    """A service whose queue nobody drains; tests finish jobs by hand"""
+    service = AnalysisService(provider_type='stub', **options)
+    service._upload_dir = tempfile.mkdtemp()
+    return service
+
+
+def wait_for_queued(service):
+    while service._queue.empty():
+        time.sleep(0.001)
+
+
+def finish_next(service):
+    """Take a queued job off the queue and mark it finished, as a worker would"""
+    job_id, _ = service._queue.get_nowait()
+    service._update(job_id, status="done", results={})
+    service._finish(job_id)
+    return job_id
+
+
+class AnalysisServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.service = make_service(max_jobs=1, queue_size=2)
+        self.addCleanup(shutil.rmtree, self.service._upload_dir)
+
+    def test_rejects_unknown_file_types(self):
+        with self.assertRaises(ValueError):
+            self.service.submit(b"data", "notes.txt")
+        self.assertEqual(self.service._queue.qsize(), 0)
+
+    def test_full_queue(self):
+        self.service.submit(b"a", "a.png")
+        self.service.submit(b"b", "b.png")
+        with self.assertRaises(QueueFullError):
+            self.service.submit(b"c", "c.png")
+        self.assertEqual(self.service.health()["jobs"], {"queued": 2})
+
+    def test_wait_times_out_with_the_queued_job(self):
+        job = self.service.submit(b"a", "a.png")
+        self.assertEqual(self.service.wait(job["id"], 0.01)["status"], "queued")
+
+    def test_finished_jobs_beyond_max_jobs_are_evicted(self):
+        first = self.service.submit(b"a", "a.png")
+        second = self.service.submit(b"b", "b.png")
+        finish_next(self.service)
+        finish_next(self.service)
+        self.assertIsNone(self.service.get(first["id"]))
+        self.assertIsNone(self.service.wait(first["id"], 1))
+        self.assertEqual(self.service.get(second["id"])["status"], "done")
+
+
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        self.service = make_service(max_jobs=1, queue_size=4)
+        self.addCleanup(shutil.rmtree, self.service._upload_dir)
+        self.server = make_server(self.service, host='127.0.0.1', port=0)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def request(self, method, path, body=None):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2], timeout=10)
+        self.addCleanup(connection.close)
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_bad_wait_is_rejected_before_queueing(self):
+        for wait in ("abc", "inf", "nan", "-1"):
+            status, body = self.request("POST", f"/jobs?filename=a.png&wait={wait}", b"png")
+            self.assertEqual(status, 400, wait)
+            self.assertIn("wait", body["error"])
+        self.assertEqual(self.service._queue.qsize(), 0)
+
+    def test_submit_and_poll(self):
+        status, job = self.request("POST", "/jobs?filename=a.png", b"png")
+        self.assertEqual(status, 202)
+        self.assertEqual(self.request("GET", f"/jobs/{job['id']}")[1]["status"], "queued")
+
+    def test_unknown_job(self):
+        status, _ = self.request("GET", "/jobs/" + "0" * 32)
+        self.assertEqual(status, 404)
+
+    def test_wait_returns_finished_job(self):
+        def worker():
+            wait_for_queued(self.service)
+            finish_next(self.service)
+
+        threading.Thread(target=worker, daemon=True).start()
+        status, job = self.request("POST", "/jobs?filename=a.png&wait=5", b"png")
+        self.assertEqual(status, 200)
+        self.assertEqual(job["status"], "done")
+
+    def test_job_evicted_during_wait(self):
+        def worker():
+            wait_for_queued(self.service)
+            # A newer job finishing first pushes the waited-on job out of max_jobs=1
+            self.service.submit(b"png", "b.png")
+            waited, _ = self.service._queue.get_nowait()
+            finish_next(self.service)
+            self.service._update(waited, status="done", results={})
+            self.service._finish(waited)
+
+        threading.Thread(target=worker, daemon=True).start()
+        status, body = self.request("POST", "/jobs?filename=a.png&wait=5", b"png")
+        self.assertEqual(status, 410)
+        self.assertIn("expired", body["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
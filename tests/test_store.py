@@ -0,0 +1,90 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from src.storage import JsonlSink, ResultStore, build_record, open_store
+
+
+def record(path, checks, score="Medium", **options):
+    results = {"checks": checks, "compliance_score": score, "recommendations": ["Add MFA"],
+               "analysis": {"key_risks": ["Flat network"]}}
+    return build_record(path, {"text": "Web"}, results, provider="stub", image_hash=f"hash-{path}",
+                        ocr_time=0.12345, llm_time=1.0, **options)
+
+
+class ResultStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "results.db")
+
+    def test_round_trip(self):
+        original = record("a.png", {"Firewalls present": True, "CDE isolation": False},
+                          duplicate_of="b.png")
+        with ResultStore(self.path) as store:
+            store.add(original)
+            store.flush()
+            stored = store.get(1)
+        self.assertEqual(stored, original)
+        self.assertEqual(stored["timings"], {"ocr": 0.123, "llm": 1.0})
+
+    def test_writes_wait_for_a_full_batch(self):
+        with ResultStore(self.path, batch_size=2) as store:
+            store.add(record("a.png", {}))
+            self.assertIsNone(store.get(1))
+            store.add(record("b.png", {}))
+            self.assertIsNotNone(store.get(2))
+
+    def test_failing_uses_latest_result_per_path(self):
+        with ResultStore(self.path, batch_size=10) as store:
+            store.add(record("a.png", {"CDE isolation": False}))
+            store.add(record("b.png", {"CDE isolation": False}))
+            store.add(record("a.png", {"CDE isolation": True}))
+            # Queries see queued records without an explicit flush
+            self.assertEqual([row["image_path"] for row in store.failing("CDE isolation")], ["b.png"])
+            self.assertEqual(len(store.failing("CDE isolation", latest=False)), 2)
+
+    def test_history(self):
+        with ResultStore(self.path) as store:
+            store.add(record("a.png", {}, score="Low"))
+            store.add(record("a.png", {}, score="High"))
+            store.add(record("b.png", {}))
+            history = store.history("hash-a.png")
+        self.assertEqual([row["compliance_score"] for row in history], ["Low", "High"])
+
+    def test_reopening_keeps_records(self):
+        with ResultStore(self.path) as store:
+            store.add(record("a.png", {"Audit logging": True}))
+        with ResultStore(self.path) as store:
+            self.assertEqual(store.get(1)["checks"], {"Audit logging": True})
+
+
+class JsonlSinkTest(unittest.TestCase):
+    def test_one_record_per_line(self):
+        stream = io.StringIO()
+        with JsonlSink(stream=stream, batch_size=2) as sink:
+            sink.add(record("a.png", {}))
+            self.assertEqual(stream.getvalue(), "")
+            sink.add(record("b.png", {}))
+            sink.add(record("c.png", {}))
+        lines = stream.getvalue().splitlines()
+        self.assertEqual([json.loads(line)["image_path"] for line in lines], ["a.png", "b.png", "c.png"])
+
+    def test_needs_exactly_one_target(self):
+        with self.assertRaises(ValueError):
+            JsonlSink()
+
+    def test_open_store_picks_by_extension(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sink = open_store(os.path.join(directory, "out.jsonl"))
+            sink.close()
+            self.assertIsInstance(sink, JsonlSink)
+            store = open_store(os.path.join(directory, "out.db"))
+            store.close()
+            self.assertIsInstance(store, ResultStore)
+
+
+if __name__ == '__main__':
+    unittest.main()
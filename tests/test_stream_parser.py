@@ -0,0 +1,126 @@
+import json
+import unittest
+from unittest import mock
+
+from src.analysis.llm_providers import StubProvider
+from src.analysis.stream_parser import IncrementalJSONParser, events_from_results
+from src.utils.config import Config
+
+RESPONSE = {
+    "checks": {"Firewalls present": True, "Audit logging": False},
+    "compliance_score": "Medium",
+    "recommendations": ["Add a WAF", "Rotate \"shared\" keys"],
+    "analysis": {"key_risks": ["Flat network"], "security_controls": []}
+}
+EXPECTED = [
+    ("check", "Firewalls present", True),
+    ("check", "Audit logging", False),
+    ("compliance_score", None, "Medium"),
+    ("recommendation", None, "Add a WAF"),
+    ("recommendation", None, 'Rotate "shared" keys'),
+]
+
+
+def feed_all(chunks):
+    parser = IncrementalJSONParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events
+
+
+class IncrementalJSONParserTest(unittest.TestCase):
+    def test_whole_response(self):
+        self.assertEqual(feed_all([json.dumps(RESPONSE)]), EXPECTED)
+
+    def test_one_character_at_a_time(self):
+        self.assertEqual(feed_all(json.dumps(RESPONSE, indent=2)), EXPECTED)
+
+    def test_escaped_quote_split_across_chunks(self):
+        text = json.dumps(RESPONSE)
+        split = text.index('\\"shared') + 1
+        # The first chunk ends on the backslash, the next starts with the quote it escapes
+        self.assertEqual(feed_all([text[:split], text[split:]]), EXPECTED)
+
+    def test_fenced_response(self):
+        self.assertEqual(feed_all(["```json\n", json.dumps(RESPONSE), "\n```"]), EXPECTED)
+
+    def test_fields_are_emitted_as_soon_as_complete(self):
+        parser = IncrementalJSONParser()
+        self.assertEqual(parser.feed('{"checks": {"Firewalls present": tr'), [])
+        self.assertEqual(parser.feed('ue, '), [("check", "Firewalls present", True)])
+        self.assertEqual(parser.feed('"Audit logging": false}'), [("check", "Audit logging", False)])
+
+    def test_nested_analysis_is_not_emitted(self):
+        events = feed_all(['{"analysis": {"key_risks": ["x"]}, "compliance_score": "Low"}'])
+        self.assertEqual(events, [("compliance_score", None, "Low")])
+
+    def test_text_after_the_object_is_ignored(self):
+        events = feed_all(['{"compliance_score": "High"}', ' {"compliance_score": "Low"}'])
+        self.assertEqual(events, [("compliance_score", None, "High")])
+
+
+class EventsFromResultsTest(unittest.TestCase):
+    def test_replays_results_in_stream_order(self):
+        self.assertEqual(events_from_results(RESPONSE), EXPECTED)
+
+
+class AnalyzeStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.provider = StubProvider()
+        self.provider.latency = 0
+        self.provider.use_cache = False
+        self.response = {
+            "checks": {check: True for check in Config.RESPONSE_SCHEMA["checks"]},
+            "compliance_score": "Medium",
+            "analysis": {key: [] for key in Config.RESPONSE_SCHEMA["analysis"]},
+            "recommendations": ["Add a WAF", "Enable MFA", "Rotate keys"]
+        }
+
+    def stream(self, streamed, followup=None):
+        events = []
+        with mock.patch.object(self.provider, '_stream', return_value=iter([streamed])), \
+                mock.patch.object(self.provider, '_generate', return_value=followup) as generate:
+            results = self.provider.analyze_stream({"text": "Web", "detected_items": {}}, events.append)
+        return results, events, generate.call_count
+
+    def test_complete_stream_reports_each_field_once(self):
+        results, events, calls = self.stream(json.dumps(self.response))
+        self.assertEqual(calls, 0)
+        self.assertEqual(events, events_from_results(results))
+
+    def test_followup_only_adds_recommendations_not_yet_shown(self):
+        text = json.dumps(self.response)
+        truncated = text[:text.index('"Rotate')]
+        _, events, calls = self.stream(truncated, json.dumps({"recommendations": self.response["recommendations"]}))
+        self.assertEqual(calls, 1)
+        recommendations = [event[2] for event in events if event[0] == "recommendation"]
+        self.assertEqual(recommendations, ["Add a WAF", "Enable MFA", "Rotate keys"])
+        self.assertFalse([event for event in events if event[0] == "corrected"])
+
+    def test_different_followup_is_reported_as_corrected(self):
+        text = json.dumps(self.response)
+        truncated = text[:text.index('"Rotate')]
+        _, events, _ = self.stream(truncated, json.dumps({"recommendations": ["Segment the CDE"]}))
+        self.assertEqual(events[-1], ("corrected", "recommendations", ["Segment the CDE"]))
+
+    def test_invalid_values_wait_for_validation(self):
+        self.response["checks"]["Audit logging"] = "unclear"
+        followup = json.dumps({"checks": {"Audit logging": False}})
+        _, events, calls = self.stream(json.dumps(self.response), followup)
+        self.assertEqual(calls, 1)
+        audit = [event for event in events if event[1] in ("Audit logging", "checks.Audit logging")]
+        self.assertEqual(audit, [("check", "Audit logging", False)])
+
+    def test_loose_check_names_and_values_are_normalized(self):
+        self.response["checks"] = {"firewalls_present": "yes"}
+        self.response["checks"].update({check: False for check in Config.RESPONSE_SCHEMA["checks"]
+                                        if check != "Firewalls present"})
+        _, events, _ = self.stream(json.dumps(self.response))
+        self.assertEqual(events[0], ("check", "Firewalls present", True))
+        self.assertEqual(len([event for event in events if event[0] == "check"]),
+                         len(Config.RESPONSE_SCHEMA["checks"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.ocr.taxonomy import DEFAULT_TAXONOMY_PATH, Taxonomy, normalize
+
+CATEGORIES = {
+    "client": ["client", "web interface", "browser"],
+    "interfaces": ["interface", "api"],
+    "security": ["firewall", "waf", "web application firewall"],
+    "data": ["database", "db"],
+}
+
+
+class NormalizeTest(unittest.TestCase):
+    def test_folds_case_separators_and_ocr_confusions(self):
+        self.assertEqual(normalize("  F1re_wall-Rule "), "flre wall rule")
+        self.assertEqual(normalize("Fi|ewall"), normalize("Filewall"))
+        self.assertEqual(normalize("Modern"), "modem")
+
+
+class TaxonomyTest(unittest.TestCase):
+    def setUp(self):
+        self.taxonomy = Taxonomy(CATEGORIES)
+
+    def test_word_boundaries_and_plurals(self):
+        self.assertEqual(self.taxonomy.match("Two databases"), {"data"})
+        self.assertEqual(self.taxonomy.match("Rapid build"), set())
+        self.assertEqual(self.taxonomy.match("dbs"), {"data"})
+
+    def test_overlapping_terms_report_every_category(self):
+        self.assertEqual(self.taxonomy.match("Web Interface"), {"client", "interfaces"})
+        self.assertEqual(self.taxonomy.match("Web Application Firewall"), {"security"})
+
+    def test_one_ocr_error_is_matched_fuzzily(self):
+        self.assertEqual(self.taxonomy.match("Frewall"), {"security"})
+        self.assertEqual(self.taxonomy.match("Databsae"), {"data"})
+        self.assertEqual(self.taxonomy.match("frewalls"), {"security"})
+        # Short terms and larger errors are not
+        self.assertEqual(self.taxonomy.match("wab"), set())
+        self.assertEqual(self.taxonomy.match("Frwal"), set())
+        self.assertEqual(Taxonomy(CATEGORIES, fuzzy=False).match("Frewall"), set())
+
+    def test_categorize_keeps_taxonomy_order(self):
+        detected = self.taxonomy.categorize(["Edge WAF", "Browser", "Customer DB", "Web Interface"])
+        self.assertEqual(list(detected), list(CATEGORIES))
+        self.assertEqual(detected["client"], ["Browser", "Web Interface"])
+        self.assertEqual(detected["interfaces"], ["Web Interface"])
+        self.assertEqual(detected["security"], ["Edge WAF"])
+        self.assertEqual(detected["data"], ["Customer DB"])
+
+    def test_fingerprint_changes_with_terms_and_fuzziness(self):
+        self.assertEqual(Taxonomy(dict(CATEGORIES)).fingerprint, self.taxonomy.fingerprint)
+        self.assertNotEqual(Taxonomy(CATEGORIES, fuzzy=False).fingerprint, self.taxonomy.fingerprint)
+        self.assertNotEqual(Taxonomy({**CATEGORIES, "data": ["sql"]}).fingerprint, self.taxonomy.fingerprint)
+
+
+class FromFileTest(unittest.TestCase):
+    def test_default_taxonomy_loads(self):
+        taxonomy = Taxonomy.from_file(DEFAULT_TAXONOMY_PATH)
+        self.assertIn("security", taxonomy.match("Perimeter Firewall"))
+
+    def test_rejects_malformed_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "taxonomy.json")
+            with open(path, "w") as f:
+                json.dump({"security": "firewall"}, f)
+            with self.assertRaises(ValueError):
+                Taxonomy.from_file(path)
+
+
+if __name__ == '__main__':
+    unittest.main()